@@ -0,0 +1,178 @@
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+
+from . import db
+from .models import Brand, Make, Trim, Listings
+
+NON_WORD = re.compile(r'[^\w]+')
+
+# Earlier kinds win ties when ranking suggestions
+KIND_PRIORITY = {
+    'brand': 0,
+    'make': 1,
+    'model': 2,
+    'trim': 3,
+}
+
+MIN_TRIGRAM_SCORE = 0.5
+MAX_PREFIX_SCAN = 500
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return NON_WORD.sub(' ', (text or '').lower()).strip()
+
+
+# Trigrams of each word, padded so word starts weigh more than word middles
+def trigrams(text):
+    grams = set()
+    for word in text.split(' '):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# In-memory prefix and trigram index over the brand/make/trim taxonomy and listing models.
+# Prefix matches come from a sorted key list, typo tolerance from trigram overlap. Lookups never build it,
+# builds run on a background thread while lookups keep using the index they replace.
+class AutocompleteIndex:
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        # Held while a background build runs, so there is never more than one
+        self._build_lock = threading.Lock()
+        self._entries = {}
+        self._prefix_keys = []
+        self._trigrams = defaultdict(set)
+        self._built_at = None
+        self._generation = 0
+
+    # Starts building the index right away, lookups before it is ready find nothing
+    def init_app(self, app):
+        self.app = app
+        if app.config['AUTOCOMPLETE_WARM_ON_START']:
+            self.schedule_rebuild()
+
+    # Adds an entry and returns the keys it needs in the sorted prefix key list
+    def _index(self, entries, trigram_index, kind, label, id=None):
+        text = normalize(label)
+        if not text:
+            return []
+        entry_key = (kind, text)
+        if entry_key in entries:
+            return []
+
+        entries[entry_key] = {'label': label, 'kind': kind, 'id': id, 'trigrams': trigrams(text)}
+        for gram in entries[entry_key]['trigrams']:
+            trigram_index[gram].add(entry_key)
+
+        # Index the full label and every word start, so "cor" finds "Toyota Corolla"
+        words = text.split(' ')
+        return [(' '.join(words[position:]), position, entry_key) for position in range(len(words))]
+
+    # Returns False when the index was invalidated while this build was reading, its result is used but it
+    # doesn't count as fresh
+    def build(self):
+        with self._lock:
+            generation = self._generation
+        entries = {}
+        prefix_keys = []
+        trigram_index = defaultdict(set)
+
+        for brand in db.session.query(Brand.id, Brand.name):
+            prefix_keys.extend(self._index(entries, trigram_index, 'brand', brand.name, brand.id))
+        for make in db.session.query(Make.id, Make.name):
+            prefix_keys.extend(self._index(entries, trigram_index, 'make', make.name, make.id))
+        for trim in db.session.query(Trim.id, Trim.name):
+            prefix_keys.extend(self._index(entries, trigram_index, 'trim', trim.name, trim.id))
+        for (model,) in db.session.query(Listings.model).distinct():
+            prefix_keys.extend(self._index(entries, trigram_index, 'model', model))
+        prefix_keys.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._prefix_keys = prefix_keys
+            self._trigrams = trigram_index
+            fresh = generation == self._generation
+            self._built_at = time.monotonic() if fresh else None
+        return fresh
+
+    # Rebuilds after max_age to pick up changes made by other workers
+    def ensure_built(self, max_age):
+        if self._built_at is None or time.monotonic() - self._built_at > max_age:
+            self.schedule_rebuild()
+
+    # Starts a background build unless one is running already
+    def schedule_rebuild(self):
+        if self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild, args=(self.app,), daemon=True).start()
+
+    def _rebuild(self, app):
+        try:
+            with app.app_context():
+                while not self.build():
+                    pass
+        except Exception:
+            logger.exception('Rebuilding the autocomplete index failed')
+        finally:
+            self._build_lock.release()
+
+    # Blocks until a running build has finished, for tests and CLI commands
+    def wait(self):
+        with self._build_lock:
+            pass
+
+    def add(self, kind, label, id=None):
+        with self._lock:
+            for key in self._index(self._entries, self._trigrams, kind, label, id):
+                bisect.insort(self._prefix_keys, key)
+
+    # Renames and deletes are rare, rebuild in the background and serve the old index until then
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+            self._generation += 1
+        self.schedule_rebuild()
+
+    def search(self, query, limit=10):
+        text = normalize(query)
+        if not text:
+            return []
+
+        with self._lock:
+            matches = {}
+            start = bisect.bisect_left(self._prefix_keys, (text,))
+            for key, position, entry_key in self._prefix_keys[start:start + MAX_PREFIX_SCAN]:
+                if not key.startswith(text):
+                    break
+                rank = (0, position, KIND_PRIORITY[entry_key[0]], len(entry_key[1]))
+                if entry_key not in matches or rank < matches[entry_key]:
+                    matches[entry_key] = rank
+
+            if len(matches) < limit:
+                query_grams = trigrams(text)
+                overlaps = defaultdict(int)
+                for gram in query_grams:
+                    for entry_key in self._trigrams.get(gram, ()):
+                        overlaps[entry_key] += 1
+                for entry_key, overlap in overlaps.items():
+                    if entry_key in matches:
+                        continue
+                    # Share of the query's trigrams found in the label
+                    score = overlap / len(query_grams)
+                    if score >= MIN_TRIGRAM_SCORE:
+                        matches[entry_key] = (1, -score, KIND_PRIORITY[entry_key[0]], len(entry_key[1]))
+
+            ranked = sorted(matches, key=matches.get)[:limit]
+            return [
+                {'label': self._entries[entry_key]['label'], 'kind': entry_key[0], 'id': self._entries[entry_key]['id']}
+                for entry_key in ranked
+            ]
+
+
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,175 @@
+from contextlib import nullcontext
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from . import db
+from .images import image_pipeline, IMAGE_REFERENCE_COLUMNS, encode_variants, variant_filenames, write_images, \
+    reconcile_image_refcounts, released_image_names, upload_cleanup
+from .deletions import DELETION_DONE, deletion_resumable, run_deletion
+from .imports import create_import_job, import_format, import_resumable, run_import
+from .models import ImportJob, User, DeletionJob
+from .queries import reconcile_favorite_counts
+from .storage import upload_storage, LocalStorage
+from .vehicles import vehicle_type_for_slug
+
+
+# flask reconcile-favorite-counts, meant to run from cron
+@click.command('reconcile-favorite-counts')
+@with_appcontext
+def reconcile_favorite_counts_command():
+    updated = reconcile_favorite_counts()
+    db.session.commit()
+    click.echo(f'Corrected favorite_count on {updated} listings.')
+
+
+# flask reconcile-image-refcounts, meant to run from cron like reconcile-favorite-counts
+@click.command('reconcile-image-refcounts')
+@with_appcontext
+def reconcile_image_refcounts_command():
+    updated = reconcile_image_refcounts()
+    db.session.commit()
+    upload_cleanup.wait()
+    click.echo(f'Corrected ref_count on {updated} stored images.')
+
+
+# flask backfill-image-variants, writes the thumb/medium/full variants of images uploaded before they existed.
+# Images that already have all their variants are skipped unless --force is given.
+@click.command('backfill-image-variants')
+@click.option('--force', is_flag=True, help='Re-encode variants that already exist.')
+@with_appcontext
+def backfill_image_variants_command(force):
+    webp = current_app.config['IMAGE_WEBP']
+
+    filenames = set()
+    for column in IMAGE_REFERENCE_COLUMNS:
+        filenames.update(filename for (filename,) in db.session.query(column).filter(column.isnot(None)).distinct())
+
+    written = skipped = failed = 0
+    for filename in sorted(filenames):
+        variants = variant_filenames(filename, webp).values()
+        if not upload_storage.exists(filename) or (not force and all(map(upload_storage.exists, variants))):
+            skipped += 1
+            continue
+
+        try:
+            write_images(encode_variants(upload_storage.read(filename), filename, webp))
+            written += 1
+        except Exception as e:
+            failed += 1
+            click.echo(f'{filename}: {e}', err=True)
+
+    click.echo(f'Wrote variants for {written} images, skipped {skipped}, failed {failed}.')
+
+
+# flask shard-uploads, moves files left in the flat UPLOAD_FOLDER into the sharded layout. Safe to run
+# while serving, lookups fall back to the flat path until a file has moved.
+@click.command('shard-uploads')
+@with_appcontext
+def shard_uploads_command():
+    if not isinstance(upload_storage.backend, LocalStorage):
+        click.echo('Uploads are not kept on local disk, nothing to move.')
+        return
+    moved = upload_storage.backend.shard_flat_files()
+    click.echo(f'Moved {moved} files into the sharded layout.')
+
+
+# flask import-listings USER_ID ROWS_FILE [--images ZIP] [--vehicle SLUG], the bulk import API from the
+# shell. flask import-listings --resume JOB_ID picks a failed or interrupted job up where it stopped.
+@click.command('import-listings')
+@click.argument('user_id', type=int, required=False)
+@click.argument('rows_file', type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option('--images', type=click.Path(exists=True, dir_okay=False), help='Zip of the images the rows name.')
+@click.option('--vehicle', help='Vehicle type slug for rows without a vehicle_type column.')
+@click.option('--resume', 'resume_id', type=int, help='Resume this import job instead of starting one.')
+@with_appcontext
+def import_listings_command(user_id, rows_file, images, vehicle, resume_id):
+    if resume_id is not None:
+        job = db.session.get(ImportJob, resume_id)
+        if job is None:
+            raise click.ClickException(f'Import job {resume_id} not found.')
+        if not import_resumable(job):
+            raise click.ClickException(f'Import job {resume_id} is {job.status}.')
+    else:
+        if user_id is None or rows_file is None:
+            raise click.UsageError('USER_ID and ROWS_FILE are required unless --resume is given.')
+        user = db.session.get(User, user_id)
+        if user is None:
+            raise click.ClickException(f'User {user_id} not found.')
+        rows_format = import_format(rows_file)
+        if rows_format is None:
+            raise click.ClickException('ROWS_FILE must be .csv, .ndjson or .jsonl.')
+        if vehicle and vehicle_type_for_slug(vehicle) is None:
+            raise click.ClickException(f'Unknown vehicle type {vehicle!r}.')
+
+        with open(rows_file, 'rb') as rows, (open(images, 'rb') if images else nullcontext()) as images_zip:
+            job = create_import_job(user.id, rows, rows_format, images_zip, vehicle, user.email)
+
+    job = run_import(job.id, current_app.config['IMPORT_CHUNK_SIZE'])
+    image_pipeline.wait()
+    upload_cleanup.wait()
+    click.echo(f'Import job {job.id} {job.status}: {job.created_count} created, {job.failed_count} failed.')
+    if job.error:
+        click.echo(job.error, err=True)
+
+
+# flask run-deletion-jobs, runs the deletion jobs the worker gave up on or that were lost with the process
+# that queued them. Meant to run from cron.
+@click.command('run-deletion-jobs')
+@with_appcontext
+def run_deletion_jobs_command():
+    jobs = db.session.scalars(
+        select(DeletionJob.id).where(DeletionJob.status != DELETION_DONE).order_by(DeletionJob.id)
+    ).all()
+    ran = failed = 0
+    for job_id in jobs:
+        job = db.session.get(DeletionJob, job_id)
+        if not deletion_resumable(job):
+            continue
+        job = run_deletion(job.id, current_app.config['DELETION_CHUNK_SIZE'])
+        ran += 1
+        if job.error:
+            failed += 1
+            click.echo(f'Deletion job {job.id} failed: {job.error}', err=True)
+    upload_cleanup.wait()
+    click.echo(f'Ran {ran} deletion jobs, {failed} failed.')
+
+
+# flask sweep-image-processing, finishes listings whose images were still being encoded when a worker restarted
+# or the pool broke. Meant to run from cron.
+@click.command('sweep-image-processing')
+@click.option('--older-than', default=30, show_default=True,
+              help='Minutes a listing has to have been processing for.')
+@with_appcontext
+def sweep_image_processing_command(older_than):
+    listing_ids = image_pipeline.sweep(timedelta(minutes=older_than))
+    upload_cleanup.wait()
+    click.echo(f'Swept {len(listing_ids)} listings stuck in processing.')
+
+
+# flask sweep-released-images, deletes the files of images released by a process that stopped before it got to
+# them, or whose delete kept failing. Meant to run from cron.
+@click.command('sweep-released-images')
+@with_appcontext
+def sweep_released_images_command():
+    filenames = released_image_names()
+    db.session.commit()
+    if filenames:
+        upload_cleanup.schedule(filenames)
+    upload_cleanup.wait()
+    remaining = len(released_image_names())
+    click.echo(f'Swept {len(filenames)} released images, {remaining} still to delete.')
+
+
+def register_commands(app):
+    app.cli.add_command(reconcile_favorite_counts_command)
+    app.cli.add_command(reconcile_image_refcounts_command)
+    app.cli.add_command(backfill_image_variants_command)
+    app.cli.add_command(shard_uploads_command)
+    app.cli.add_command(import_listings_command)
+    app.cli.add_command(run_deletion_jobs_command)
+    app.cli.add_command(sweep_image_processing_command)
+    app.cli.add_command(sweep_released_images_command)
@@ -1,6 +1,10 @@
 from functools import wraps
-from flask import g
-from flask_jwt_extended import get_jwt_identity
+from flask import g, jsonify
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import InvalidTokenError
+
+from .vehicles import vehicle_type_for_slug
 
 
 def current_user_required(fn):
@@ -10,4 +14,31 @@ def current_user_required(fn):
         g.current_user = user_identity
         return fn(*args, **kwargs)
 
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+# For public endpoints that do more for signed in users. A missing, expired or invalid token makes the request
+# anonymous instead of a 401, clients often send a stale token along.
+def optional_current_user(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            verify_jwt_in_request(optional=True)
+            g.current_user = get_jwt_identity()
+        except (InvalidTokenError, JWTExtendedException):
+            g.current_user = None
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+# Resolves the <vehicle> URL slug into the vehicle_type argument of the listing endpoints
+def vehicle_type_required(fn):
+    @wraps(fn)
+    def wrapper(*args, vehicle=None, **kwargs):
+        vehicle_type = vehicle_type_for_slug(vehicle)
+        if vehicle_type is None:
+            return jsonify({'message': 'Vehicle type not found.'}), 400
+        return fn(*args, vehicle_type=vehicle_type, **kwargs)
+
+    return wrapper
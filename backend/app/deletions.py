@@ -0,0 +1,237 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update, delete, or_
+
+from . import db, stripe
+from .images import release_images
+from .models import DeletionJob, User, Listings, ListingImage, SafetyFeatures, ListingAmenities, Favorites, \
+    RefreshToken, Messages, Conversation, OrderHistory, PushToken, ImportJob, PUBLISH_STATUS_DELETED
+from .queries import feed_totals, release_user_favorite_counts
+from .vehicles import VEHICLE_TYPES
+
+DELETION_PENDING = 'pending'
+DELETION_RUNNING = 'running'
+DELETION_DONE = 'done'
+DELETION_FAILED = 'failed'
+
+# A running job that hasn't finished after this long is taken to be dead and may be run again
+DELETION_STALE_AFTER = timedelta(minutes=30)
+
+# Attempts the worker makes at a job before leaving it failed for flask run-deletion-jobs
+DELETION_ATTEMPTS = 5
+DELETION_RETRY_DELAY = 2  # seconds, doubled after every failed attempt
+
+STRIPE_ATTEMPTS = 4
+STRIPE_RETRY_DELAY = 1  # seconds, doubled after every failed attempt
+
+DEFAULT_PROFILE_PICTURE = 'default_profile_picture.jpg'
+
+# Tables holding one or more rows per listing, purged before the listings themselves
+LISTING_CHILD_MODELS = (
+    ListingImage, SafetyFeatures, ListingAmenities, Favorites,
+    *(vehicle['model'] for vehicle in VEHICLE_TYPES.values()),
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Hides an account and its listings at once and queues the purge. The email is cleared so nobody can sign
+# in to it any more and the address can sign up again straight away.
+def request_user_deletion(user, requested_by=None):
+    user.email = None
+    user.deleted_date = datetime.now()
+    db.session.execute(delete(RefreshToken).where(RefreshToken.user_id == user.id))
+    db.session.execute(
+        update(Listings)
+        .where(Listings.user_id == user.id)
+        .values(publish_status=PUBLISH_STATUS_DELETED)
+        .execution_options(synchronize_session=False)
+    )
+    # The bulk UPDATE skips the publish_status listener
+    feed_totals.clear()
+    return _queue_deletion(DeletionJob(user_id=user.id, created_by=requested_by))
+
+
+def request_listing_deletion(listing, requested_by=None):
+    listing.publish_status = PUBLISH_STATUS_DELETED
+    return _queue_deletion(DeletionJob(user_id=listing.user_id, listing_id=listing.id, created_by=requested_by))
+
+
+def _queue_deletion(job):
+    job.status = DELETION_PENDING
+    db.session.add(job)
+    db.session.commit()
+    deletion_worker.submit(job.id)
+    return job
+
+
+# A job that isn't done can be run again, unless it is still being worked on
+def deletion_resumable(job):
+    if job.status == DELETION_DONE:
+        return False
+    if job.status == DELETION_RUNNING:
+        return job.updated_date is None or job.updated_date < datetime.now() - DELETION_STALE_AFTER
+    return True
+
+
+# Deletes the listings and every row under them with one DELETE per table. Their images are released in
+# the same transaction and removed in the background once it commits.
+def purge_listings(listing_ids):
+    if not listing_ids:
+        return
+
+    featured_images = db.session.scalars(select(Listings.featured_image).where(Listings.id.in_(listing_ids)))
+    gallery_images = db.session.scalars(select(ListingImage.image).where(ListingImage.listing_id.in_(listing_ids)))
+    release_images([*featured_images, *gallery_images])
+
+    for model in LISTING_CHILD_MODELS:
+        db.session.execute(
+            delete(model).where(model.listing_id.in_(listing_ids)).execution_options(synchronize_session=False)
+        )
+    db.session.execute(
+        delete(Listings).where(Listings.id.in_(listing_ids)).execution_options(synchronize_session=False)
+    )
+
+
+# Purges an account chunk_size listings per transaction, then the rows that hang off the user
+def purge_user(user_id, chunk_size):
+    while True:
+        listing_ids = db.session.scalars(
+            select(Listings.id).where(Listings.user_id == user_id).order_by(Listings.id).limit(chunk_size)
+        ).all()
+        if not listing_ids:
+            break
+        purge_listings(listing_ids)
+        db.session.commit()
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return
+
+    conversation_ids = select(Conversation.id).where(
+        or_(Conversation.sender_id == user_id, Conversation.receiver_id == user_id)
+    ).scalar_subquery()
+    import_folders = db.session.scalars(select(ImportJob.rows_path).where(ImportJob.user_id == user_id)).all()
+    release_user_favorite_counts(user_id)
+    for statement in (
+        delete(Messages).where(or_(Messages.sender_id == user_id, Messages.conversation_id.in_(conversation_ids))),
+        delete(Conversation).where(or_(Conversation.sender_id == user_id, Conversation.receiver_id == user_id)),
+        delete(Favorites).where(Favorites.user_id == user_id),
+        delete(RefreshToken).where(RefreshToken.user_id == user_id),
+        delete(OrderHistory).where(OrderHistory.user_id == user_id),
+        delete(PushToken).where(PushToken.user_id == user_id),
+        delete(ImportJob).where(ImportJob.user_id == user_id),
+    ):
+        db.session.execute(statement.execution_options(synchronize_session=False))
+
+    if user.profile_picture != DEFAULT_PROFILE_PICTURE:
+        release_images([user.profile_picture])
+    db.session.execute(delete(User).where(User.id == user_id).execution_options(synchronize_session=False))
+    db.session.commit()
+
+    for rows_path in import_folders:
+        shutil.rmtree(os.path.dirname(rows_path), ignore_errors=True)
+
+
+# Stripe customers are named after the user id. A customer Stripe doesn't know is already gone, network
+# errors, rate limits and Stripe's own errors are retried with backoff.
+def delete_stripe_customer(user_id):
+    for attempt in range(1, STRIPE_ATTEMPTS + 1):
+        try:
+            stripe.Customer.delete(f'imotorV3_{user_id}')
+            return
+        except stripe.error.InvalidRequestError as e:
+            logger.info('Stripe customer of user %s not deleted: %s', user_id, e)
+            return
+        except (stripe.error.APIConnectionError, stripe.error.RateLimitError, stripe.error.APIError):
+            if attempt == STRIPE_ATTEMPTS:
+                raise
+            logger.warning('Deleting the Stripe customer of user %s failed, retrying (attempt %s)', user_id, attempt,
+                           exc_info=True)
+            time.sleep(STRIPE_RETRY_DELAY * 2 ** (attempt - 1))
+
+
+# Runs a deletion job from the start, every step skips what an earlier attempt already removed
+def run_deletion(job_id, chunk_size):
+    job = db.session.get(DeletionJob, job_id)
+    job.status = DELETION_RUNNING
+    job.attempts += 1
+    job.error = None
+    job.updated_date = datetime.now()
+    db.session.commit()
+
+    try:
+        if job.listing_id is not None:
+            purge_listings([job.listing_id])
+            db.session.commit()
+        else:
+            purge_user(job.user_id, chunk_size)
+            delete_stripe_customer(job.user_id)
+        job.status = DELETION_DONE
+    except Exception as e:
+        logger.exception('Deletion job %s failed', job_id)
+        db.session.rollback()
+        job.status = DELETION_FAILED
+        job.error = str(e)
+
+    job.updated_date = datetime.now()
+    db.session.commit()
+    return job
+
+
+# Runs deletion jobs one at a time on a background thread, retrying a failed job with backoff. A job that
+# keeps failing, or was queued by a process that stopped, is picked up by flask run-deletion-jobs.
+class DeletionWorker:
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_loop, daemon=True)
+                self._thread.start()
+
+    # Call after the job is committed
+    def submit(self, job_id):
+        self._start()
+        self._queue.put(job_id)
+
+    # Blocks until every submitted job has finished or run out of attempts
+    def wait(self):
+        self._queue.join()
+
+    def _run_loop(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id):
+        for attempt in range(1, DELETION_ATTEMPTS + 1):
+            try:
+                with self.app.app_context():
+                    status = run_deletion(job_id, current_app.config['DELETION_CHUNK_SIZE']).status
+            except Exception:
+                logger.exception('Running deletion job %s failed', job_id)
+                status = DELETION_FAILED
+            if status != DELETION_FAILED or attempt == DELETION_ATTEMPTS:
+                return
+            time.sleep(DELETION_RETRY_DELAY * 2 ** (attempt - 1))
+
+
+deletion_worker = DeletionWorker()
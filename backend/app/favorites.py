@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+
+from . import db
+from .models import Favorites
+
+# Redis can't store an empty set, so every cached set carries this member. Listing ids start at 1.
+EMPTY_SET_MARKER = 0
+
+
+# In-process LRU of favorite listing id sets, one entry per user
+class LocalFavoritesBackend:
+    def __init__(self, max_users, ttl):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            listing_ids, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return set(listing_ids)
+
+    def set(self, user_id, listing_ids):
+        with self._lock:
+            self._entries[user_id] = (set(listing_ids), time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def add(self, user_id, listing_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[0].add(listing_id)
+
+    def discard(self, user_id, listing_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[0].discard(listing_id)
+
+
+# Shared backend for multi-worker deployments, one Redis set per user.
+# Works with any client exposing the redis-py set commands.
+class RedisFavoritesBackend:
+    def __init__(self, client, ttl, prefix='favorites:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, user_id):
+        return f'{self.prefix}{user_id}'
+
+    def get(self, user_id):
+        members = self.client.smembers(self._key(user_id))
+        if not members:
+            return None
+        return {int(member) for member in members} - {EMPTY_SET_MARKER}
+
+    def set(self, user_id, listing_ids):
+        key = self._key(user_id)
+        pipeline = self.client.pipeline()
+        pipeline.delete(key)
+        pipeline.sadd(key, EMPTY_SET_MARKER, *listing_ids)
+        pipeline.expire(key, self.ttl)
+        pipeline.execute()
+
+    # Only touch sets that are already cached, a partial set would read as the user's full favorites
+    def add(self, user_id, listing_id):
+        key = self._key(user_id)
+        if self.client.exists(key):
+            self.client.sadd(key, listing_id)
+
+    def discard(self, user_id, listing_id):
+        self.client.srem(self._key(user_id), listing_id)
+
+
+# Per-user favorite id sets, loaded from the favorites table on a miss and written through
+# by add_favorite / remove_favorite
+class FavoritesCache:
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        url = app.config.get('FAVORITES_CACHE_URL')
+        ttl = app.config['FAVORITES_CACHE_TTL']
+        if url:
+            # redis is optional, only needed when a shared cache is configured
+            import redis
+            self.backend = RedisFavoritesBackend(redis.Redis.from_url(url), ttl)
+        else:
+            self.backend = LocalFavoritesBackend(app.config['FAVORITES_CACHE_SIZE'], ttl)
+
+    def favorite_ids(self, user_id):
+        listing_ids = self.backend.get(user_id)
+        if listing_ids is None:
+            listing_ids = {
+                listing_id for (listing_id,) in db.session.query(Favorites.listing_id).filter_by(user_id=user_id)
+            }
+            self.backend.set(user_id, listing_ids)
+        return listing_ids
+
+    def added(self, user_id, listing_id):
+        self.backend.add(user_id, listing_id)
+
+    def removed(self, user_id, listing_id):
+        self.backend.discard(user_id, listing_id)
+
+
+favorites_cache = FavoritesCache()
@@ -0,0 +1,660 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+from PIL import Image, ImageOps
+from sqlalchemy import select, update, delete, func, event, or_, and_, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import Listings, ListingImage, StoredImage, User, Brand, Location, Community
+from .storage import upload_storage
+
+IMAGE_PROCESSING = 'processing'
+IMAGE_READY = 'ready'
+
+logger = logging.getLogger(__name__)
+
+
+# Longest side of a stored image, larger uploads are scaled down before encoding
+MAX_IMAGE_DIMENSION = 2048
+
+# Quality bounds of a stored image, most photos fit at the top one
+MAX_JPEG_QUALITY = 85
+MIN_JPEG_QUALITY = 60
+
+# Size of an optimized progressive encode at each quality relative to a plain encode at MAX_JPEG_QUALITY.
+# Taken from the high end of what photos do, so an estimate errs towards fitting.
+JPEG_RELATIVE_SIZES = ((85, 0.92), (80, 0.80), (75, 0.70), (70, 0.63), (65, 0.57), (60, 0.52))
+
+# Share of the size limit a shrunk image is aimed at
+JPEG_SCALE_HEADROOM = 0.9
+
+# Fixed-width copies saved next to every upload so list views don't download the full image.
+# Largest first, each one is scaled down from the one before.
+IMAGE_VARIANTS = (('full', 1280), ('medium', 600), ('thumb', 200))
+VARIANT_JPEG_QUALITY = 80
+VARIANT_WEBP_QUALITY = 75
+
+# Part of every encoded image's content address, bump it when the encoder's output changes so
+# re-uploads don't keep reusing files encoded the old way
+ENCODER_VERSION = 2
+
+# Every column naming an uploaded file
+IMAGE_REFERENCE_COLUMNS = (
+    ListingImage.image, Listings.featured_image, User.profile_picture, Brand.image, Location.image, Community.image
+)
+
+# Raw listing uploads are kept under this prefix until their encoded files are written
+STAGING_PREFIX = 'staging_'
+
+# Size target of encoded listing images
+LISTING_IMAGE_MAX_SIZE_KB = 1024
+
+# Uploads queued for removal in a session, removed once its transaction commits
+DISCARDED_UPLOADS = 'discarded_uploads'
+# session.info key of the raw bytes ImageJob.stage saved in the current transaction
+STAGED_UPLOADS = 'staged_uploads'
+
+# Upload names per background delete, each name taking its variants along
+UPLOAD_CLEANUP_BATCH = 100
+UPLOAD_CLEANUP_ATTEMPTS = 5
+UPLOAD_CLEANUP_RETRY_DELAY = 1  # seconds, doubled after every failed attempt
+
+
+# final=False skips optimize and progressive, a quarter of the cost for encodes that are only measured
+def _jpeg_bytes(img, quality, final=True):
+    output = io.BytesIO()
+    if final:
+        img.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(output, format='JPEG', quality=quality)
+    return output.getvalue()
+
+
+def _webp_bytes(img, quality):
+    output = io.BytesIO()
+    img.save(output, format='WEBP', quality=quality, method=4)
+    return output.getvalue()
+
+
+def _decode(data):
+    img = Image.open(io.BytesIO(data))
+    # Let the JPEG decoder skip straight to the nearest 1/2, 1/4 or 1/8 scale above the cap
+    if img.format == 'JPEG':
+        img.draft('RGB', (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        # Flatten transparency onto white rather than whatever colour sits under it
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    if max(img.size) > MAX_IMAGE_DIMENSION:
+        # thumbnail() uses reduce() for the coarse steps before resampling the rest
+        img.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS, reducing_gap=3.0)
+    return img
+
+
+def _scaled(img, scale):
+    return img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.LANCZOS)
+
+
+# Measures the image with one plain encode at the top quality, then encodes it once at the highest quality
+# expected to fit. Past the lowest quality it shrinks the image instead, JPEG size is roughly proportional
+# to the pixel count. Only an estimate that still misses the limit costs a third encode.
+def _fit_jpeg(img, max_size_kb):
+    max_size_bytes = max_size_kb * 1024
+    measured = len(_jpeg_bytes(img, MAX_JPEG_QUALITY, final=False))
+
+    for quality, relative_size in JPEG_RELATIVE_SIZES:
+        if measured * relative_size <= max_size_bytes:
+            encoded = _jpeg_bytes(img, quality)
+            break
+    else:
+        quality, relative_size = JPEG_RELATIVE_SIZES[-1]
+        img = _scaled(img, (max_size_bytes * JPEG_SCALE_HEADROOM / (measured * relative_size)) ** 0.5)
+        encoded = _jpeg_bytes(img, quality)
+
+    if len(encoded) > max_size_bytes:
+        img = _scaled(img, (max_size_bytes * JPEG_SCALE_HEADROOM / len(encoded)) ** 0.5)
+        encoded = _jpeg_bytes(img, MIN_JPEG_QUALITY)
+    return encoded
+
+
+# File name of one variant of an upload, e.g. <hash>_thumb.jpg for <hash>.png
+def variant_filename(filename, variant, ext='jpg'):
+    return f'{os.path.splitext(filename)[0]}_{variant}.{ext}'
+
+
+# Variant file names of an upload keyed by variant, with <variant>_webp keys when WebP copies are made
+def variant_filenames(filename, webp=False):
+    names = {}
+    for variant, _ in IMAGE_VARIANTS:
+        names[variant] = variant_filename(filename, variant)
+        if webp:
+            names[f'{variant}_webp'] = variant_filename(filename, variant, 'webp')
+    return names
+
+
+# Encoded variants of a decoded image keyed by file name. Images narrower than a variant's width
+# are not scaled up.
+def _encode_variants(img, filename, webp):
+    files = {}
+    for variant, width in IMAGE_VARIANTS:
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        files[variant_filename(filename, variant)] = _jpeg_bytes(img, VARIANT_JPEG_QUALITY)
+        if webp:
+            files[variant_filename(filename, variant, 'webp')] = _webp_bytes(img, VARIANT_WEBP_QUALITY)
+    return files
+
+
+# Decode, orient, scale and encode one upload to a progressive JPEG of at most max_size_kb, plus its
+# variants, keyed by file name. EXIF is not carried over. Runs in the worker processes, so it takes and
+# returns plain bytes. The main file comes last, once it exists its variants do too.
+def encode_image_files(data, filename, max_size_kb, webp=False):
+    img = _decode(data)
+    files = _encode_variants(img, filename, webp)
+    files[filename] = _fit_jpeg(img, max_size_kb)
+    return files
+
+
+# Variants only, for files that are stored as uploaded or already on disk
+def encode_variants(data, filename, webp=False):
+    return _encode_variants(_decode(data), filename, webp)
+
+
+def write_images(files):
+    for filename, encoded in files.items():
+        upload_storage.save(filename, encoded)
+
+
+def staged_filename(filename):
+    return f'{STAGING_PREFIX}{filename}'
+
+
+# Removes uploads and every variant of them that exists, WebP ones included, and raw bytes still staged for them
+def delete_uploaded_images(filenames):
+    upload_storage.delete([
+        name for filename in filenames if filename
+        for name in (filename, *variant_filenames(filename, webp=True).values(), staged_filename(filename))
+    ])
+
+
+# Queues uploads for removal by upload_cleanup once the current transaction commits, so a rollback never
+# leaves rows naming deleted files and the request doesn't wait on the deletes
+def discard_uploaded_images(filenames):
+    db.session.info.setdefault(DISCARDED_UPLOADS, []).extend(filename for filename in filenames if filename)
+
+
+# after_commit fires for released savepoints too, only hand the files over when the outermost transaction
+# commits
+@event.listens_for(Session, 'after_commit')
+def _clean_up_discarded_uploads(session):
+    if session.get_nested_transaction() is None:
+        # The rows naming the staged uploads are committed, the pipeline takes it from here
+        session.info.pop(STAGED_UPLOADS, None)
+        filenames = session.info.pop(DISCARDED_UPLOADS, None)
+        if filenames:
+            upload_cleanup.schedule(filenames)
+
+
+# Whatever is still queued when the outermost transaction ends was rolled back. Uploads staged for rows that
+# were never committed, e.g. by a create that failed on a malformed form, have their raw bytes removed.
+@event.listens_for(Session, 'after_transaction_end')
+def _keep_rolled_back_uploads(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(DISCARDED_UPLOADS, None)
+        filenames = session.info.pop(STAGED_UPLOADS, None)
+        if filenames:
+            upload_cleanup.schedule(filenames)
+
+
+# Uploads are stored under a hash of their bytes and of whatever else decides the stored file, so a photo
+# uploaded again, to another listing or by another user, reuses the file that is already there
+def content_filename(data, ext, *params):
+    digest = hashlib.sha256()
+    for param in params:
+        digest.update(f'{param}:'.encode('utf-8'))
+    digest.update(data)
+    return f'{digest.hexdigest()}.{ext}'
+
+
+def encoded_filename(data, max_size_kb, webp):
+    return content_filename(data, 'jpg', ENCODER_VERSION, MAX_IMAGE_DIMENSION, max_size_kb, int(webp))
+
+
+# Counts one more column naming filename, in the caller's transaction
+def acquire_image(filename):
+    increment = update(StoredImage).where(StoredImage.filename == filename) \
+        .values(ref_count=StoredImage.ref_count + 1)
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(StoredImage(filename=filename, ref_count=1))
+    except IntegrityError:
+        # Another request stored the same content first
+        db.session.execute(increment)
+
+
+# Counts one column less naming filename, removing the file and its variants with the last reference.
+# Runs before the caller commits while holding the row lock, so an upload of the same content waits for it.
+def release_image(filename):
+    release_images([filename])
+
+
+# Drops one reference per name, a name listed twice drops two. Files nothing refers to any more, or that
+# have no stored_image row because they predate it, are removed after the commit. Their rows stay at
+# ref_count 0 until upload_cleanup has deleted the files, so a delete that never happens, because the
+# process stopped or the storage kept failing, is still on record for flask sweep-released-images.
+def release_images(filenames):
+    releases = Counter(filename for filename in filenames if filename)
+    if not releases:
+        return
+
+    # One UPDATE per distinct release count, usually just the one
+    by_count = defaultdict(list)
+    for filename, count in releases.items():
+        by_count[count].append(filename)
+    for count, names in by_count.items():
+        db.session.execute(
+            update(StoredImage)
+            .where(StoredImage.filename.in_(names))
+            .values(ref_count=StoredImage.ref_count - count)
+            .execution_options(synchronize_session=False)
+        )
+
+    ref_counts = dict(db.session.execute(
+        select(StoredImage.filename, StoredImage.ref_count).where(StoredImage.filename.in_(list(releases)))
+    ).all())
+    for filename in releases:
+        if filename not in ref_counts:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(StoredImage(filename=filename, ref_count=0))
+            except IntegrityError:
+                # Another request stored the same content first, upload_cleanup sees its reference
+                pass
+    discard_uploaded_images([filename for filename in releases if ref_counts.get(filename, 0) <= 0])
+
+
+# Stores an upload byte for byte, e.g. brand and location icons, with its variants next to it and returns
+# the file name. An upload Pillow can't read is still stored, it just gets no variants. The extension goes
+# into the hash too, the same bytes uploaded as .png and .jpg would otherwise share <hash>_<variant>.jpg
+# and deleting one would take the other's variants along.
+def store_upload(file, webp=False):
+    data = file.read()
+    ext = os.path.splitext(file.filename)[1].lstrip('.').lower()
+    filename = content_filename(data, ext, ext, int(webp))
+    acquire_image(filename)
+    if not upload_storage.exists(filename):
+        try:
+            write_images(encode_variants(data, filename, webp))
+        except Exception:
+            logger.exception('Encoding the variants of %s failed', filename)
+        upload_storage.save(filename, data)
+    return filename
+
+
+# Encodes and stores a single image inline, e.g. a profile picture, and returns the file name
+def store_encoded_image(data, max_size_kb, webp=False):
+    filename = encoded_filename(data, max_size_kb, webp)
+    acquire_image(filename)
+    if not upload_storage.exists(filename):
+        write_images(encode_image_files(data, filename, max_size_kb, webp))
+    return filename
+
+
+# Rewrites ref_count wherever it drifted from the image columns, e.g. after a request failed between its
+# commits, and removes the files nothing names any more. Returns the number of rows corrected.
+def reconcile_image_refcounts():
+    # Every reference in one pass over each column, counted per name, instead of a count per stored_image row
+    references = union_all(*(
+        select(column.label('filename')).where(column.isnot(None)) for column in IMAGE_REFERENCE_COLUMNS
+    )).subquery()
+    actual = select(references.c.filename, func.count().label('ref_count')) \
+        .group_by(references.c.filename).subquery()
+    ref_count = func.coalesce(actual.c.ref_count, 0)
+    drifted = db.session.execute(
+        select(StoredImage.filename, ref_count)
+        .outerjoin(actual, actual.c.filename == StoredImage.filename)
+        .where(StoredImage.ref_count != ref_count)
+    ).all()
+
+    # One UPDATE per distinct count, mostly 0 and 1
+    by_count = defaultdict(list)
+    for filename, count in drifted:
+        by_count[count].append(filename)
+    for count, names in by_count.items():
+        db.session.execute(
+            update(StoredImage)
+            .where(StoredImage.filename.in_(names))
+            .values(ref_count=count)
+            .execution_options(synchronize_session=False)
+        )
+
+    discard_uploaded_images(released_image_names())
+    return len(drifted)
+
+
+# Images nothing refers to whose files haven't been deleted yet
+def released_image_names():
+    return db.session.scalars(select(StoredImage.filename).where(StoredImage.ref_count <= 0)).all()
+
+
+# The names among filenames nothing refers to, including ones without a stored_image row. Their rows stay
+# locked until the caller commits where the database supports FOR UPDATE.
+def unreferenced_image_names(filenames):
+    ref_counts = dict(db.session.execute(
+        select(StoredImage.filename, StoredImage.ref_count)
+        .where(StoredImage.filename.in_(filenames))
+        .with_for_update()
+    ).all())
+    return [filename for filename in filenames if ref_counts.get(filename, 0) <= 0]
+
+
+# One staged upload: the raw bytes and the content-addressed name the encoded JPEG will be saved
+# under, its variants are saved next to it. featured=True for a listing's featured image, False for
+# a gallery image. replaces_featured=True for a new featured image the listing doesn't name yet, the pipeline
+# swaps it in once it exists.
+class ImageJob:
+    def __init__(self, filename, data, featured=False, max_size_kb=LISTING_IMAGE_MAX_SIZE_KB,
+                 replaces_featured=False):
+        self.filename = filename
+        self.data = data
+        self.featured = featured
+        self.max_size_kb = max_size_kb
+        self.replaces_featured = replaces_featured
+
+    # Counts the reference the caller is about to store, in the caller's transaction. The raw bytes are saved
+    # to storage as well, so the image can still be encoded by flask sweep-image-processing if this process
+    # goes away before the pipeline is done with it. They are removed again if the transaction rolls back.
+    @classmethod
+    def stage(cls, file, featured=False, max_size_kb=LISTING_IMAGE_MAX_SIZE_KB, replaces_featured=False):
+        data = file.read()
+        filename = encoded_filename(data, max_size_kb, current_app.config['IMAGE_WEBP'])
+        acquire_image(filename)
+        if not upload_storage.exists(filename):
+            upload_storage.save(staged_filename(filename), data)
+            db.session.info.setdefault(STAGED_UPLOADS, []).append(filename)
+        return cls(filename, data, featured or replaces_featured, max_size_kb, replaces_featured)
+
+
+# Encodes listing uploads on a process pool so requests only stage the raw bytes.
+# A finisher thread writes the encoded files and flips the listing's image_status to ready once
+# all of its pending images exist. IMAGE_WORKERS = 0 encodes inline in the request instead.
+class ImagePipeline:
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._finished = queue.Queue()
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork, the request workers may be running gevent or holding DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.app.config['IMAGE_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                threading.Thread(target=self._finish_loop, daemon=True).start()
+
+    # Queues a listing's staged uploads. Call after the rows naming the files are committed and
+    # the listing's image_status is set to processing.
+    def submit(self, listing_id, jobs):
+        if not jobs:
+            return
+
+        # Content already stored, or staged twice in this batch, needs no encoding
+        unique_jobs = {}
+        stored = {}
+        for job in jobs:
+            if job.filename in unique_jobs or job.filename in stored:
+                continue
+            if upload_storage.exists(job.filename):
+                stored[job.filename] = job
+            else:
+                unique_jobs[job.filename] = job
+        jobs = list(unique_jobs.values())
+        # Staged before another upload of the same content finished storing it
+        upload_storage.delete([staged_filename(filename) for filename in stored])
+        for job in stored.values():
+            if job.replaces_featured:
+                self._swap_featured_image(listing_id, job)
+
+        webp = self.app.config['IMAGE_WEBP']
+        if not self.app.config['IMAGE_WORKERS']:
+            for job in jobs:
+                self._finish(listing_id, job,
+                             lambda: encode_image_files(job.data, job.filename, job.max_size_kb, webp))
+            self._mark_ready(listing_id)
+            return
+
+        if not jobs:
+            with self._lock:
+                pending = self._pending.get(listing_id)
+            if not pending:
+                self._mark_ready(listing_id)
+            return
+
+        self._start()
+        with self._lock:
+            self._pending[listing_id] += len(jobs)
+        for job in jobs:
+            future = self._executor.submit(encode_image_files, job.data, job.filename, job.max_size_kb, webp)
+            job.data = None
+            future.add_done_callback(lambda done, job=job: self._finished.put((listing_id, job, done)))
+
+    # Blocks until every submitted image is finished, for callers that exit right after like CLI commands
+    def wait(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+            time.sleep(0.1)
+
+    def _finish_loop(self):
+        while True:
+            listing_id, job, future = self._finished.get()
+            with self.app.app_context():
+                try:
+                    self._finish(listing_id, job, future.result)
+                except Exception:
+                    logger.exception('Finishing image %s of listing %s failed', job.filename, listing_id)
+
+                with self._lock:
+                    self._pending[listing_id] -= 1
+                    ready = self._pending[listing_id] == 0
+                    if ready:
+                        del self._pending[listing_id]
+                if ready:
+                    try:
+                        self._mark_ready(listing_id)
+                    except Exception:
+                        logger.exception('Marking the images of listing %s ready failed', listing_id)
+
+    def _finish(self, listing_id, job, result):
+        try:
+            write_images(result())
+        except Exception:
+            logger.exception('Encoding image %s of listing %s failed', job.filename, listing_id)
+            self._drop(listing_id, job)
+        else:
+            if job.replaces_featured:
+                self._swap_featured_image(listing_id, job)
+        upload_storage.delete([staged_filename(job.filename)])
+
+    # Unreadable upload, drop the listing's references to the file that will never exist. A replacement
+    # featured image isn't named by the listing yet, which keeps the image it has.
+    def _drop(self, listing_id, job):
+        if job.replaces_featured:
+            release_image(job.filename)
+        else:
+            dropped = db.session.execute(
+                update(Listings)
+                .where(Listings.id == listing_id, Listings.featured_image == job.filename)
+                .values(featured_image=None)
+            ).rowcount
+            dropped += db.session.execute(
+                delete(ListingImage).where(ListingImage.listing_id == listing_id, ListingImage.image == job.filename)
+            ).rowcount
+            for _ in range(dropped):
+                release_image(job.filename)
+        db.session.commit()
+
+    # Points the listing at its new featured image now that the file exists and releases the one it had. The
+    # row is locked meanwhile, replacements finishing together each release the one before them. A listing
+    # purged in the meantime releases the new image instead.
+    def _swap_featured_image(self, listing_id, job):
+        current = db.session.execute(
+            select(Listings.featured_image).where(Listings.id == listing_id).with_for_update()
+        ).first()
+        if current is None:
+            release_image(job.filename)
+        else:
+            db.session.execute(
+                update(Listings).where(Listings.id == listing_id).values(featured_image=job.filename)
+            )
+            release_image(current.featured_image)
+        db.session.commit()
+
+    def _mark_ready(self, listing_id):
+        db.session.execute(update(Listings).where(Listings.id == listing_id).values(image_status=IMAGE_READY))
+        db.session.commit()
+
+    # Encoded files for a job from its staged bytes, nothing when the pipeline stored them in the meantime
+    @staticmethod
+    def _staged_result(job, webp):
+        try:
+            data = upload_storage.read(staged_filename(job.filename))
+        except FileNotFoundError:
+            if upload_storage.exists(job.filename):
+                return {}
+            raise
+        return encode_image_files(data, job.filename, job.max_size_kb, webp)
+
+    # Finishes listings left processing for longer than older_than, e.g. by a worker that restarted or a pool
+    # that broke, from the staged bytes. Images whose staged bytes are gone too are dropped from the listing.
+    # Returns the ids of the listings swept.
+    def sweep(self, older_than):
+        webp = self.app.config['IMAGE_WEBP']
+        # created_date is stored in UTC, updated_date in local time
+        listing_ids = db.session.scalars(
+            select(Listings.id).where(
+                Listings.image_status == IMAGE_PROCESSING,
+                or_(
+                    Listings.updated_date < datetime.now() - older_than,
+                    and_(Listings.updated_date.is_(None), Listings.created_date < datetime.utcnow() - older_than)
+                )
+            )
+        ).all()
+
+        for listing_id in listing_ids:
+            featured_image = db.session.scalar(select(Listings.featured_image).where(Listings.id == listing_id))
+            filenames = {featured_image, *db.session.scalars(
+                select(ListingImage.image).where(ListingImage.listing_id == listing_id)
+            )} - {None}
+            for filename in filenames:
+                if upload_storage.exists(filename):
+                    upload_storage.delete([staged_filename(filename)])
+                    continue
+                job = ImageJob(filename, None)
+                self._finish(listing_id, job, lambda job=job: self._staged_result(job, webp))
+            self._mark_ready(listing_id)
+        return listing_ids
+
+
+# Deletes discarded uploads on a background thread, draining whatever has queued up into batches so a
+# bucket gets one DeleteObjects call per batch. A failed batch is retried with backoff, the files of a
+# batch that keeps failing are logged and left to flask sweep-released-images.
+class UploadCleanup:
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+                self._thread.start()
+
+    def schedule(self, filenames):
+        self._start()
+        self._queue.put(list(filenames))
+
+    # Blocks until every scheduled file is deleted or given up on, for callers that exit right after
+    def wait(self):
+        self._queue.join()
+
+    def _cleanup_loop(self):
+        while True:
+            batches = [self._queue.get()]
+            filenames = list(batches[0])
+            while len(filenames) < UPLOAD_CLEANUP_BATCH:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                filenames.extend(batches[-1])
+
+            for start in range(0, len(filenames), UPLOAD_CLEANUP_BATCH):
+                self._delete_batch(filenames[start:start + UPLOAD_CLEANUP_BATCH])
+            for _ in batches:
+                self._queue.task_done()
+
+    # Deletes the stored_image rows still unreferenced, then their files, and commits. The rows stay locked
+    # until then, an upload of the same content waits for the delete and writes the file again.
+    def _delete_batch(self, filenames):
+        for attempt in range(1, UPLOAD_CLEANUP_ATTEMPTS + 1):
+            try:
+                with self.app.app_context():
+                    unreferenced = unreferenced_image_names(filenames)
+                    db.session.execute(
+                        delete(StoredImage)
+                        .where(StoredImage.filename.in_(unreferenced), StoredImage.ref_count <= 0)
+                        .execution_options(synchronize_session=False)
+                    )
+                    # Without FOR UPDATE (SQLite) the delete is what takes the lock. A name uploaded again
+                    # since the select kept its row, or got a new one, and keeps its file.
+                    reacquired = set(db.session.scalars(
+                        select(StoredImage.filename).where(StoredImage.filename.in_(unreferenced))
+                    ))
+                    delete_uploaded_images([filename for filename in unreferenced if filename not in reacquired])
+                    db.session.commit()
+                return
+            except Exception:
+                if attempt == UPLOAD_CLEANUP_ATTEMPTS:
+                    logger.exception('Giving up deleting uploads %s', ', '.join(filenames))
+                    return
+                logger.warning('Deleting uploads failed, retrying (attempt %s)', attempt, exc_info=True)
+                time.sleep(UPLOAD_CLEANUP_RETRY_DELAY * 2 ** (attempt - 1))
+
+
+image_pipeline = ImagePipeline()
+upload_cleanup = UploadCleanup()
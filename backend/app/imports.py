@@ -0,0 +1,259 @@
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+import zipfile
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from . import db, allowed_file
+from .images import ImageJob
+from .models import ImportJob, User, Brand, Location, Community, TIER_RANK_MAPPING
+from .queries import listing_counts_by_user
+from .services import add_listing, listing_added
+from .vehicles import VEHICLE_TYPES, LISTING_FIELDS, vehicle_type_for_slug
+
+IMPORT_PENDING = 'pending'
+IMPORT_RUNNING = 'running'
+IMPORT_DONE = 'done'
+IMPORT_FAILED = 'failed'
+
+IMPORT_FORMATS = {'csv': 'csv', 'ndjson': 'ndjson', 'jsonl': 'ndjson'}
+
+# A running job that hasn't saved progress for this long is taken to be dead and may be resumed
+IMPORT_STALE_AFTER = timedelta(minutes=10)
+
+# Form fields every row needs besides the vehicle type's own fields
+IMPORT_FIELDS = ('vin', 'featured_as', 'brand_id', 'location_id', 'community_id', 'safety_features', 'amenities',
+                 *LISTING_FIELDS)
+
+# safety_features and amenities are comma separated like in the create form, images semicolon separated
+IMAGE_SEPARATOR = ';'
+
+# Largest uncompressed image a zip may hold. Reading an entry stops at the size its ZipInfo declares, so
+# checking that size first keeps a zip bomb from being read into memory.
+IMPORT_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def import_format(filename):
+    return IMPORT_FORMATS.get(os.path.splitext(filename or '')[1].lstrip('.').lower())
+
+
+# Keeps the uploaded rows file and images zip under IMPORT_FOLDER/<job id>/ so the job can be resumed.
+# rows and images are file objects, images may be None.
+def create_import_job(user_id, rows, rows_format, images=None, vehicle_type=None, created_by=None):
+    job = ImportJob(user_id=user_id, vehicle_type=vehicle_type, status=IMPORT_PENDING, rows_format=rows_format,
+                    rows_path='', created_by=created_by)
+    db.session.add(job)
+    db.session.flush()
+
+    job_folder = os.path.join(current_app.config['IMPORT_FOLDER'], str(job.id))
+    os.makedirs(job_folder, exist_ok=True)
+    job.rows_path = os.path.join(job_folder, f'rows.{rows_format}')
+    with open(job.rows_path, 'wb') as rows_file:
+        shutil.copyfileobj(rows, rows_file)
+    if images is not None:
+        job.images_path = os.path.join(job_folder, 'images.zip')
+        with open(job.images_path, 'wb') as images_file:
+            shutil.copyfileobj(images, images_file)
+
+    db.session.commit()
+    return job
+
+
+# A job that isn't done can be resumed, unless it is still being worked on
+def import_resumable(job):
+    if job.status == IMPORT_DONE:
+        return False
+    if job.status == IMPORT_RUNNING:
+        return job.updated_date is None or job.updated_date < datetime.now() - IMPORT_STALE_AFTER
+    return True
+
+
+# (row number, row) pairs read one at a time from the stored file. Row numbers start at 1 with the first
+# data row. An NDJSON line that doesn't parse comes through as a string with the parse error.
+def _read_rows(job):
+    with open(job.rows_path, 'rb') as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        if job.rows_format == 'csv':
+            for number, row in enumerate(csv.DictReader(text), start=1):
+                yield number, row
+            return
+
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = f'Invalid JSON: {e}'
+            if not isinstance(row, (dict, str)):
+                row = 'Invalid JSON: expected an object'
+            yield number, row
+
+
+# CSV gives strings, NDJSON may give numbers and lists
+def _text(value):
+    if isinstance(value, list):
+        return ','.join(str(item) for item in value)
+    return '' if value is None else str(value)
+
+
+def _image_names(value):
+    if isinstance(value, list):
+        return [str(name) for name in value if name]
+    return [name.strip() for name in (value or '').split(IMAGE_SEPARATOR) if name.strip()]
+
+
+# Everything validation looks up once per run instead of once per row
+class _ImportContext:
+    def __init__(self, job):
+        self.job = job
+        self.user = db.session.get(User, job.user_id)
+        self.counts = listing_counts_by_user([job.user_id])[job.user_id]
+        self.brand_ids = {str(brand_id) for (brand_id,) in db.session.query(Brand.id)}
+        self.location_ids = {str(location_id) for (location_id,) in db.session.query(Location.id)}
+        self.community_ids = {str(community_id) for (community_id,) in db.session.query(Community.id)}
+        self.images = zipfile.ZipFile(job.images_path) if job.images_path else None
+        self.image_sizes = {info.filename: info.file_size for info in self.images.infolist()} \
+            if self.images is not None else {}
+
+    def close(self):
+        if self.images is not None:
+            self.images.close()
+
+    # (vehicle_type, form data, featured image name, gallery image names, errors) for one row
+    def validate(self, row):
+        if isinstance(row, str):
+            return None, None, None, [], [row]
+
+        errors = []
+        vehicle_slug = _text(row.get('vehicle_type')) or self.job.vehicle_type
+        vehicle_type = vehicle_type_for_slug(vehicle_slug)
+        if vehicle_type is None:
+            return None, None, None, [], [f'Unknown vehicle type {vehicle_slug!r}.']
+
+        fields = (*IMPORT_FIELDS, *VEHICLE_TYPES[vehicle_type]['fields'])
+        errors.extend(f'Missing {field}.' for field in fields if row.get(field) is None)
+        data = {field: _text(row.get(field)) for field in fields}
+        data['user_id'] = self.job.user_id
+
+        featured_as = data['featured_as'].lower()
+        if featured_as not in TIER_RANK_MAPPING:
+            errors.append('featured_as must be standard, featured or premium.')
+        elif self.counts[featured_as] >= getattr(self.user, f'{featured_as}_listing'):
+            errors.append(f"Limit {featured_as.capitalize()} Listing is {getattr(self.user, f'{featured_as}_listing')}")
+
+        for field, known_ids in (('brand_id', self.brand_ids), ('location_id', self.location_ids),
+                                 ('community_id', self.community_ids)):
+            if row.get(field) is not None and data[field] not in known_ids:
+                errors.append(f'Unknown {field} {data[field]!r}.')
+
+        featured_image = _text(row.get('featured_image')) or None
+        images = _image_names(row.get('images'))
+        for name in ([featured_image] if featured_image else []) + images:
+            if not allowed_file(name):
+                errors.append(f'Invalid image file format {name!r}.')
+            elif name not in self.image_sizes:
+                errors.append(f'Image {name!r} is not in the zip.')
+            elif self.image_sizes[name] > IMPORT_IMAGE_MAX_BYTES:
+                errors.append(f'Image {name!r} is larger than {IMPORT_IMAGE_MAX_BYTES // (1024 * 1024)} MB.')
+
+        return vehicle_type, data, featured_image, images, errors
+
+
+# Validates and inserts one chunk of rows in a single transaction together with the job's progress, so a
+# resumed job never inserts a row twice. Each row goes in under a savepoint, a row the database rejects
+# fails on its own.
+def _import_chunk(context, chunk):
+    job = context.job
+    results = []
+    added = []
+    for number, row in chunk:
+        vehicle_type, data, featured_image, images, errors = context.validate(row)
+        if errors:
+            results.append({'row': number, 'status': 'failed', 'errors': errors})
+            continue
+
+        try:
+            with db.session.begin_nested():
+                image_jobs = []
+                if featured_image:
+                    image_jobs.append(ImageJob.stage(context.images.open(featured_image), featured=True))
+                image_jobs.extend(ImageJob.stage(context.images.open(name)) for name in images)
+                listing = add_listing(vehicle_type, data, image_jobs, job.created_by)
+        except Exception as e:
+            logger.exception('Import job %s failed to add row %s', job.id, number)
+            results.append({'row': number, 'status': 'failed', 'errors': [f'Could not be saved: {e.__class__.__name__}']})
+            continue
+
+        context.counts[data['featured_as'].lower()] += 1
+        results.append({'row': number, 'status': 'created', 'listing_id': listing.id})
+        added.append((listing, image_jobs))
+
+    _save_progress(job, chunk[-1][0], results)
+    db.session.commit()
+
+    for listing, image_jobs in added:
+        listing_added(listing, image_jobs)
+
+
+def _save_progress(job, last_row, results):
+    report = json.loads(job.report or '[]')
+    report.extend(results)
+    job.report = json.dumps(report)
+    job.processed_rows = last_row
+    job.created_count = sum(1 for result in report if result['status'] == 'created')
+    job.failed_count = len(report) - job.created_count
+    job.updated_date = datetime.now()
+
+
+# Runs an import job from its last saved row to the end, committing every IMPORT_CHUNK_SIZE rows. A job that
+# gets to the end can't be resumed, so its uploaded files are removed then, the report stays on the job.
+# Runs in a background thread for the API and in the foreground for the CLI.
+def run_import(job_id, chunk_size):
+    job = db.session.get(ImportJob, job_id)
+    job.status = IMPORT_RUNNING
+    job.error = None
+    job.updated_date = datetime.now()
+    db.session.commit()
+
+    context = _ImportContext(job)
+    try:
+        chunk = []
+        for number, row in _read_rows(job):
+            if number <= job.processed_rows:
+                continue
+            chunk.append((number, row))
+            if len(chunk) >= chunk_size:
+                _import_chunk(context, chunk)
+                chunk = []
+        if chunk:
+            _import_chunk(context, chunk)
+        job.status = IMPORT_DONE
+    except Exception as e:
+        logger.exception('Import job %s failed', job_id)
+        db.session.rollback()
+        job.status = IMPORT_FAILED
+        job.error = str(e)
+    finally:
+        context.close()
+
+    job.updated_date = datetime.now()
+    db.session.commit()
+
+    if job.status == IMPORT_DONE:
+        shutil.rmtree(os.path.dirname(job.rows_path), ignore_errors=True)
+    return job
+
+
+def run_import_in_background(job_id, app):
+    with app.app_context():
+        run_import(job_id, app.config['IMPORT_CHUNK_SIZE'])
@@ -1,5 +1,7 @@
 import uuid
 from datetime import datetime
+from sqlalchemy import or_
+from sqlalchemy.orm import validates
 from . import db
 
 USER_VERIFIED_MAPPING = {
@@ -9,11 +11,24 @@ USER_VERIFIED_MAPPING = {
 
 
 STATUS_VERIFIED_MAPPING = {
+    3: "DELETED",
     2: "NOT PUBLISHED",
     1: "PUBLISHED",
     0: "IN REVIEW",
 }
 
+PUBLISH_STATUS_BY_NAME = {name: status for status, name in STATUS_VERIFIED_MAPPING.items()}
+
+# Listings waiting for their deletion job to purge them, hidden everywhere
+PUBLISH_STATUS_DELETED = 3
+
+# Feed tiers, higher rank is listed first
+TIER_RANK_MAPPING = {
+    'premium': 2,
+    'featured': 1,
+    'standard': 0,
+}
+
 class Admin(db.Model):
     __tablename__ = 'admin'
     id = db.Column(db.Integer, primary_key=True)
@@ -28,6 +43,9 @@ class Admin(db.Model):
 
 class Favorites(db.Model):
     __tablename__ = 'favorites'
+    __table_args__ = (
+        db.Index('ix_favorites_user_listing', 'user_id', 'listing_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete='CASCADE'), nullable=False)
     listing_id = db.Column(db.Integer, db.ForeignKey("listings.id", ondelete='CASCADE'), nullable=False)
@@ -63,6 +81,8 @@ class User(db.Model):
     created_date = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     updated_by = db.Column(db.String(255))
     updated_date = db.Column(db.DateTime(timezone=True))
+    # Set when the account is deleted, the row stays until its deletion job purges it
+    deleted_date = db.Column(db.DateTime(timezone=True))
     message = db.relationship("Messages", backref="user", lazy="select", cascade='all, delete')
     conversation_sender = db.relationship("Conversation", backref="sender", lazy="select",
                                                  foreign_keys="Conversation.sender_id")
@@ -75,15 +95,15 @@ class User(db.Model):
 
     @property
     def count_standard_listings(self):
-        return Listings.query.filter_by(user_id=self.id, featured_as='standard').count()
+        return Listings.query.filter_by(user_id=self.id, featured_as='standard').filter(LISTING_NOT_DELETED).count()
 
     @property
     def count_featured_listings(self):
-        return Listings.query.filter_by(user_id=self.id, featured_as='featured').count()
+        return Listings.query.filter_by(user_id=self.id, featured_as='featured').filter(LISTING_NOT_DELETED).count()
 
     @property
     def count_premium_listings(self):
-        return Listings.query.filter_by(user_id=self.id, featured_as='premium').count()
+        return Listings.query.filter_by(user_id=self.id, featured_as='premium').filter(LISTING_NOT_DELETED).count()
 
 class RefreshToken(db.Model):
     __tablename__ = 'refresh_tokens'
@@ -94,6 +114,9 @@ class RefreshToken(db.Model):
 
 class Brand(db.Model):
     __tablename__ = 'brand'
+    __table_args__ = (
+        db.Index('ft_brand_name', 'name', mysql_prefix='FULLTEXT'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255))
     type = db.Column(db.String(255))
@@ -154,6 +177,19 @@ class Community(db.Model):
 
 class Listings(db.Model):
     __tablename__ = 'listings'
+    __table_args__ = (
+        db.Index('ft_listings_search', 'title', 'model', 'variant', 'description', mysql_prefix='FULLTEXT'),
+        # Feed shapes: vehicle type + publish status filter, tier/id ordering and the range filters
+        db.Index('ix_listings_feed', 'vehicle_type', 'publish_status', 'tier_rank', 'id'),
+        db.Index('ix_listings_feed_price', 'vehicle_type', 'publish_status', 'price'),
+        db.Index('ix_listings_feed_mileage', 'vehicle_type', 'publish_status', 'mileage'),
+        db.Index('ix_listings_feed_model_year', 'vehicle_type', 'publish_status', 'model_year'),
+        db.Index('ix_listings_published', 'publish_status', 'tier_rank', 'id'),
+        # Per-user quota counts
+        db.Index('ix_listings_user_featured_as', 'user_id', 'featured_as'),
+        # Trending lists
+        db.Index('ix_listings_trending', 'vehicle_type', 'publish_status', 'favorite_count'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     vin = db.Column(db.String(255))
     title = db.Column(db.String(255))
@@ -166,9 +202,14 @@ class Listings(db.Model):
     mileage = db.Column(db.Integer)
     vehicle_type = db.Column(db.String(255))
     featured_as = db.Column(db.String(255))
+    tier_rank = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     g_map_location = db.Column(db.Text)
     featured_image = db.Column(db.Text)
+    # 'processing' while uploaded images are still being encoded, 'ready' once every file exists
+    image_status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
     publish_status = db.Column(db.Integer, default=0)
+    # Denormalized COUNT of favorites rows, kept by add/remove favorite and the reconcile-favorite-counts command
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete='CASCADE'), nullable=False)
     brand_id = db.Column(db.Integer, db.ForeignKey("brand.id", ondelete='CASCADE'), nullable=False)
     location_id = db.Column(db.Integer, db.ForeignKey("location.id", ondelete='CASCADE'), nullable=False)
@@ -190,6 +231,16 @@ class Listings(db.Model):
     def publish_status_name(self):
         return STATUS_VERIFIED_MAPPING.get(self.publish_status, "UNPUBLISHED")
 
+    # Keep the stored feed rank in step with the tier, whichever endpoint sets it
+    @validates('featured_as')
+    def validate_featured_as(self, key, featured_as):
+        self.tier_rank = TIER_RANK_MAPPING.get((featured_as or '').lower(), TIER_RANK_MAPPING['standard'])
+        return featured_as
+
+
+# Listings that aren't waiting to be purged, deleted listings don't take up a tier slot or change status again
+LISTING_NOT_DELETED = or_(Listings.publish_status.is_(None), Listings.publish_status != PUBLISH_STATUS_DELETED)
+
 
 class Cars(db.Model):
     __tablename__ = 'cars'
@@ -301,6 +352,48 @@ class ListingImage(db.Model):
     updated_by = db.Column(db.String(255))
     updated_date = db.Column(db.DateTime(timezone=True))
 
+# One row per content-addressed upload in upload_storage, counting the image columns that name the file
+class StoredImage(db.Model):
+    __tablename__ = 'stored_image'
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False, unique=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_date = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
+
+# A dealer's bulk listing import. Rows up to processed_rows are done, so a failed or interrupted job
+# picks up from there. report holds one JSON result per processed row.
+class ImportJob(db.Model):
+    __tablename__ = 'import_job'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete='CASCADE'), nullable=False)
+    vehicle_type = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    rows_format = db.Column(db.String(10), nullable=False)
+    rows_path = db.Column(db.Text, nullable=False)
+    images_path = db.Column(db.Text)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    report = db.Column(db.Text(16777215))
+    error = db.Column(db.Text)
+    created_by = db.Column(db.String(255))
+    created_date = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
+    updated_date = db.Column(db.DateTime(timezone=True))
+
+# Purges a deleted account or listing in the background. user_id and listing_id aren't foreign keys so
+# the job outlives the rows it deletes. A failed job is retried from the start, every step is repeatable.
+class DeletionJob(db.Model):
+    __tablename__ = 'deletion_job'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    listing_id = db.Column(db.Integer)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_by = db.Column(db.String(255))
+    created_date = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
+    updated_date = db.Column(db.DateTime(timezone=True))
+
 class OrderHistory(db.Model):
     __tablename__ = 'order_history'
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,288 @@
+import base64
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import func, or_, and_, event, select, update
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import joinedload, selectinload, noload
+
+from . import db
+from .models import Listings, Brand, Favorites, LISTING_NOT_DELETED
+from .vehicles import VEHICLE_TYPES
+
+# Detail relationship on Listings for each vehicle_type value
+VEHICLE_DETAIL_RELATIONSHIPS = {vehicle_type: vehicle['relationship'] for vehicle_type, vehicle in VEHICLE_TYPES.items()}
+
+# Premium listings first, then featured, newest first within a tier.
+# tier_rank is a stored column so (vehicle_type, publish_status, tier_rank, id) can serve the sort.
+FEED_ORDER = (Listings.tier_rank.desc(), Listings.id.desc())
+
+# Columns covered by the ft_listings_search FULLTEXT index
+LISTING_SEARCH_COLUMNS = (Listings.title, Listings.model, Listings.variant, Listings.description)
+
+SEARCH_TERM = re.compile(r'\w+')
+MAX_SEARCH_TERMS = 8
+
+# InnoDB FULLTEXT leaves out words shorter than innodb_ft_min_token_size and the words in its default stopword
+# list (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD). MATCH can never find those, e.g. "x5" or "mg", so they
+# are searched with LIKE instead. Keep these in step with the server settings.
+FULLTEXT_MIN_TOKEN_SIZE = 3
+FULLTEXT_STOPWORDS = frozenset((
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how', 'i', 'in', 'is',
+    'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who', 'will',
+    'with', 'und', 'www',
+))
+
+
+# Loader options covering everything ListingsSchema touches when dumping a listing
+def listing_load_options(vehicle_type=None, card=False):
+    if card:
+        # ListingCardSchema only reads the brand and location
+        return [joinedload(Listings.brand), joinedload(Listings.location)]
+
+    options = [
+        joinedload(Listings.user),
+        joinedload(Listings.brand),
+        joinedload(Listings.location),
+        joinedload(Listings.community),
+        selectinload(Listings.safety_features),
+        selectinload(Listings.listing_amenities),
+        selectinload(Listings.listing_image),
+    ]
+
+    if vehicle_type in VEHICLE_DETAIL_RELATIONSHIPS:
+        # A listing only has the detail row of its own vehicle type, the other three are always empty
+        for detail_type, relationship in VEHICLE_DETAIL_RELATIONSHIPS.items():
+            if detail_type == vehicle_type:
+                options.append(joinedload(relationship))
+            else:
+                options.append(noload(relationship))
+    else:
+        options.extend(selectinload(relationship) for relationship in VEHICLE_DETAIL_RELATIONSHIPS.values())
+
+    return options
+
+
+# Listings query with the eager loads for a ListingsSchema dump already attached. Listings waiting to be
+# purged are left out unless a publish_status is asked for.
+def listing_query(vehicle_type=None, card=False, **filters):
+    if vehicle_type:
+        filters['vehicle_type'] = vehicle_type
+    query = Listings.query.options(*listing_load_options(vehicle_type, card)).filter_by(**filters)
+    if 'publish_status' not in filters:
+        query = query.filter(LISTING_NOT_DELETED)
+    return query
+
+
+# Listing counts per tier for a batch of users, one GROUP BY instead of three COUNTs per user
+def listing_counts_by_user(user_ids):
+    counts = {user_id: {'standard': 0, 'featured': 0, 'premium': 0} for user_id in user_ids}
+    if not counts:
+        return counts
+
+    rows = db.session.query(Listings.user_id, Listings.featured_as, func.count(Listings.id)) \
+        .filter(Listings.user_id.in_(list(counts)), LISTING_NOT_DELETED) \
+        .group_by(Listings.user_id, Listings.featured_as) \
+        .all()
+    for user_id, featured_as, count in rows:
+        # MySQL compares featured_as case-insensitively, so fold the groups the same way
+        tier = (featured_as or '').lower()
+        if tier in counts[user_id]:
+            counts[user_id][tier] += count
+
+    return counts
+
+
+# Favorite counts change one row at a time in the same transaction as the favorites row
+def increment_favorite_count(listing_id, delta):
+    db.session.execute(
+        update(Listings)
+        .where(Listings.id == listing_id, Listings.favorite_count + delta >= 0)
+        .values(favorite_count=Listings.favorite_count + delta)
+    )
+
+
+# Takes a user's favorites off the favorite_count of the listings they point at, before the rows are bulk
+# deleted. One UPDATE per distinct number of rows a listing has from the user, usually just the one.
+def release_user_favorite_counts(user_id):
+    by_count = defaultdict(list)
+    favorites = select(Favorites.listing_id, func.count()).where(Favorites.user_id == user_id) \
+        .group_by(Favorites.listing_id)
+    for listing_id, count in db.session.execute(favorites):
+        by_count[count].append(listing_id)
+    for count, listing_ids in by_count.items():
+        db.session.execute(
+            update(Listings)
+            .where(Listings.id.in_(listing_ids), Listings.favorite_count - count >= 0)
+            .values(favorite_count=Listings.favorite_count - count)
+            .execution_options(synchronize_session=False)
+        )
+
+
+# Rewrites favorite_count wherever it drifted from the favorites table, e.g. after cascaded deletes.
+# Returns the number of listings corrected.
+def reconcile_favorite_counts():
+    actual = select(func.count(Favorites.id)).where(Favorites.listing_id == Listings.id).scalar_subquery()
+    result = db.session.execute(
+        update(Listings)
+        .where(Listings.favorite_count != actual)
+        .values(favorite_count=actual)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def search_terms(search):
+    return SEARCH_TERM.findall((search or '').lower())[:MAX_SEARCH_TERMS]
+
+
+def fulltext_enabled():
+    return db.engine.dialect.name == 'mysql'
+
+
+def fulltext_term(term):
+    return fulltext_enabled() and len(term) >= FULLTEXT_MIN_TOKEN_SIZE and term not in FULLTEXT_STOPWORDS
+
+
+# Every search word has to match the listing text or its brand name, as a word prefix through the FULLTEXT
+# indexes or anywhere in the text for words they don't index
+def listing_search_condition(search):
+    terms = search_terms(search)
+    if not terms:
+        return Listings.title.ilike(f"%{search}%")
+
+    conditions = []
+    for term in terms:
+        if fulltext_term(term):
+            against = f'{term}*'
+            brand_ids = select(Brand.id).where(match(Brand.name, against=against).in_boolean_mode())
+            conditions.append(or_(
+                match(*LISTING_SEARCH_COLUMNS, against=against).in_boolean_mode(),
+                Listings.brand_id.in_(brand_ids)
+            ))
+        else:
+            conditions.append(or_(
+                *(column.ilike(f"%{term}%") for column in LISTING_SEARCH_COLUMNS),
+                Listings.brand.has(Brand.name.ilike(f"%{term}%"))
+            ))
+
+    return and_(*conditions)
+
+
+# FULLTEXT relevance of a listing for the search words, None when there is nothing to rank by
+def listing_search_relevance(search):
+    terms = [term for term in search_terms(search) if fulltext_term(term)]
+    if not terms:
+        return None
+    return match(*LISTING_SEARCH_COLUMNS, against=' '.join(f'{term}*' for term in terms)).in_boolean_mode()
+
+
+# Relevance only reorders listings within a tier, premium and featured still come first.
+# Relevance-ranked pages can't be seeked by (tier rank, id), so they are paged by number.
+def feed_order(relevance=None):
+    if relevance is None:
+        return FEED_ORDER
+    return Listings.tier_rank.desc(), relevance.desc(), Listings.id.desc()
+
+
+# Feed cursors are the (tier rank, id) of the last listing a client has seen
+def encode_feed_cursor(listing):
+    raw = json.dumps([listing.tier_rank or 0, listing.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_feed_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        rank, listing_id = json.loads(raw)
+        return int(rank), int(listing_id)
+    except (ValueError, TypeError):
+        return None
+
+
+# One page of a FEED_ORDER query, seeking past the cursor when given instead of using OFFSET.
+# Returns None for a malformed cursor.
+def feed_page(query, page, page_size, cursor=None):
+    if cursor:
+        position = decode_feed_cursor(cursor)
+        if position is None:
+            return None
+        rank, listing_id = position
+        query = query.filter(or_(
+            Listings.tier_rank < rank,
+            and_(Listings.tier_rank == rank, Listings.id < listing_id)
+        ))
+        return query.limit(page_size).all()
+
+    return query.limit(page_size).offset((page - 1) * page_size).all()
+
+
+def next_feed_cursor(listings, page_size):
+    if listings and len(listings) == page_size:
+        return encode_feed_cursor(listings[-1])
+    return None
+
+
+# Short-lived cache of feed totals so paging through a feed doesn't re-run the filtered COUNT every time
+class TotalsCache:
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            total, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return total
+
+    def set(self, key, total, ttl, generation):
+        with self._lock:
+            # Drop counts computed before the last invalidation
+            if generation != self._generation:
+                return
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (total, time.monotonic() + ttl)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+feed_totals = TotalsCache()
+
+
+def cached_total(query, key, ttl):
+    total = feed_totals.get(key)
+    if total is None:
+        generation = feed_totals.generation
+        total = query.count()
+        feed_totals.set(key, total, ttl, generation)
+    return total
+
+
+# Feed totals only change when a listing enters or leaves the published set
+@event.listens_for(Listings.publish_status, 'set')
+def invalidate_totals_on_publish_status(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        feed_totals.clear()
+
+
+@event.listens_for(Listings, 'after_delete')
+def invalidate_totals_on_delete(mapper, connection, target):
+    feed_totals.clear()
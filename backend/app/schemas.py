@@ -1,7 +1,18 @@
+import json
+
+from flask import current_app
 from marshmallow import fields
 from . import ma
+from .images import variant_filenames
 from .models import User, Admin, Brand, Listings, Cars, ListingAmenities, SafetyFeatures, ListingImage, Location, \
-    Community, Motorcycle, Boats, HeavyVehicles, Favorites, Make, Trim
+    Community, Motorcycle, Boats, HeavyVehicles, Favorites, Make, Trim, ImportJob
+
+
+# thumb/medium/full file names saved next to an uploaded image, None when there is no image
+def image_variants(filename):
+    if not filename:
+        return None
+    return variant_filenames(filename, current_app.config['IMAGE_WEBP'])
 
 
 class UserSchema(ma.SQLAlchemyAutoSchema):
@@ -14,14 +25,24 @@ class UserSchema(ma.SQLAlchemyAutoSchema):
     featured_listings_count = fields.Method("get_featured_listings_count")
     premium_listings_count = fields.Method("get_premium_listings_count")
 
+    # Batched counts from listing_counts_by_user, passed in through the schema context
+    def get_listing_counts(self, obj):
+        listing_counts = self.context.get('listing_counts')
+        if listing_counts is None:
+            return None
+        return listing_counts.get(obj.id)
+
     def get_standard_listings_count(self, obj):
-        return obj.count_standard_listings
+        counts = self.get_listing_counts(obj)
+        return counts['standard'] if counts else obj.count_standard_listings
 
     def get_featured_listings_count(self, obj):
-        return obj.count_featured_listings
+        counts = self.get_listing_counts(obj)
+        return counts['featured'] if counts else obj.count_featured_listings
 
     def get_premium_listings_count(self, obj):
-        return obj.count_premium_listings
+        counts = self.get_listing_counts(obj)
+        return counts['premium'] if counts else obj.count_premium_listings
 
 class AdminSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
@@ -34,6 +55,8 @@ class BrandSchema(ma.SQLAlchemyAutoSchema):
         model = Brand
         load_instance = True
 
+    image_variants = fields.Function(lambda obj: image_variants(obj.image), dump_only=True)
+
 class MakeSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Make
@@ -56,11 +79,15 @@ class LocationSchema(ma.SQLAlchemyAutoSchema):
         model = Location
         load_instance = True
 
+    image_variants = fields.Function(lambda obj: image_variants(obj.image), dump_only=True)
+
 class CommunitySchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Community
         load_instance = True
 
+    image_variants = fields.Function(lambda obj: image_variants(obj.image), dump_only=True)
+
 class ListingsSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Listings
@@ -78,6 +105,18 @@ class ListingsSchema(ma.SQLAlchemyAutoSchema):
     location = fields.Nested('LocationSchema')
     community = fields.Nested('CommunitySchema')
     publish_status_name = fields.String(attribute='publish_status_name')
+    featured_image_variants = fields.Function(lambda obj: image_variants(obj.featured_image), dump_only=True)
+
+# Compact listing for the feed grids: no owner, gallery, amenities or vehicle details
+class ListingCardSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Listings
+        fields = ('id', 'title', 'slug', 'price', 'model_year', 'mileage', 'vehicle_type', 'featured_as',
+                  'featured_image', 'featured_image_variants', 'favorite_count', 'brand', 'location')
+
+    brand = fields.Nested('BrandSchema', only=('id', 'name', 'image', 'image_variants'))
+    location = fields.Nested('LocationSchema', only=('id', 'name'))
+    featured_image_variants = fields.Function(lambda obj: image_variants(obj.featured_image), dump_only=True)
 
 class CarsSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
@@ -115,3 +154,13 @@ class ListingImageSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = ListingImage
         load_instance = True
+
+    image_variants = fields.Function(lambda obj: image_variants(obj.image), dump_only=True)
+
+
+class ImportJobSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = ImportJob
+        exclude = ('rows_path', 'images_path')
+
+    report = fields.Function(lambda obj: json.loads(obj.report or '[]'), dump_only=True)
@@ -0,0 +1,134 @@
+from slugify import slugify
+from sqlalchemy import insert, delete
+
+from . import db
+from .autocomplete import autocomplete_index
+from .images import image_pipeline, IMAGE_PROCESSING, IMAGE_READY
+from .models import Listings, ListingImage, SafetyFeatures, ListingAmenities
+from .vehicles import VEHICLE_TYPES, LISTING_FIELDS
+
+
+# One executemany INSERT for a batch of child rows
+def insert_rows(model, rows):
+    if rows:
+        db.session.execute(insert(model), rows)
+
+
+# Names keyed by their case-folded form, blank names dropped and the first spelling of a repeated name kept
+def _names_by_key(names):
+    wanted = {}
+    for name in names:
+        name = name.strip()
+        if name:
+            wanted.setdefault(name.lower(), name)
+    return wanted
+
+
+# Adds the names a listing's safety features or amenities (model) don't have yet, compared case-insensitively,
+# against one SELECT and with one INSERT. Returns the number added, nothing is committed.
+def add_listing_names(model, listing_id, names, created_by):
+    wanted = _names_by_key(names)
+    existing = {
+        (name or '').strip().lower()
+        for (name,) in db.session.query(model.name).filter_by(listing_id=listing_id)
+    }
+    rows = [
+        {'name': name, 'listing_id': listing_id, 'created_by': created_by}
+        for key, name in wanted.items() if key not in existing
+    ]
+    insert_rows(model, rows)
+    return len(rows)
+
+
+# Deletes a listing's safety feature or amenity rows by id with one DELETE ... WHERE id IN, ids of other
+# listings are left alone. Returns the number deleted, nothing is committed.
+def delete_listing_names(model, listing_id, ids):
+    if not ids:
+        return 0
+    return db.session.execute(
+        delete(model)
+        .where(model.listing_id == listing_id, model.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+# Makes a listing's safety features or amenities (model) exactly the given names against one SELECT:
+# missing names go in with one INSERT, the rest go with one DELETE ... WHERE id IN. Names match
+# case-insensitively like the add endpoints, and repeated rows for a name are collapsed into one.
+# Returns the (added, removed) counts, nothing is committed.
+def sync_listing_names(model, listing_id, names, created_by):
+    wanted = _names_by_key(names)
+
+    kept = set()
+    removed_ids = []
+    for row_id, name in db.session.query(model.id, model.name).filter_by(listing_id=listing_id):
+        key = (name or '').strip().lower()
+        if key in wanted and key not in kept:
+            kept.add(key)
+        else:
+            removed_ids.append(row_id)
+
+    insert_rows(model, [
+        {'name': name, 'listing_id': listing_id, 'created_by': created_by}
+        for key, name in wanted.items() if key not in kept
+    ])
+    delete_listing_names(model, listing_id, removed_ids)
+    return len(wanted) - len(kept), len(removed_ids)
+
+
+# Adds a listing with its vehicle detail row, gallery, safety features and amenities to the session
+# without committing. data is the create form, image_jobs the ImageJobs staged from it.
+def add_listing(vehicle_type, data, image_jobs, created_by):
+    vehicle = VEHICLE_TYPES[vehicle_type]
+    title = f"{data['model']} {data['model_year']}"
+
+    listing = Listings(
+        vin=data['vin'],
+        title=title,
+        slug=slugify(title),
+        vehicle_type=vehicle_type,
+        featured_as=data['featured_as'],
+        user_id=data['user_id'],
+        brand_id=data['brand_id'],
+        location_id=data['location_id'],
+        community_id=data['community_id'],
+        featured_image=next((job.filename for job in image_jobs if job.featured), None),
+        image_status=IMAGE_PROCESSING if image_jobs else IMAGE_READY,
+        created_by=created_by,
+        **{field: data[field] for field in LISTING_FIELDS}
+    )
+    db.session.add(listing)
+    # Assigns the id the child rows point at, nothing is committed yet
+    db.session.flush()
+
+    db.session.add(vehicle['model'](
+        listing_id=listing.id,
+        created_by=created_by,
+        **{field: data[field] for field in vehicle['fields']}
+    ))
+    insert_rows(ListingImage, [
+        {'image': job.filename, 'listing_id': listing.id, 'created_by': created_by}
+        for job in image_jobs if not job.featured
+    ])
+    insert_rows(SafetyFeatures, [
+        {'name': name, 'listing_id': listing.id} for name in data['safety_features'].split(',')
+    ])
+    insert_rows(ListingAmenities, [
+        {'name': name, 'listing_id': listing.id} for name in data['amenities'].split(',')
+    ])
+    return listing
+
+
+# Work that has to wait until the listing is committed
+def listing_added(listing, image_jobs):
+    autocomplete_index.add('model', listing.model)
+    image_pipeline.submit(listing.id, image_jobs)
+
+
+# Creates a listing and all its rows in a single transaction, then queues its staged uploads.
+# Nothing is left behind if any of it fails.
+def create_listing(vehicle_type, data, image_jobs, created_by):
+    listing = add_listing(vehicle_type, data, image_jobs, created_by)
+    db.session.commit()
+    listing_added(listing, image_jobs)
+    return listing
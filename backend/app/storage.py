@@ -0,0 +1,185 @@
+import hashlib
+import mimetypes
+import os
+import uuid
+
+# S3 DeleteObjects takes at most this many keys per call
+S3_DELETE_BATCH = 1000
+
+
+# Uploads live two directory levels down, picked by a hash of the file name (e.g. 3f/a2/<name>), so no
+# single directory grows past a few thousand entries
+def shard_path(filename):
+    digest = hashlib.sha1(filename.encode('utf-8')).hexdigest()
+    return os.path.join(digest[:2], digest[2:4], filename)
+
+
+# Uploads on this node's disk, served by serve_uploaded_image
+class LocalStorage:
+    def __init__(self, root):
+        self.root = root
+
+    # Path of an upload relative to root, None when it doesn't exist. Files from before the sharded
+    # layout sit directly in root until flask shard-uploads moves them, the second sharded lookup
+    # catches a file moved in between the other two.
+    def local_path(self, name):
+        if not name or os.path.basename(name) != name or name.startswith('.'):
+            return None
+        sharded = shard_path(name)
+        for relative_path in (sharded, name, sharded):
+            if os.path.isfile(os.path.join(self.root, relative_path)):
+                return relative_path
+        return None
+
+    def url(self, name):
+        return None
+
+    def exists(self, name):
+        return self.local_path(name) is not None
+
+    # Write through a temporary file so a half-written image is never served. Two uploads of the same
+    # content may write the same file at once, each through its own temporary file.
+    def save(self, name, data):
+        image_path = os.path.join(self.root, shard_path(name))
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+        temp_path = f'{image_path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as image_file:
+            image_file.write(data)
+        os.replace(temp_path, image_path)
+
+    def read(self, name):
+        relative_path = self.local_path(name)
+        if relative_path is None:
+            raise FileNotFoundError(name)
+        with open(os.path.join(self.root, relative_path), 'rb') as image_file:
+            return image_file.read()
+
+    def delete(self, names):
+        for name in names:
+            for image_path in (os.path.join(self.root, shard_path(name)), os.path.join(self.root, name)):
+                if os.path.exists(image_path):
+                    os.remove(image_path)
+
+    # Moves the files left in the flat layout into their shards and returns how many moved. os.replace
+    # is atomic, so each file can be served from one place or the other throughout.
+    def shard_flat_files(self):
+        moved = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                # Skip the shard directories and files still being written
+                if not entry.is_file() or entry.name.startswith('.') or entry.name.endswith('.tmp'):
+                    continue
+                image_path = os.path.join(self.root, shard_path(entry.name))
+                os.makedirs(os.path.dirname(image_path), exist_ok=True)
+                os.replace(entry.path, image_path)
+                moved += 1
+        return moved
+
+
+# Uploads in an S3-compatible bucket (AWS, MinIO, R2, ...). Clients are redirected to the bucket, or to
+# public_url when a CDN fronts it, instead of the bytes passing through the app.
+class S3Storage:
+    def __init__(self, client, bucket, prefix='', public_url=None, max_age=None):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url
+        self.max_age = max_age
+
+    def _key(self, name):
+        return f'{self.prefix}{name}'
+
+    def local_path(self, name):
+        return None
+
+    def url(self, name):
+        if self.public_url:
+            return f'{self.public_url.rstrip("/")}/{self._key(name)}'
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self._key(name)}, ExpiresIn=3600
+        )
+
+    def exists(self, name):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    # Uploads are encoded in memory and stay well under the multipart threshold, so one PUT carries them
+    def save(self, name, data):
+        extra_args = {'ContentType': mimetypes.guess_type(name)[0] or 'application/octet-stream'}
+        if self.max_age:
+            extra_args['CacheControl'] = f'public, max-age={self.max_age}, immutable'
+        self.client.put_object(Bucket=self.bucket, Key=self._key(name), Body=data, **extra_args)
+
+    def read(self, name):
+        from botocore.exceptions import ClientError
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(name))
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(name)
+            raise
+        return response['Body'].read()
+
+    # Keys that fail come back in Errors rather than raising, raise for them so the delete is retried
+    def delete(self, names):
+        keys = [{'Key': self._key(name)} for name in names]
+        for start in range(0, len(keys), S3_DELETE_BATCH):
+            response = self.client.delete_objects(
+                Bucket=self.bucket, Delete={'Objects': keys[start:start + S3_DELETE_BATCH], 'Quiet': True}
+            )
+            errors = response.get('Errors') or []
+            if errors:
+                raise OSError(f"Deleting {len(errors)} objects failed, e.g. {errors[0].get('Key')}: "
+                              f"{errors[0].get('Message')}")
+
+
+# Where uploaded images are kept, picked by STORAGE_BACKEND. Every image read, write and delete goes
+# through here.
+class UploadStorage:
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        if app.config['STORAGE_BACKEND'] == 's3':
+            # boto3 is optional, only needed when uploads are kept in a bucket
+            import boto3
+            client = boto3.client(
+                's3', endpoint_url=app.config['S3_ENDPOINT_URL'], region_name=app.config['S3_REGION']
+            )
+            self.backend = S3Storage(
+                client, app.config['S3_BUCKET'], app.config['S3_PREFIX'], app.config['S3_PUBLIC_URL'],
+                app.config['UPLOADS_MAX_AGE']
+            )
+        else:
+            self.backend = LocalStorage(app.config['UPLOAD_FOLDER'])
+
+    # The local file to serve for an upload, None when it is missing or kept remotely
+    def local_path(self, name):
+        return self.backend.local_path(name)
+
+    # Where clients fetch an upload kept remotely, None for local files
+    def url(self, name):
+        return self.backend.url(name)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def save(self, name, data):
+        self.backend.save(name, data)
+
+    def read(self, name):
+        return self.backend.read(name)
+
+    def delete(self, names):
+        names = [name for name in names if name]
+        if names:
+            self.backend.delete(names)
+
+
+upload_storage = UploadStorage()
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from . import db
+from .models import Listings
+from .vehicles import VEHICLE_TYPES
+
+
+# Precomputed most-favorited listing ids per vehicle type, plus None for all types.
+# Rebuilt every few minutes from favorite_count instead of ranking on every request.
+class TrendingListings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lists = {}
+        self._built_at = None
+
+    def _top_ids(self, vehicle_type, size):
+        query = db.session.query(Listings.id).filter(Listings.publish_status == 1, Listings.favorite_count > 0)
+        if vehicle_type:
+            query = query.filter(Listings.vehicle_type == vehicle_type)
+        query = query.order_by(Listings.favorite_count.desc(), Listings.id.desc()).limit(size)
+        return [listing_id for (listing_id,) in query]
+
+    def build(self, size):
+        lists = {vehicle_type: self._top_ids(vehicle_type, size) for vehicle_type in VEHICLE_TYPES}
+        lists[None] = self._top_ids(None, size)
+
+        with self._lock:
+            self._lists = lists
+            self._built_at = time.monotonic()
+
+    def ensure_built(self, max_age, size):
+        if self._built_at is None or time.monotonic() - self._built_at > max_age:
+            self.build(size)
+
+    def listing_ids(self, vehicle_type=None):
+        with self._lock:
+            return self._lists.get(vehicle_type, [])
+
+
+trending_listings = TrendingListings()
@@ -0,0 +1,51 @@
+from .models import Listings, Cars, Motorcycle, Boats, HeavyVehicles
+
+# Listing fields shared by every vehicle type that the owner can edit after creating the listing
+LISTING_FIELDS = ('price', 'description', 'model', 'model_year', 'variant', 'mileage', 'g_map_location')
+
+# Everything that differs between the vehicle types. The relationship on Listings doubles as the
+# nested ListingsSchema field the detail row is dumped under.
+VEHICLE_TYPES = {
+    'car': {
+        'label': 'Car',
+        'slug': 'car',
+        'model': Cars,
+        'relationship': Listings.cars,
+        'fields': (
+            'fuel_type', 'exterior_color', 'interior_color', 'warranty', 'doors', 'no_of_cylinders',
+            'transmission_type', 'body_type', 'seating_capacity', 'horse_power', 'engine_capacity',
+            'steering_hand', 'trim', 'insured_uae', 'regional_spec',
+        ),
+    },
+    'motorcycle': {
+        'label': 'Motorcycle',
+        'slug': 'motorcycle',
+        'model': Motorcycle,
+        'relationship': Listings.motorcycle,
+        'fields': ('type', 'usage', 'warranty', 'wheels', 'seller_type', 'final_drive_system', 'engine_size'),
+    },
+    'boat': {
+        'label': 'Boat',
+        'slug': 'boat',
+        'model': Boats,
+        'relationship': Listings.boats,
+        'fields': ('type_1', 'type_2', 'usage', 'warranty', 'age', 'seller_type', 'length', 'condition'),
+    },
+    'heavy vehicle': {
+        'label': 'Heavy Vehicle',
+        'slug': 'heavy-vehicle',
+        'model': HeavyVehicles,
+        'relationship': Listings.heavy_vehicles,
+        'fields': (
+            'type_1', 'type_2', 'fuel_type', 'no_of_cylinders', 'body_condition', 'mechanical_condition',
+            'capacity_weight', 'seller_type', 'warranty', 'horse_power',
+        ),
+    },
+}
+
+VEHICLE_SLUGS = {vehicle['slug']: vehicle_type for vehicle_type, vehicle in VEHICLE_TYPES.items()}
+
+
+# vehicle_type value for a URL slug, None for unknown slugs
+def vehicle_type_for_slug(slug):
+    return VEHICLE_SLUGS.get(slug)
@@ -1,26 +1,38 @@
-import io
-import os
+import mimetypes
 import threading
-import uuid
+import zipfile
 from datetime import datetime, timedelta
+from urllib.parse import quote
 
 import requests
-from PIL import Image
-from flask import Blueprint, jsonify, request, send_from_directory, current_app, g
+from flask import Blueprint, jsonify, request, send_from_directory, current_app, g, abort, redirect
 from flask_jwt_extended import jwt_required
 from flask_mail import Message
 from flask_socketio import join_room, leave_room
 from google_play_scraper import app
 from slugify import slugify
-from sqlalchemy import or_, and_, desc
-from werkzeug.utils import secure_filename
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import joinedload, contains_eager
 
 from . import db, bcrypt, allowed_file, stripe, mail, socketio
-from .decorators import current_user_required
-from .models import Admin, Brand, Location, Community, Cars, Listings, ListingImage, SafetyFeatures, ListingAmenities, \
-    User, Motorcycle, Boats, HeavyVehicles, Favorites, Make, Trim, Conversation, Messages, PushToken
+from .autocomplete import autocomplete_index
+from .favorites import favorites_cache
+from .images import image_pipeline, ImageJob, IMAGE_PROCESSING, store_upload, store_encoded_image, \
+    release_image, release_images, STAGING_PREFIX
+from .storage import upload_storage
+from .trending import trending_listings
+from .decorators import current_user_required, optional_current_user, vehicle_type_required
+from .models import Admin, Brand, Location, Community, Listings, ListingImage, SafetyFeatures, ListingAmenities, \
+    User, Favorites, Make, Trim, Conversation, Messages, PushToken, ImportJob, PUBLISH_STATUS_BY_NAME, \
+    PUBLISH_STATUS_DELETED, LISTING_NOT_DELETED
 from .schemas import BrandSchema, CommunitySchema, ListingsSchema, CarsSchema, UserSchema, ListingImageSchema, \
-    FavoritesSchema, TrimSchema, MakeSchema
+    FavoritesSchema, TrimSchema, MakeSchema, ListingCardSchema, ImportJobSchema
+from .queries import listing_query, listing_load_options, listing_counts_by_user, feed_order, feed_page, \
+    next_feed_cursor, cached_total, listing_search_condition, listing_search_relevance, increment_favorite_count
+from .vehicles import VEHICLE_TYPES, LISTING_FIELDS, vehicle_type_for_slug
+from .services import create_listing, sync_listing_names, insert_rows, add_listing_names, delete_listing_names
+from .imports import create_import_job, import_format, import_resumable, run_import_in_background
+from .deletions import request_user_deletion, request_listing_deletion
 
 from exponent_server_sdk import (
     DeviceNotRegisteredError,
@@ -55,6 +67,8 @@ communities_schema = CommunitySchema(many=True)
 listing_schema = ListingsSchema()
 listings_schema = ListingsSchema(many=True)
 
+listing_cards_schema = ListingCardSchema(many=True)
+
 listing_image_schema = ListingImageSchema()
 listing_images_schema = ListingImageSchema(many=True)
 
@@ -64,6 +78,78 @@ cars_schema = CarsSchema(many=True)
 favorite_schema = FavoritesSchema()
 favorites_schema = FavoritesSchema(many=True)
 
+import_job_schema = ImportJobSchema()
+
+
+# Dump helpers that batch the owners' listing counts into the schema context
+def dump_listings(listings, card=False):
+    if card:
+        return listing_cards_schema.dump(listings)
+
+    listings = list(listings)
+    context = {'listing_counts': listing_counts_by_user({listing.user_id for listing in listings})}
+    return ListingsSchema(many=True, context=context).dump(listings)
+
+
+def dump_listing(listing):
+    context = {'listing_counts': listing_counts_by_user([listing.user_id])}
+    return ListingsSchema(context=context).dump(listing)
+
+
+def dump_users(users):
+    users = list(users)
+    context = {'listing_counts': listing_counts_by_user({user.id for user in users})}
+    return UserSchema(many=True, context=context).dump(users)
+
+
+def dump_favorites(favorites):
+    favorites = list(favorites)
+    context = {'listing_counts': listing_counts_by_user({favorite.listing.user_id for favorite in favorites})}
+    return FavoritesSchema(many=True, context=context).dump(favorites)
+
+
+# Sets is_favorite on a page of dumped listings when the request is signed in.
+# Only the page's ids are looked up, not the user's whole favorites history.
+def annotate_favorites(result):
+    if not g.get('current_user'):
+        return result
+
+    page_ids = [listing_dict['id'] for listing_dict in result]
+    favorite_ids = set()
+    if page_ids:
+        favorite_ids = {
+            listing_id for (listing_id,) in db.session.query(Favorites.listing_id)
+            .filter(Favorites.user_id == g.current_user['id'], Favorites.listing_id.in_(page_ids))
+        }
+
+    for listing_dict in result:
+        listing_dict['is_favorite'] = int(listing_dict['id'] in favorite_ids)
+    return result
+
+
+MAX_CHECK_FAVORITES = 100
+
+# Query args that page through a result set without changing what is counted
+PAGING_ARGS = {'page', 'page_size', 'cursor', 'fields', 'with_total'}
+
+
+# Total for a paginated response, or None when the client passes with_total=false.
+# Feed totals are cached for a few seconds under the endpoint and its normalized filters.
+def response_total(data, cache=False):
+    if request.args.get('with_total', 'true', type=str).lower() == 'false':
+        return None
+
+    if not cache:
+        return data.count()
+
+    filters = sorted(
+        (key, value.strip().lower())
+        for key, value in request.args.items(multi=True)
+        if key not in PAGING_ARGS and value.strip()
+    )
+    key = (request.endpoint, tuple(sorted((request.view_args or {}).items())), tuple(filters))
+    return cached_total(data, key, current_app.config['FEED_TOTAL_CACHE_TTL'])
+
 
 ####################################################################### ADMIN API ######################################
 # Admin Credentials Initializer
@@ -81,40 +167,39 @@ def initializer():
 
 
 # Serve Images to Frontend
+# Uploads are named after their content and never rewritten in place, so browsers and CDNs may keep them for good.
+# send_from_directory sets a strong ETag and Last-Modified, answers conditional requests with 304 and
+# serves Range requests. USE_X_SENDFILE or UPLOADS_ACCEL_REDIRECT hand the bytes to the front proxy, and
+# uploads kept in a bucket are fetched from there.
 @views.route('/uploaded_img/<path:filename>', methods=['GET'])
 def serve_uploaded_image(filename):
-    return send_from_directory(directory=current_app.config['UPLOAD_FOLDER'], path=filename)
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    max_age = current_app.config['UPLOADS_MAX_AGE']
+    accel_redirect = current_app.config['UPLOADS_ACCEL_REDIRECT']
 
+    # Raw uploads waiting to be encoded aren't served
+    if filename.startswith(STAGING_PREFIX):
+        abort(404)
 
-# Image Resizer
-def resize_image(image, max_size_kb):
-    max_size_bytes = max_size_kb * 1024  # Convert KB to bytes
+    url = upload_storage.url(filename)
+    if url:
+        return redirect(url)
 
-    # Open the image using PIL
-    img = Image.open(image)
+    relative_path = upload_storage.local_path(filename)
+    if relative_path is None:
+        abort(404)
 
-    # Convert the image to RGB mode if it's in RGBA mode (has an alpha channel)
-    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-        img = img.convert('RGB')
-
-    # Calculate current image size in bytes
-    img_byte_array = io.BytesIO()
-    img.save(img_byte_array, format='JPEG')  # Change format as required
-    img_size = img_byte_array.tell()
-
-    # Resize the image while keeping the aspect ratio
-    if img_size > max_size_bytes:
-        # Calculate the resize ratio to fit within the size limit
-        resize_ratio = (max_size_bytes / img_size) ** 0.5  # square root to maintain aspect ratio
-
-        # Calculate new dimensions
-        new_width = int(img.width * resize_ratio)
-        new_height = int(img.height * resize_ratio)
-
-        # Resize the image
-        img = img.resize((new_width, new_height))
+    if accel_redirect:
+        # nginx serves the file from an internal location, including the 304 and Range handling
+        response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0])
+        response.headers['X-Accel-Redirect'] = accel_redirect + quote(relative_path)
+        response.cache_control.max_age = max_age
+    else:
+        response = send_from_directory(directory=upload_folder, path=relative_path, max_age=max_age)
 
-    return img
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
 ############# Settings ################
@@ -151,7 +236,7 @@ def brands_view():
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -171,9 +256,7 @@ def brand_create():
     file = request.files.get('image')
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_name = str(uuid.uuid1()) + '_' + filename
-        file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], file_name))
+        file_name = store_upload(file, current_app.config['IMAGE_WEBP'])
 
     new_data2 = Brand(
         name=new_data['name'],
@@ -183,6 +266,7 @@ def brand_create():
     )
     db.session.add(new_data2)
     db.session.commit()
+    autocomplete_index.add('brand', new_data2.name, new_data2.id)
 
     new_added_data = brand_schema.dump(new_data2)
     return jsonify({'message': 'Brand successfully added!', 'new_data': new_added_data}), 200
@@ -193,35 +277,11 @@ def brand_create():
 @current_user_required
 def admin_delete_user(id):
     data = User.query.get(id)
-    if data is None:
+    if data is None or data.deleted_date is not None:
         return jsonify({'message': 'User not found.'}), 400
 
-    listing_data = Listings.query.filter_by(user_id=id)
-    for listing in listing_data:
-        listing_feature_image = listing.featured_image
-        if listing_feature_image:
-            image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_feature_image)
-            if os.path.exists(image_path):
-                os.remove(image_path)
-        listing_image_data = ListingImage.query.filter_by(listing_id=listing.id)
-        for images in listing_image_data:
-            image_data = images.image
-            if image_data:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image_data)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-
-    profile_picture = data.profile_picture
-    if profile_picture == 'default_profile_picture.jpg':
-        pass
-    else:
-        image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], profile_picture)
-        if os.path.exists(image_path):
-            os.remove(image_path)
-
-    delete_stripe_customer(data.id)
-    db.session.delete(data)
-    db.session.commit()
+    # Hidden at once, the rows, files and Stripe customer are purged by a deletion job
+    request_user_deletion(data, g.current_user['email'])
 
     return 'Success!', 200
 
@@ -237,25 +297,23 @@ def brand_update(id):
             file = request.files.get('image')
             file_name = None
             if data.image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], data.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
+                release_image(data.image)
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_name = str(uuid.uuid1()) + '_' + filename
-                file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], file_name))
+                file_name = store_upload(file, current_app.config['IMAGE_WEBP'])
             data.name = new_data['name']
             data.type = new_data['type']
             data.image = file_name
             data.updated_by = g.current_user['email']
             data.updated_date = datetime.now()
             db.session.commit()
+            autocomplete_index.invalidate()
         else:
             data.name = new_data['name']
             data.type = new_data['type']
             data.updated_by = g.current_user['email']
             data.updated_date = datetime.now()
             db.session.commit()
+            autocomplete_index.invalidate()
     else:
         return jsonify({'message': 'Brand not found!'}), 400
 
@@ -271,12 +329,11 @@ def brand_delete(id):
     data = Brand.query.get(id)
     if data is None:
         return jsonify({'message': 'Brand not found.'}), 400
-    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], data.image)
-    if os.path.exists(image_path):
-        os.remove(image_path)
+    release_image(data.image)
 
     db.session.delete(data)
     db.session.commit()
+    autocomplete_index.invalidate()
     return 'Success!', 200
 
 
@@ -312,7 +369,7 @@ def make_and_model_view(id):
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -338,6 +395,7 @@ def make_and_model_create(id):
 
         db.session.add(new_data2)
         db.session.commit()
+        autocomplete_index.add('make', new_data2.name, new_data2.id)
 
         new_added_data = make_schema.dump(new_data2)
         return jsonify({'message': 'Make & Model successfully added!', 'new_data': new_added_data}), 200
@@ -353,6 +411,7 @@ def make_and_model_create(id):
                 model_data = Make(name=brand.name + " " + model, brand_id=id, created_by=g.current_user['email'])
                 db.session.add(model_data)
                 db.session.commit()
+                autocomplete_index.add('make', model_data.name, model_data.id)
                 added_model_data.append(make_schema.dump(model_data))
 
         return jsonify({'message': 'Make & Model successfully added!', 'new_data': added_model_data}), 200
@@ -370,6 +429,7 @@ def make_and_model_update(id):
         data.updated_by = g.current_user['email']
         data.updated_date = datetime.now()
         db.session.commit()
+        autocomplete_index.invalidate()
     else:
         return jsonify({'message': 'Make & Model not found!'}), 400
 
@@ -388,6 +448,7 @@ def make_and_model_delete(id):
 
     db.session.delete(data)
     db.session.commit()
+    autocomplete_index.invalidate()
     return 'Success!', 200
 
 
@@ -423,7 +484,7 @@ def trim_view(id):
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -447,6 +508,7 @@ def trim_create(id):
 
         db.session.add(new_data2)
         db.session.commit()
+        autocomplete_index.add('trim', new_data2.name, new_data2.id)
 
         new_added_data = trim_schema.dump(new_data2)
         return jsonify({'message': 'Trim successfully added!', 'new_data': new_added_data}), 200
@@ -461,6 +523,7 @@ def trim_create(id):
                 trim_data = Trim(name=trim, make_id=id, created_by=g.current_user['email'])
                 db.session.add(trim_data)
                 db.session.commit()
+                autocomplete_index.add('trim', trim_data.name, trim_data.id)
                 added_trim_data.append(trim_schema.dump(trim_data))
 
         return jsonify({'message': 'Trims successfully added!', 'new_data': added_trim_data}), 200
@@ -478,6 +541,7 @@ def trim_update(id):
         data.updated_by = g.current_user['email']
         data.updated_date = datetime.now()
         db.session.commit()
+        autocomplete_index.invalidate()
     else:
         return jsonify({'message': 'Trim not found!'}), 400
 
@@ -496,6 +560,7 @@ def trim_delete(id):
 
     db.session.delete(data)
     db.session.commit()
+    autocomplete_index.invalidate()
     return 'Success!', 200
 
 
@@ -531,7 +596,7 @@ def location_view():
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -551,9 +616,7 @@ def location_create():
     file = request.files.get('image')
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_name = str(uuid.uuid1()) + '_' + filename
-        file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], file_name))
+        file_name = store_upload(file, current_app.config['IMAGE_WEBP'])
 
     new_data2 = Location(
         name=new_data['name'],
@@ -579,13 +642,9 @@ def location_update(id):
             file = request.files.get('image')
             file_name = None
             if data.image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], data.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
+                release_image(data.image)
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_name = str(uuid.uuid1()) + '_' + filename
-                file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], file_name))
+                file_name = store_upload(file, current_app.config['IMAGE_WEBP'])
             data.name = new_data['name']
             data.image = file_name
             data.updated_by = g.current_user['email']
@@ -611,9 +670,7 @@ def location_delete(id):
     data = Location.query.get(id)
     if data is None:
         return jsonify({'message': 'Location not found.'}), 400
-    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], data.image)
-    if os.path.exists(image_path):
-        os.remove(image_path)
+    release_image(data.image)
 
     db.session.delete(data)
     db.session.commit()
@@ -652,7 +709,7 @@ def community_view(id):
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -671,9 +728,7 @@ def community_create(id):
     file = request.files.get('image')
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_name = str(uuid.uuid1()) + '_' + filename
-        file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], file_name))
+        file_name = store_upload(file, current_app.config['IMAGE_WEBP'])
 
         new_data2 = Community(
             name=new_data['name'],
@@ -707,13 +762,9 @@ def community_update(id):
             file = request.files.get('image')
             file_name = None
             if data.image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], data.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
+                release_image(data.image)
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_name = str(uuid.uuid1()) + '_' + filename
-                file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], file_name))
+                file_name = store_upload(file, current_app.config['IMAGE_WEBP'])
             data.name = new_data['name']
             data.image = file_name
             data.updated_by = g.current_user['email']
@@ -739,9 +790,7 @@ def community_delete(id):
     data = Community.query.get(id)
     if data is None:
         return jsonify({'message': 'Community not found.'}), 400
-    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], data.image)
-    if os.path.exists(image_path):
-        os.remove(image_path)
+    release_image(data.image)
 
     db.session.delete(data)
     db.session.commit()
@@ -751,24 +800,23 @@ def community_delete(id):
 ############## END OF SETTINGS ##################################
 
 ################ LISTINGS ########################################
-# CAR LISTING INFORMATION
-@views.route('/admin/car-listing-view', methods=['GET'])
+# VEHICLE LISTING INFORMATION
+@views.route('/admin/listing-view/<vehicle>', methods=['GET'])
 @jwt_required()
 @current_user_required
-def car_listing_view():
+@vehicle_type_required
+def admin_listing_view(vehicle_type):
     page = request.args.get('page', 1, type=int)
     page_size = request.args.get('page_size', 10, type=int)
     search = request.args.get('search', '', type=str)
 
     status = request.args.get('status', '', type=str)
     if status == "ALL":
-        data = Listings.query.filter_by(vehicle_type='car')
-    elif status == "IN REVIEW":
-        data = Listings.query.filter_by(vehicle_type='car', publish_status=0)
-    elif status == "NOT PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='car', publish_status=2)
-    elif status == "PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='car', publish_status=1)
+        data = listing_query(vehicle_type)
+    elif status in PUBLISH_STATUS_BY_NAME:
+        data = listing_query(vehicle_type, publish_status=PUBLISH_STATUS_BY_NAME[status])
+    else:
+        return jsonify({'message': 'Invalid status.'}), 400
 
     if search:
         search_words = search.split(',')
@@ -788,11 +836,11 @@ def car_listing_view():
 
     data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
 
-    result = listings_schema.dump(data_paginated)
+    result = dump_listings(data_paginated)
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -803,7 +851,12 @@ def car_listing_view():
 def listing_update_publish_status(id):
     new_data = request.get_json()
 
-    data = Listings.query.get(id)
+    data = Listings.query.filter(Listings.id == id, LISTING_NOT_DELETED).first()
+    if data is None:
+        return jsonify({'message': 'Listing not found.'}), 400
+    # Deleting goes through the delete endpoints so the listing is purged
+    if new_data['publish_status'] == PUBLISH_STATUS_DELETED:
+        return jsonify({'message': 'Invalid publish status.'}), 400
 
     data.publish_status = new_data['publish_status']
     data.updated_by = g.current_user['email']
@@ -811,148 +864,10 @@ def listing_update_publish_status(id):
 
     db.session.commit()
 
-    updated_data = listing_schema.dump(data)
+    updated_data = dump_listing(data)
     return jsonify({'message': f'Listing Publish Status updated successfully!', 'updated_data': updated_data}), 200
 
 
-# Motorcycle LISTING INFORMATION
-@views.route('/admin/motorcycle-listing-view', methods=['GET'])
-@jwt_required()
-@current_user_required
-def motorcycle_listing_view():
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-
-    status = request.args.get('status', '', type=str)
-    if status == "ALL":
-        data = Listings.query.filter_by(vehicle_type='motorcycle')
-    elif status == "IN REVIEW":
-        data = Listings.query.filter_by(vehicle_type='motorcycle', publish_status=0)
-    elif status == "NOT PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='motorcycle', publish_status=2)
-    elif status == "PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='motorcycle', publish_status=1)
-
-    if search:
-        search_words = search.split(',')
-
-        def search_filter(word):
-            word = word.strip()
-            return or_(
-                Listings.title.ilike(f"%{word}%"),
-                Listings.user.has(User.first_name.ilike(f"%{word}%")),
-                Listings.user.has(User.last_name.ilike(f"%{word}%"))
-            )
-
-        filter_conditions = [search_filter(word) for word in search_words]
-        data = data.filter(*filter_conditions)
-
-    data = data.order_by(Listings.id.desc())
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# boat LISTING INFORMATION
-@views.route('/admin/boat-listing-view', methods=['GET'])
-@jwt_required()
-@current_user_required
-def boat_listing_view():
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-    status = request.args.get('status', '', type=str)
-
-    search = request.args.get('search', '', type=str)
-
-    if status == "ALL":
-        data = Listings.query.filter_by(vehicle_type='boat')
-    elif status == "IN REVIEW":
-        data = Listings.query.filter_by(vehicle_type='boat', publish_status=0)
-    elif status == "NOT PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='boat', publish_status=2)
-    elif status == "PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='boat', publish_status=1)
-
-    if search:
-        search_words = search.split(',')
-
-        def search_filter(word):
-            word = word.strip()
-            return or_(
-                Listings.title.ilike(f"%{word}%"),
-                Listings.user.has(User.first_name.ilike(f"%{word}%")),
-                Listings.user.has(User.last_name.ilike(f"%{word}%"))
-            )
-
-        filter_conditions = [search_filter(word) for word in search_words]
-        data = data.filter(*filter_conditions)
-
-    data = data.order_by(Listings.id.desc())
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# CAR LISTING INFORMATION
-@views.route('/admin/heavy-vehicle-listing-view', methods=['GET'])
-@jwt_required()
-@current_user_required
-def heavy_vehicle_listing_view():
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-
-    status = request.args.get('status', '', type=str)
-    if status == "ALL":
-        data = Listings.query.filter_by(vehicle_type='heavy vehicle')
-    elif status == "IN REVIEW":
-        data = Listings.query.filter_by(vehicle_type='heavy vehicle', publish_status=0)
-    elif status == "NOT PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='heavy vehicle', publish_status=2)
-    elif status == "PUBLISHED":
-        data = Listings.query.filter_by(vehicle_type='heavy vehicle', publish_status=1)
-
-    if search:
-        search_words = search.split(',')
-
-        def search_filter(word):
-            word = word.strip()
-            return or_(
-                Listings.title.ilike(f"%{word}%"),
-                Listings.user.has(User.first_name.ilike(f"%{word}%")),
-                Listings.user.has(User.last_name.ilike(f"%{word}%"))
-            )
-
-        filter_conditions = [search_filter(word) for word in search_words]
-        data = data.filter(*filter_conditions)
-
-    data = data.order_by(Listings.id.desc())
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
 # Delete Listing
 @views.route('/admin/delete-listing/<int:id>', methods=['DELETE'])
 @jwt_required()
@@ -960,19 +875,9 @@ def heavy_vehicle_listing_view():
 def admin_delete_listing(id):
     admin = Admin.query.get(g.current_user['id'])
     if admin:
-        listing_data = Listings.query.filter_by(id=id).first()
+        listing_data = Listings.query.filter(Listings.id == id, LISTING_NOT_DELETED).first()
         if listing_data:
-            listing = Listings.query.get(id)
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            for image in listing_data.listing_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            db.session.delete(listing)
-            db.session.commit()
+            request_listing_deletion(listing_data, g.current_user['email'])
         else:
             return jsonify({'message': 'Listing not found.'}), 400
     else:
@@ -991,7 +896,7 @@ def users_view():
 
     search = request.args.get('search', '', type=str)
 
-    data = User.query
+    data = User.query.filter(User.deleted_date.is_(None))
 
     if search:
         search_words = search.split(',')
@@ -1009,11 +914,11 @@ def users_view():
 
     data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
 
-    result = users_schema.dump(data_paginated)
+    result = dump_users(data_paginated)
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -1021,39 +926,40 @@ def users_view():
 
 ###################### SEARCH ALL LISTING ENDPOINT ####################
 @views.route('/client/all-listing-search', methods=['GET'])
+@optional_current_user
 def all_listing_search():
     page = request.args.get('page', 1, type=int)
     page_size = request.args.get('page_size', 10, type=int)
     search = request.args.get('search', '', type=str)
 
-    data = Listings.query.filter_by(publish_status=1)
+    cursor = request.args.get('cursor', '', type=str)
+    card = request.args.get('fields', 'full', type=str) == 'card'
+
+    data = listing_query(card=card, publish_status=1)
 
     if search:
         filter_conditions = []
 
         if search:
-            search_conditions = or_(
-                Listings.title.ilike(f"%{search}%"),
-                Listings.brand.has(Brand.name.ilike(f"%{search}%"))
-            )
+            search_conditions = listing_search_condition(search)
             filter_conditions.append(search_conditions)
 
         data = data.filter(and_(*filter_conditions))
 
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
+    # Premium listings come first, then featured, then by search relevance and newest first
+    relevance = None if cursor else listing_search_relevance(search)
+    data = data.order_by(*feed_order(relevance))
 
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
+    data_paginated = feed_page(data, page, page_size, cursor)
+    if data_paginated is None:
+        return jsonify({'message': 'Invalid cursor.'}), 400
 
-    result = listings_schema.dump(data_paginated)
+    result = annotate_favorites(dump_listings(data_paginated, card=card))
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data, cache=True),
+        "next_cursor": next_feed_cursor(data_paginated, page_size) if relevance is None else None
     }), 200
 
 
@@ -1069,7 +975,9 @@ def add_favorite(id):
         if g.current_user['id']:
             data = Favorites(user_id=g.current_user['id'], listing_id=id)
             db.session.add(data)
+            increment_favorite_count(id, 1)
             db.session.commit()
+            favorites_cache.added(g.current_user['id'], id)
         else:
             return jsonify({'message': 'Please log in to add favorite'}), 400
         return jsonify({'message': 'Listing added to favorites successfully'}), 200
@@ -1085,7 +993,9 @@ def remove_favorite(id):
         favorite = Favorites.query.filter_by(user_id=g.current_user['id'], listing_id=id).first()
         if favorite:
             db.session.delete(favorite)
+            increment_favorite_count(id, -1)
             db.session.commit()
+            favorites_cache.removed(g.current_user['id'], id)
             return jsonify({'message': 'Listing removed from favorites successfully'}), 200
         else:
             return jsonify({'message': 'Listing not found in favorites'}), 404
@@ -1100,14 +1010,17 @@ def get_favorite_listings(id):
     page = request.args.get('page', 1, type=int)
     page_size = request.args.get('page_size', 10, type=int)
 
-    data = Favorites.query.filter_by(user_id=id)
+    # Listings waiting for their deletion job are hidden here too
+    data = Favorites.query.join(Favorites.listing) \
+        .options(contains_eager(Favorites.listing).options(*listing_load_options())) \
+        .filter(Favorites.user_id == id, LISTING_NOT_DELETED)
 
     data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
 
-    result = favorites_schema.dump(data_paginated)
+    result = dump_favorites(data_paginated)
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
     }), 200
 
 
@@ -1116,16 +1029,29 @@ def get_favorite_listings(id):
 @current_user_required
 def check_favorite(id):
     if g.current_user['id']:
-        favorite = Favorites.query.filter_by(user_id=g.current_user['id'], listing_id=id).first()
-        if favorite:
-            is_favorite = 1
-        else:
-            is_favorite = 0
+        is_favorite = int(id in favorites_cache.favorite_ids(g.current_user['id']))
     else:
         return jsonify({'message': 'Please log in to add favorite'}), 400
     return jsonify({'isFavorite': is_favorite})
 
 
+# Favorite flags for a grid of listings in one round trip, ?ids=1,2,3
+@views.route('/client/check-favorites', methods=['GET'])
+@jwt_required()
+@current_user_required
+def check_favorites():
+    if not g.current_user['id']:
+        return jsonify({'message': 'Please log in to add favorite'}), 400
+
+    ids = request.args.get('ids', '', type=str)
+    listing_ids = [int(listing_id) for listing_id in ids.split(',') if listing_id.strip().isdigit()]
+    if len(listing_ids) > MAX_CHECK_FAVORITES:
+        return jsonify({'message': f'At most {MAX_CHECK_FAVORITES} ids can be checked at once.'}), 400
+
+    favorite_ids = favorites_cache.favorite_ids(g.current_user['id'])
+    return jsonify({'data': {str(listing_id): int(listing_id in favorite_ids) for listing_id in listing_ids}})
+
+
 ##################### FAVORITES FUNCTION ENDPOINT #################
 
 ############ VIEW ALL IMAGES IN A LISTING ############
@@ -1141,77 +1067,30 @@ def additiona_images(id):
 
 ##################END########################
 
-###################### CAR LISTING ENDPOINT ###########################
-# All Car View
-@views.route('/client/all-car-view', methods=['GET'])
-def all_car_view():
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
-    startPrice = request.args.get('startPrice', '', type=str)
-    endPrice = request.args.get('endPrice', '', type=str)
-    startModelYear = request.args.get('startModelYear', '', type=str)
-    endModelYear = request.args.get('endModelYear', '', type=str)
-    startMileage = request.args.get('startMileage', '', type=str)
-    endMileage = request.args.get('endMileage', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='car', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
-
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand = int(brand)
-            brand_conditions = Listings.brand_id == brand
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
-
-        data = data.filter(and_(*filter_conditions))
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# AUTH All Car View
-@views.route('/client/auth-all-car-view', methods=['GET'])
-@jwt_required()
-@current_user_required
-def auth_all_car_view():
-    user_id = g.current_user['id']
-    user_favorite_ids = [fav.listing_id for fav in Favorites.query.filter_by(user_id=user_id).all()]
-
+###################### VEHICLE LISTING ENDPOINT ###########################
+# One implementation for every vehicle type in VEHICLE_TYPES, the <vehicle> slug picks the type.
+# The original per-vehicle URLs are registered as aliases at the end of the brands section.
+
+# The current user's listing of the given vehicle type, or the error response to return instead
+def owned_listing(id, vehicle_type):
+    listing_data = Listings.query.filter_by(id=id, user_id=g.current_user['id']).first()
+    if listing_data is None:
+        return None, (jsonify({'message': 'You are not allowed to update other users listing.'}), 400)
+    if listing_data.vehicle_type != vehicle_type or listing_data.publish_status == PUBLISH_STATUS_DELETED:
+        return None, (jsonify({'message': 'Listing not found.'}), 400)
+    return listing_data, None
+
+
+# All Vehicle Listings View, signed in users also get is_favorite on every listing
+@views.route('/client/listings/<vehicle>', methods=['GET'])
+@optional_current_user
+@vehicle_type_required
+def listing_feed(vehicle_type):
     page = request.args.get('page', 1, type=int)
     page_size = request.args.get('page_size', 10, type=int)
 
     search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
+    brand = request.args.get('brand', type=int)
     startPrice = request.args.get('startPrice', '', type=str)
     endPrice = request.args.get('endPrice', '', type=str)
     startModelYear = request.args.get('startModelYear', '', type=str)
@@ -1219,61 +1098,52 @@ def auth_all_car_view():
     startMileage = request.args.get('startMileage', '', type=str)
     endMileage = request.args.get('endMileage', '', type=str)
 
-    data = Listings.query.filter_by(vehicle_type='car', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
+    cursor = request.args.get('cursor', '', type=str)
+    card = request.args.get('fields', 'full', type=str) == 'card'
 
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand = int(brand)
-            brand_conditions = Listings.brand_id == brand
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
+    data = listing_query(vehicle_type, card=card, publish_status=1)
 
+    filter_conditions = []
+    if search:
+        filter_conditions.append(listing_search_condition(search))
+    if brand:
+        filter_conditions.append(Listings.brand_id == brand)
+    if startPrice and endPrice:
+        filter_conditions.append(Listings.price.between(startPrice, endPrice))
+    if startMileage and endMileage:
+        filter_conditions.append(Listings.mileage.between(startMileage, endMileage))
+    if startModelYear and endModelYear:
+        filter_conditions.append(Listings.model_year.between(startModelYear, endModelYear))
+    if filter_conditions:
         data = data.filter(and_(*filter_conditions))
 
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
+    # Premium listings come first, then featured, then by search relevance and newest first
+    relevance = None if cursor else listing_search_relevance(search)
+    data = data.order_by(*feed_order(relevance))
 
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
+    data_paginated = feed_page(data, page, page_size, cursor)
+    if data_paginated is None:
+        return jsonify({'message': 'Invalid cursor.'}), 400
 
-    result = []
-    for listing in data_paginated:
-        listing_dict = listing_schema.dump(listing)
-        listing_dict['is_favorite'] = int(listing.id in user_favorite_ids)
-        result.append(listing_dict)
+    result = annotate_favorites(dump_listings(data_paginated, card=card))
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data, cache=True),
+        "next_cursor": next_feed_cursor(data_paginated, page_size) if relevance is None else None
     }), 200
 
 
-# User Car View
-@views.route('/client/user-car-view/<int:id>', methods=['GET'])
-def user_car_view(id):
+# User Vehicle Listings View
+@views.route('/client/listings/<vehicle>/user/<int:id>', methods=['GET'])
+@vehicle_type_required
+def user_listing_feed(id, vehicle_type):
     page = request.args.get('page', 1, type=int)
     page_size = request.args.get('page_size', 10, type=int)
 
     search = request.args.get('search', '', type=str)
 
-    data = Listings.query.filter_by(vehicle_type='car', user_id=id)
+    data = listing_query(vehicle_type, user_id=id)
 
     user = User.query.get(id)
     if not user:
@@ -1293,28 +1163,60 @@ def user_car_view(id):
         filter_conditions = [search_filter(word) for word in search_words]
         data = data.filter(*filter_conditions)
 
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
+    # Premium listings come first, then featured, then newest first
+    data = data.order_by(*feed_order())
 
     data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
 
-    result = listings_schema.dump(data_paginated)
+    result = dump_listings(data_paginated)
 
     return jsonify({
         "data": result,
-        "total": data.count()
+        "total": response_total(data)
+    }), 200
+
+
+# Most Favorited Listings, ?vehicle=<slug> narrows them to one vehicle type
+@views.route('/client/trending', methods=['GET'])
+@optional_current_user
+def trending_view():
+    page = request.args.get('page', 1, type=int)
+    page_size = request.args.get('page_size', 10, type=int)
+    card = request.args.get('fields', 'full', type=str) == 'card'
+
+    vehicle_type = None
+    vehicle = request.args.get('vehicle', '', type=str)
+    if vehicle:
+        vehicle_type = vehicle_type_for_slug(vehicle)
+        if vehicle_type is None:
+            return jsonify({'message': 'Vehicle type not found.'}), 400
+
+    trending_listings.ensure_built(current_app.config['TRENDING_REFRESH_INTERVAL'], current_app.config['TRENDING_SIZE'])
+    listing_ids = trending_listings.listing_ids(vehicle_type)
+    page_ids = listing_ids[(page - 1) * page_size:page * page_size]
+
+    # Load the page by id and put it back in ranking order, listings unpublished since the last refresh drop out
+    listings = {}
+    if page_ids:
+        data = listing_query(vehicle_type, card=card, publish_status=1).filter(Listings.id.in_(page_ids))
+        listings = {listing.id: listing for listing in data}
+    data_paginated = [listings[listing_id] for listing_id in page_ids if listing_id in listings]
+
+    result = annotate_favorites(dump_listings(data_paginated, card=card))
+
+    return jsonify({
+        "data": result,
+        "total": len(listing_ids)
     }), 200
 
 
-# Car Create
-@views.route('/client/car-create', methods=['POST'])
+# Vehicle Listing Create
+@views.route('/client/listings/<vehicle>/create', methods=['POST'])
 @jwt_required()
 @current_user_required
-def car_create():
+@vehicle_type_required
+def listing_create(vehicle_type):
+    vehicle = VEHICLE_TYPES[vehicle_type]
     new_data = request.form
     user = User.query.get(g.current_user['id'])
     featured_as = new_data.get('featured_as', '').lower()
@@ -1330,164 +1232,72 @@ def car_create():
     else:
         return jsonify({'message': f'No Featured As'}), 400
 
-    file_name = None
+    # Uploads are only staged here, the image pipeline encodes and saves them after the response
+    image_jobs = []
     file = request.files.get('featured_image')
-
     if file and allowed_file(file.filename):
-        resize_file = resize_image(file, max_size_kb=1024)
-        filename = secure_filename(file.filename)
-        file_name = str(uuid.uuid1()) + '_' + filename
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file_name)
-        resize_file.save(filepath, format='JPEG')
-
-    title = f"{new_data['model']} {new_data['model_year']}"
-    slug = slugify(title)
-
-    listing_data = Listings(
-        vin=new_data['vin'],
-        title=title,
-        slug=slug,
-        price=new_data['price'],
-        description=new_data['description'],
-        model=new_data['model'],
-        model_year=new_data['model_year'],
-        variant=new_data['variant'],
-        mileage=new_data['mileage'],
-        g_map_location=new_data['g_map_location'],
-        vehicle_type='car',
-        featured_as=new_data['featured_as'],
-        user_id=new_data['user_id'],
-        brand_id=new_data['brand_id'],
-        location_id=new_data['location_id'],
-        community_id=new_data['community_id'],
-        featured_image=file_name,
-        created_by=g.current_user['email']
-    )
-    db.session.add(listing_data)
-    db.session.commit()
-
-    images = request.files.getlist('images')
-    for image in images:
-        if image and allowed_file(image.filename):
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            images_data = ListingImage(image=filename, listing_id=listing_data.id, created_by=g.current_user['email'])
-            db.session.add(images_data)
-            db.session.commit()
-
-    safety_features = new_data['safety_features'].split(',')
-    for features in safety_features:
-        features_data = SafetyFeatures(name=features, listing_id=listing_data.id)
-        db.session.add(features_data)
-        db.session.commit()
+        image_jobs.append(ImageJob.stage(file, featured=True))
 
-    amenities = new_data['amenities'].split(',')
-    for amenity in amenities:
-        amenity_data = ListingAmenities(name=amenity, listing_id=listing_data.id)
-        db.session.add(amenity_data)
-        db.session.commit()
+    images = [image for image in request.files.getlist('images') if image and allowed_file(image.filename)]
+    image_jobs.extend(ImageJob.stage(image) for image in images)
 
-    car_data = Cars(
-        listing_id=listing_data.id,
-        fuel_type=new_data['fuel_type'],
-        exterior_color=new_data['exterior_color'],
-        interior_color=new_data['interior_color'],
-        warranty=new_data['warranty'],
-        doors=new_data['doors'],
-        no_of_cylinders=new_data['no_of_cylinders'],
-        transmission_type=new_data['transmission_type'],
-        body_type=new_data['body_type'],
-        seating_capacity=new_data['seating_capacity'],
-        horse_power=new_data['horse_power'],
-        engine_capacity=new_data['engine_capacity'],
-        steering_hand=new_data['steering_hand'],
-        trim=new_data['trim'],
-        insured_uae=new_data['insured_uae'],
-        regional_spec=new_data['regional_spec'],
-        created_by=g.current_user['email']
-    )
-    db.session.add(car_data)
-    db.session.commit()
+    listing_data = create_listing(vehicle_type, new_data, image_jobs, g.current_user['email'])
 
-    new_added_data = listing_schema.dump(listing_data)
-    return jsonify({'message': 'Car successfully listed!', 'new_data': new_added_data}), 200
+    new_added_data = dump_listing(listing_data)
+    return jsonify({'message': f"{vehicle['label']} successfully listed!", 'new_data': new_added_data}), 200
 
 
-# Single Car View
-@views.route('/client/single-car-view/<int:id>', methods=['GET'])
-def single_car_view(id):
-    data = Listings.query.filter_by(id=id, vehicle_type='car').first()
+# Single Vehicle Listing View
+@views.route('/client/listings/<vehicle>/<int:id>', methods=['GET'])
+@vehicle_type_required
+def single_listing_view(id, vehicle_type):
+    data = listing_query(vehicle_type, id=id).first()
     if data is None:
-        return jsonify({'message': 'Car not found.'}), 400
-    result = listing_schema.dump(data)
+        return jsonify({'message': f"{VEHICLE_TYPES[vehicle_type]['label']} not found."}), 400
+    result = dump_listing(data)
 
     return jsonify({
         "data": result,
     }), 200
 
 
-# Single Car Update Information
-@views.route('/client/single-car-view/update-information/<int:id>', methods=['PUT'])
+# Single Vehicle Listing Update Information
+@views.route('/client/listings/<vehicle>/<int:id>/update-information', methods=['PUT'])
 @jwt_required()
 @current_user_required
-def update_car(id):
+@vehicle_type_required
+def update_listing(id, vehicle_type):
+    vehicle = VEHICLE_TYPES[vehicle_type]
     new_data = request.get_json()
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            title = f"{new_data['model']} {new_data['model_year']}"
-            slug = slugify(title)
-            listing_data.title = title
-            listing_data.slug = slug
-            listing_data.price = new_data['price']
-            listing_data.g_map_location = new_data['g_map_location']
-            listing_data.description = new_data['description']
-            listing_data.model = new_data['model']
-            listing_data.model_year = new_data['model_year']
-            listing_data.variant = new_data['variant']
-            listing_data.mileage = new_data['mileage']
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
 
-            car_data = Cars.query.filter_by(listing_id=listing_data.id).first()
-            car_data.fuel_type = new_data['fuel_type']
-            car_data.exterior_color = new_data['exterior_color']
-            car_data.interior_color = new_data['interior_color']
-            car_data.warranty = new_data['warranty']
-            car_data.doors = new_data['doors']
-            car_data.no_of_cylinders = new_data['no_of_cylinders']
-            car_data.transmission_type = new_data['transmission_type']
-            car_data.body_type = new_data['body_type']
-            car_data.seating_capacity = new_data['seating_capacity']
-            car_data.horse_power = new_data['horse_power']
-            car_data.engine_capacity = new_data['engine_capacity']
-            car_data.steering_hand = new_data['steering_hand']
-            car_data.trim = new_data['trim']
-            car_data.insured_uae = new_data['insured_uae']
-            car_data.regional_spec = new_data['regional_spec']
-            car_data.updated_by = g.current_user['email']
-            car_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
+    title = f"{new_data['model']} {new_data['model_year']}"
+    listing_data.title = title
+    listing_data.slug = slugify(title)
+    for field in LISTING_FIELDS:
+        setattr(listing_data, field, new_data[field])
+    listing_data.updated_by = g.current_user['email']
+    listing_data.updated_date = datetime.now()
+
+    detail_data = vehicle['model'].query.filter_by(listing_id=listing_data.id).first()
+    for field in vehicle['fields']:
+        setattr(detail_data, field, new_data[field])
+    detail_data.updated_by = g.current_user['email']
+    detail_data.updated_date = datetime.now()
+    db.session.commit()
 
-    updated_data = listing_schema.dump(listing_data)
+    updated_data = dump_listing(listing_data)
     return jsonify({'message': f'Listing updated successfully!', 'updated_data': updated_data}), 200
 
 
-# Car update featured image
-@views.route('/client/single-car-view/update-featured-image/<int:id>', methods=['PUT'])
+# Vehicle Listing update featured image
+@views.route('/client/listings/<vehicle>/<int:id>/update-featured-image', methods=['PUT'])
 @jwt_required()
 @current_user_required
-def update_car_featured_img(id):
+@vehicle_type_required
+def update_listing_featured_img(id, vehicle_type):
     image = request.files.get('featured_image')
     if not image:
         return jsonify({'message': 'No image file provided'}), 400
@@ -1495,1973 +1305,274 @@ def update_car_featured_img(id):
     if not allowed_file(image.filename):
         return jsonify({'message': 'Invalid image file format'}), 400
 
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            listing_data.featured_image = filename
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
 
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Listing Featured Image updated successfully!', 'updated_data': updated_data}), 200
+    # The listing keeps its current featured image until the pipeline has stored the new one and swaps it in
+    image_job = ImageJob.stage(image, replaces_featured=True)
 
+    listing_data.image_status = IMAGE_PROCESSING
+    listing_data.updated_by = g.current_user['email']
+    listing_data.updated_date = datetime.now()
+    db.session.commit()
 
-# Car Add Images
-@views.route('/client/single-car-view/add-images/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def car_add_images(id):
-    images = request.files.getlist('images')
-    if not images:
-        return jsonify({'message': 'No image files provided'}), 400
-
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            for image in images:
-                if image and allowed_file(image.filename):
-                    resized_img = resize_image(image, max_size_kb=1024)
-                    filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    resized_img.save(filepath, format='JPEG')
-
-                    new_data = ListingImage(image=filename, listing_id=listing_data.id,
-                                            created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Images successfully added!', 'updated_data': updated_data}), 200
-
-
-# Delete Car Images
-@views.route('/client/single-car-view/delete-images/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_car_images(id):
-    image_ids = request.get_json().get('image_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            for image_id in image_ids:
-                image = ListingImage.query.get(image_id)
-                if image:
-                    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                    if os.path.exists(image_path):
-                        os.remove(image_path)
-                db.session.delete(image)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Car Add Safety Features
-@views.route('/client/single-car-view/add-safety-features/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def car_add_safety_features(id):
-    features = request.get_json().get('features')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            for feature in features:
-                existing_feature = SafetyFeatures.query.filter_by(name=feature.lower(), listing_id=id).first()
-                if existing_feature:
-                    pass
-                else:
-                    new_data = SafetyFeatures(name=feature, listing_id=listing_data.id,
-                                              created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Safety Features added successfully!', 'updated_data': updated_data}), 200
-
-
-# Delete Car Safety Features
-@views.route('/client/single-car-view/delete-safety-features/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_car_safety_features(id):
-    feature_ids = request.get_json().get('feature_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            for feature_id in feature_ids:
-                feature = SafetyFeatures.query.get(feature_id)
-                db.session.delete(feature)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Car Add Amenities
-@views.route('/client/single-car-view/add-amenities/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def car_add_amenities(id):
-    amenities = request.get_json().get('amenities')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            for amenity in amenities:
-                existing_data = ListingAmenities.query.filter_by(name=amenity.lower(), listing_id=id).first()
-                if existing_data:
-                    pass
-                else:
-                    new_data = ListingAmenities(name=amenity, listing_id=listing_data.id,
-                                                created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Amenities added successfully!', 'updated_data': updated_data}), 200
-
-
-# Delete Car Amenities
-@views.route('/client/single-car-view/delete-amenities/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_car_amenities(id):
-    amenity_ids = request.get_json().get('amenity_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            for amenity_id in amenity_ids:
-                amenity = ListingAmenities.query.get(amenity_id)
-                db.session.delete(amenity)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Delete Car Listing
-@views.route('/client/single-car-view/delete-listing/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_car_listing(id):
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='car').first()
-        if listing_data:
-            listing = Listings.query.get(id)
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            for image in listing_data.listing_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            db.session.delete(listing)
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-############## END OF CAR LISTING ENDPOINT ###############
-
-############## MOTORCYCLE LISTING ENDPOINT ###################
-
-# All Motorcycle View
-@views.route('/client/all-motorcycle-view', methods=['GET'])
-def all_motorcycle_view():
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
-    startPrice = request.args.get('startPrice', '', type=str)
-    endPrice = request.args.get('endPrice', '', type=str)
-    startModelYear = request.args.get('startModelYear', '', type=str)
-    endModelYear = request.args.get('endModelYear', '', type=str)
-    startMileage = request.args.get('startMileage', '', type=str)
-    endMileage = request.args.get('endMileage', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='motorcycle', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
-
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand_conditions = Listings.brand_id.ilike(f"%{brand}")
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
-
-        data = data.filter(and_(*filter_conditions))
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# AUTH All Motor View
-@views.route('/client/auth-all-motorcylce-view', methods=['GET'])
-@jwt_required()
-@current_user_required
-def auth_all_motorcycle_view():
-    user_id = g.current_user['id']
-    user_favorite_ids = [fav.listing_id for fav in Favorites.query.filter_by(user_id=user_id).all()]
-
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
-    startPrice = request.args.get('startPrice', '', type=str)
-    endPrice = request.args.get('endPrice', '', type=str)
-    startModelYear = request.args.get('startModelYear', '', type=str)
-    endModelYear = request.args.get('endModelYear', '', type=str)
-    startMileage = request.args.get('startMileage', '', type=str)
-    endMileage = request.args.get('endMileage', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='motorcycle', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
-
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand = int(brand)
-            brand_conditions = Listings.brand_id == brand
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
-
-        data = data.filter(and_(*filter_conditions))
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = []
-    for listing in data_paginated:
-        listing_dict = listing_schema.dump(listing)
-        listing_dict['is_favorite'] = int(listing.id in user_favorite_ids)
-        result.append(listing_dict)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# User Motorcycle View
-@views.route('/client/user-motorcycle-view/<int:id>', methods=['GET'])
-def user_motorcycle_view(id):
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='motorcycle', user_id=id)
-
-    user = User.query.get(id)
-    if not user:
-        return jsonify({
-            "message": 'User not found',
-        }), 400
-
-    if search:
-        search_words = search.split(',')
-
-        def search_filter(word):
-            word = word.strip()
-            return or_(
-                Listings.title.ilike(f"%{word}%"),
-            )
-
-        filter_conditions = [search_filter(word) for word in search_words]
-        data = data.filter(*filter_conditions)
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# Motorcycle Create
-@views.route('/client/motorcycle-create', methods=['POST'])
-@jwt_required()
-@current_user_required
-def motorcycle_create():
-    new_data = request.form
-    user = User.query.get(g.current_user['id'])
-    featured_as = new_data.get('featured_as', '').lower()
-    if featured_as == 'standard':
-        if user.count_standard_listings >= user.standard_listing:
-            return jsonify({'message': f'Limit Standard Listing is {user.standard_listing}'}), 400
-    elif featured_as == 'featured':
-        if user.count_featured_listings >= user.featured_listing:
-            return jsonify({'message': f'Limit Featured Listing is {user.featured_listing}'}), 400
-    elif featured_as == 'premium':
-        if user.count_premium_listings >= user.premium_listing:
-            return jsonify({'message': f'Limit Premium Listing is {user.premium_listing}'}), 400
-    else:
-        return jsonify({'message': f'No Featured As'}), 400
-
-    file_name = None
-    file = request.files.get('featured_image')
-
-    if file and allowed_file(file.filename):
-        resize_file = resize_image(file, max_size_kb=1024)
-        filename = secure_filename(file.filename)
-        file_name = str(uuid.uuid1()) + '_' + filename
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file_name)
-        resize_file.save(filepath, format='JPEG')
-
-    title = f"{new_data['model']} {new_data['model_year']}"
-    slug = slugify(title)
-
-    listing_data = Listings(
-        vin=new_data['vin'],
-        title=title,
-        slug=slug,
-        price=new_data['price'],
-        description=new_data['description'],
-        model=new_data['model'],
-        model_year=new_data['model_year'],
-        g_map_location=new_data['g_map_location'],
-        variant=new_data['variant'],
-        mileage=new_data['mileage'],
-        vehicle_type='motorcycle',
-        featured_as=new_data['featured_as'],
-        user_id=new_data['user_id'],
-        brand_id=new_data['brand_id'],
-        location_id=new_data['location_id'],
-        community_id=new_data['community_id'],
-        featured_image=file_name,
-        created_by=g.current_user['email']
-    )
-    db.session.add(listing_data)
-    db.session.commit()
-
-    images = request.files.getlist('images')
-    for image in images:
-        if image and allowed_file(image.filename):
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            images_data = ListingImage(image=filename, listing_id=listing_data.id, created_by=g.current_user['email'])
-            db.session.add(images_data)
-            db.session.commit()
-
-    safety_features = new_data['safety_features'].split(',')
-    for features in safety_features:
-        features_data = SafetyFeatures(name=features, listing_id=listing_data.id)
-        db.session.add(features_data)
-        db.session.commit()
-
-    amenities = new_data['amenities'].split(',')
-    for amenity in amenities:
-        amenity_data = ListingAmenities(name=amenity, listing_id=listing_data.id)
-        db.session.add(amenity_data)
-        db.session.commit()
-
-    motorcycle_data = Motorcycle(
-        listing_id=listing_data.id,
-        type=new_data['type'],
-        usage=new_data['usage'],
-        warranty=new_data['warranty'],
-        wheels=new_data['wheels'],
-        seller_type=new_data['seller_type'],
-        final_drive_system=new_data['final_drive_system'],
-        engine_size=new_data['engine_size'],
-        created_by=g.current_user['email']
-    )
-    db.session.add(motorcycle_data)
-    db.session.commit()
-
-    new_added_data = listing_schema.dump(listing_data)
-    return jsonify({'message': 'Motorcycle successfully listed!', 'new_data': new_added_data}), 200
-
-
-# Single Motorcycle View
-@views.route('/client/single-motorcycle-view/<int:id>', methods=['GET'])
-def single_motorcycle_view(id):
-    data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-    if data is None:
-        return jsonify({'message': 'Motorcycle not found.'}), 400
-    result = listing_schema.dump(data)
-
-    return jsonify({
-        "data": result,
-    }), 200
-
-
-# Single Motorcycle Update Information
-@views.route('/client/single-motorcycle-view/update-information/<int:id>', methods=['PUT'])
-@jwt_required()
-@current_user_required
-def update_motorcycle(id):
-    new_data = request.get_json()
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            title = f"{new_data['model']} {new_data['model_year']}"
-            slug = slugify(title)
-            listing_data.title = title
-            listing_data.slug = slug
-            listing_data.price = new_data['price']
-            listing_data.g_map_location = new_data['g_map_location']
-            listing_data.description = new_data['description']
-            listing_data.model = new_data['model']
-            listing_data.model_year = new_data['model_year']
-            listing_data.variant = new_data['variant']
-            listing_data.mileage = new_data['mileage']
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
-
-            motorcycle_data = Motorcycle.query.filter_by(listing_id=listing_data.id).first()
-            motorcycle_data.type = new_data['type']
-            motorcycle_data.usage = new_data['usage']
-            motorcycle_data.warranty = new_data['warranty']
-            motorcycle_data.wheels = new_data['wheels']
-            motorcycle_data.seller_type = new_data['seller_type']
-            motorcycle_data.final_drive_system = new_data['final_drive_system']
-            motorcycle_data.engine_size = new_data['engine_size']
-            motorcycle_data.updated_by = g.current_user['email']
-            motorcycle_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Listing updated successfully!', 'updated_data': updated_data}), 200
-
-
-# Motorcycle update featured image
-@views.route('/client/single-motorcycle-view/update-featured-image/<int:id>', methods=['PUT'])
-@jwt_required()
-@current_user_required
-def update_motorcycle_featured_img(id):
-    image = request.files.get('featured_image')
-    if not image:
-        return jsonify({'message': 'No image file provided'}), 400
-
-    if not allowed_file(image.filename):
-        return jsonify({'message': 'Invalid image file format'}), 400
-
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            listing_data.featured_image = filename
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Listing Featured Image updated successfully!', 'updated_data': updated_data}), 200
-
-
-# Motorcycle Add Images
-@views.route('/client/single-motorcycle-view/add-images/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def motorcycle_add_images(id):
-    images = request.files.getlist('images')
-    if not images:
-        return jsonify({'message': 'No image files provided'}), 400
-
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            for image in images:
-                if image and allowed_file(image.filename):
-                    resized_img = resize_image(image, max_size_kb=1024)
-                    filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    resized_img.save(filepath, format='JPEG')
-
-                    new_data = ListingImage(image=filename, listing_id=listing_data.id,
-                                            created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Images successfully added!', 'updated_data': updated_data}), 200
-
-
-# Delete Motor Images
-@views.route('/client/single-motorcycle-view/delete-images/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_motor_images(id):
-    image_ids = request.get_json().get('image_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            for image_id in image_ids:
-                image = ListingImage.query.get(image_id)
-                if image:
-                    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                    if os.path.exists(image_path):
-                        os.remove(image_path)
-                db.session.delete(image)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Motorcycle Add Safety Features
-@views.route('/client/single-motorcycle-view/add-safety-features/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def motorcycle_add_safety_features(id):
-    features = request.get_json().get('features')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            for feature in features:
-                existing_feature = SafetyFeatures.query.filter_by(name=feature.lower(), listing_id=id).first()
-                if existing_feature:
-                    pass
-                else:
-                    new_data = SafetyFeatures(name=feature, listing_id=listing_data.id,
-                                              created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Safety Features added successfully!', 'updated_data': updated_data}), 200
-
-
-# Delete Motorcycle Safety Features
-@views.route('/client/single-motorcycle-view/delete-safety-features/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_motorcycle_safety_features(id):
-    feature_ids = request.get_json().get('feature_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            for feature_id in feature_ids:
-                feature = SafetyFeatures.query.get(feature_id)
-                db.session.delete(feature)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Motorcycle Add Amenities
-@views.route('/client/single-motorcycle-view/add-amenities/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def motorcycle_add_amenities(id):
-    amenities = request.get_json().get('amenities')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            for amenity in amenities:
-                existing_data = ListingAmenities.query.filter_by(name=amenity.lower(), listing_id=id).first()
-                if existing_data:
-                    pass
-                else:
-                    new_data = ListingAmenities(name=amenity, listing_id=listing_data.id,
-                                                created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Amenities added successfully!', 'updated_data': updated_data}), 200
-
-
-# Delete Motor Amenities
-@views.route('/client/single-motorcycle-view/delete-amenities/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_motorcycle_amenities(id):
-    amenity_ids = request.get_json().get('amenity_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            for amenity_id in amenity_ids:
-                amenity = ListingAmenities.query.get(amenity_id)
-                db.session.delete(amenity)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Delete Motorcycle Listing
-@views.route('/client/single-motorcycle-view/delete-listing/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_motorcycle_listing(id):
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='motorcycle').first()
-        if listing_data:
-            listing = Listings.query.get(id)
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            for image in listing_data.listing_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            db.session.delete(listing)
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-########## END OF MOTORCYCLE LISTING ENDPOINT ###########
-
-########### BOAT LISTING ENDPOINT ################
-
-# All Boat View
-@views.route('/client/all-boat-view', methods=['GET'])
-def all_boat_view():
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
-    startPrice = request.args.get('startPrice', '', type=str)
-    endPrice = request.args.get('endPrice', '', type=str)
-    startModelYear = request.args.get('startModelYear', '', type=str)
-    endModelYear = request.args.get('endModelYear', '', type=str)
-    startMileage = request.args.get('startMileage', '', type=str)
-    endMileage = request.args.get('endMileage', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='boat', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
-
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand_conditions = Listings.brand_id.ilike(f"%{brand}")
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
-
-        data = data.filter(and_(*filter_conditions))
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# AUTH All Boat View
-@views.route('/client/auth-all-boat-view', methods=['GET'])
-@jwt_required()
-@current_user_required
-def auth_all_boat_view():
-    user_id = g.current_user['id']
-    user_favorite_ids = [fav.listing_id for fav in Favorites.query.filter_by(user_id=user_id).all()]
-
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
-    startPrice = request.args.get('startPrice', '', type=str)
-    endPrice = request.args.get('endPrice', '', type=str)
-    startModelYear = request.args.get('startModelYear', '', type=str)
-    endModelYear = request.args.get('endModelYear', '', type=str)
-    startMileage = request.args.get('startMileage', '', type=str)
-    endMileage = request.args.get('endMileage', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='boat', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
-
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand = int(brand)
-            brand_conditions = Listings.brand_id == brand
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
-
-        data = data.filter(and_(*filter_conditions))
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = []
-    for listing in data_paginated:
-        listing_dict = listing_schema.dump(listing)
-        listing_dict['is_favorite'] = int(listing.id in user_favorite_ids)
-        result.append(listing_dict)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# User Boat View
-@views.route('/client/user-boat-view/<int:id>', methods=['GET'])
-def user_boat_view(id):
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='boat', user_id=id)
-
-    user = User.query.get(id)
-    if not user:
-        return jsonify({
-            "message": 'User not found',
-        }), 400
-
-    if search:
-        search_words = search.split(',')
-
-        def search_filter(word):
-            word = word.strip()
-            return or_(
-                Listings.title.ilike(f"%{word}%"),
-            )
-
-        filter_conditions = [search_filter(word) for word in search_words]
-        data = data.filter(*filter_conditions)
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# Boat Create
-@views.route('/client/boat-create', methods=['POST'])
-@jwt_required()
-@current_user_required
-def boat_create():
-    new_data = request.form
-    user = User.query.get(g.current_user['id'])
-    featured_as = new_data.get('featured_as', '').lower()
-    if featured_as == 'standard':
-        if user.count_standard_listings >= user.standard_listing:
-            return jsonify({'message': f'Limit Standard Listing is {user.standard_listing}'}), 400
-    elif featured_as == 'featured':
-        if user.count_featured_listings >= user.featured_listing:
-            return jsonify({'message': f'Limit Featured Listing is {user.featured_listing}'}), 400
-    elif featured_as == 'premium':
-        if user.count_premium_listings >= user.premium_listing:
-            return jsonify({'message': f'Limit Premium Listing is {user.premium_listing}'}), 400
-    else:
-        return jsonify({'message': f'No Featured As'}), 400
-
-    file_name = None
-    file = request.files.get('featured_image')
-
-    if file and allowed_file(file.filename):
-        resize_file = resize_image(file, max_size_kb=1024)
-        filename = secure_filename(file.filename)
-        file_name = str(uuid.uuid1()) + '_' + filename
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file_name)
-        resize_file.save(filepath, format='JPEG')
-
-    title = f"{new_data['model']} {new_data['model_year']}"
-    slug = slugify(title)
-
-    listing_data = Listings(
-        vin=new_data['vin'],
-        title=title,
-        slug=slug,
-        price=new_data['price'],
-        description=new_data['description'],
-        g_map_location=new_data['g_map_location'],
-        model=new_data['model'],
-        model_year=new_data['model_year'],
-        variant=new_data['variant'],
-        mileage=new_data['mileage'],
-        vehicle_type='boat',
-        featured_as=new_data['featured_as'],
-        user_id=new_data['user_id'],
-        brand_id=new_data['brand_id'],
-        location_id=new_data['location_id'],
-        community_id=new_data['community_id'],
-        featured_image=file_name,
-        created_by=g.current_user['email']
-    )
-    db.session.add(listing_data)
-    db.session.commit()
-
-    images = request.files.getlist('images')
-    for image in images:
-        if image and allowed_file(image.filename):
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            images_data = ListingImage(image=filename, listing_id=listing_data.id, created_by=g.current_user['email'])
-            db.session.add(images_data)
-            db.session.commit()
-
-    safety_features = new_data['safety_features'].split(',')
-    for features in safety_features:
-        features_data = SafetyFeatures(name=features, listing_id=listing_data.id)
-        db.session.add(features_data)
-        db.session.commit()
-
-    amenities = new_data['amenities'].split(',')
-    for amenity in amenities:
-        amenity_data = ListingAmenities(name=amenity, listing_id=listing_data.id)
-        db.session.add(amenity_data)
-        db.session.commit()
-
-    boat_data = Boats(
-        listing_id=listing_data.id,
-        type_1=new_data['type_1'],
-        type_2=new_data['type_2'],
-        usage=new_data['usage'],
-        warranty=new_data['warranty'],
-        age=new_data['age'],
-        seller_type=new_data['seller_type'],
-        length=new_data['length'],
-        condition=new_data['condition'],
-        created_by=g.current_user['email']
-    )
-    db.session.add(boat_data)
-    db.session.commit()
-
-    new_added_data = listing_schema.dump(listing_data)
-    return jsonify({'message': 'Boat successfully listed!', 'new_data': new_added_data}), 200
-
-
-# Single Boat Update Information
-@views.route('/client/single-boat-view/update-information/<int:id>', methods=['PUT'])
-@jwt_required()
-@current_user_required
-def update_boat(id):
-    new_data = request.get_json()
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            title = f"{new_data['model']} {new_data['model_year']}"
-            slug = slugify(title)
-            listing_data.title = title
-            listing_data.slug = slug
-            listing_data.price = new_data['price']
-            listing_data.description = new_data['description']
-            listing_data.g_map_location = new_data['g_map_location']
-            listing_data.model = new_data['model']
-            listing_data.model_year = new_data['model_year']
-            listing_data.variant = new_data['variant']
-            listing_data.mileage = new_data['mileage']
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
-
-            boat_data = Boats.query.filter_by(listing_id=listing_data.id).first()
-            boat_data.type_1 = new_data['type_1']
-            boat_data.type_2 = new_data['type_2']
-            boat_data.usage = new_data['usage']
-            boat_data.warranty = new_data['warranty']
-            boat_data.age = new_data['age']
-            boat_data.seller_type = new_data['seller_type']
-            boat_data.length = new_data['length']
-            boat_data.condition = new_data['condition']
-            boat_data.updated_by = g.current_user['email']
-            boat_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Listing updated successfully!', 'updated_data': updated_data}), 200
-
-
-# Single Boat View
-@views.route('/client/single-boat-view/<int:id>', methods=['GET'])
-def single_boat_view(id):
-    data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-    if data is None:
-        return jsonify({'message': 'Boat not found.'}), 400
-    result = listing_schema.dump(data)
-
-    return jsonify({
-        "data": result,
-    }), 200
-
-
-# Boat update featured image
-@views.route('/client/single-boat-view/update-featured-image/<int:id>', methods=['PUT'])
-@jwt_required()
-@current_user_required
-def update_boat_featured_img(id):
-    image = request.files.get('featured_image')
-    if not image:
-        return jsonify({'message': 'No image file provided'}), 400
-
-    if not allowed_file(image.filename):
-        return jsonify({'message': 'Invalid image file format'}), 400
-
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            listing_data.featured_image = filename
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Listing Featured Image updated successfully!', 'updated_data': updated_data}), 200
-
-
-# Boat Add Images
-@views.route('/client/single-boat-view/add-images/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def boat_add_images(id):
-    images = request.files.getlist('images')
-    if not images:
-        return jsonify({'message': 'No image files provided'}), 400
-
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            for image in images:
-                if image and allowed_file(image.filename):
-                    resized_img = resize_image(image, max_size_kb=1024)
-                    filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    resized_img.save(filepath, format='JPEG')
-
-                    new_data = ListingImage(image=filename, listing_id=listing_data.id,
-                                            created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Images successfully added!', 'updated_data': updated_data}), 200
-
-
-# Delete Boat Images
-@views.route('/client/single-boat-view/delete-images/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_boat_images(id):
-    image_ids = request.get_json().get('image_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            for image_id in image_ids:
-                image = ListingImage.query.get(image_id)
-                if image:
-                    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                    if os.path.exists(image_path):
-                        os.remove(image_path)
-                db.session.delete(image)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Boat Add Safety Features
-@views.route('/client/single-boat-view/add-safety-features/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def boat_add_safety_features(id):
-    features = request.get_json().get('features')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            for feature in features:
-                existing_feature = SafetyFeatures.query.filter_by(name=feature.lower(), listing_id=id).first()
-                if existing_feature:
-                    pass
-                else:
-                    new_data = SafetyFeatures(name=feature, listing_id=listing_data.id,
-                                              created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Safety Features added successfully!', 'updated_data': updated_data}), 200
-
-
-# Delete Boat Safety Features
-@views.route('/client/single-boat-view/delete-safety-features/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_boat_safety_features(id):
-    feature_ids = request.get_json().get('feature_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            for feature_id in feature_ids:
-                feature = SafetyFeatures.query.get(feature_id)
-                db.session.delete(feature)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Boat Add Amenities
-@views.route('/client/single-boat-view/add-amenities/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def boat_add_amenities(id):
-    amenities = request.get_json().get('amenities')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            for amenity in amenities:
-                existing_data = ListingAmenities.query.filter_by(name=amenity.lower(), listing_id=id).first()
-                if existing_data:
-                    pass
-                else:
-                    new_data = ListingAmenities(name=amenity, listing_id=listing_data.id,
-                                                created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Amenities added successfully!', 'updated_data': updated_data}), 200
-
-
-# Delete Boat Amenities
-@views.route('/client/single-boat-view/delete-amenities/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_boat_amenities(id):
-    amenity_ids = request.get_json().get('amenity_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            for amenity_id in amenity_ids:
-                amenity = ListingAmenities.query.get(amenity_id)
-                db.session.delete(amenity)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-# Delete Boat Listing
-@views.route('/client/single-boat-view/delete-listing/<int:id>', methods=['DELETE'])
-@jwt_required()
-@current_user_required
-def delete_boat_listing(id):
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='boat').first()
-        if listing_data:
-            listing = Listings.query.get(id)
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            for image in listing_data.listing_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            db.session.delete(listing)
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
-
-
-############## END OF BOAT LISTING ENDPOINT ###############
-
-################# HEAVY VEHICLE LISTING ENDPOINT ###############
-
-# All Heavy Vehicle View
-@views.route('/client/all-heavy-vehicle-view', methods=['GET'])
-def all_heavy_vehicle_view():
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
-    startPrice = request.args.get('startPrice', '', type=str)
-    endPrice = request.args.get('endPrice', '', type=str)
-    startModelYear = request.args.get('startModelYear', '', type=str)
-    endModelYear = request.args.get('endModelYear', '', type=str)
-    startMileage = request.args.get('startMileage', '', type=str)
-    endMileage = request.args.get('endMileage', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='heavy vehicle', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
-
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand_conditions = Listings.brand_id.ilike(f"%{brand}")
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
-
-        data = data.filter(and_(*filter_conditions))
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# AUTH All HV View
-@views.route('/client/auth-all-heavy-vehicle-view', methods=['GET'])
-@jwt_required()
-@current_user_required
-def auth_all_heavy_view():
-    user_id = g.current_user['id']
-    user_favorite_ids = [fav.listing_id for fav in Favorites.query.filter_by(user_id=user_id).all()]
-
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
-
-    search = request.args.get('search', '', type=str)
-    brand = request.args.get('brand', type=str)
-    startPrice = request.args.get('startPrice', '', type=str)
-    endPrice = request.args.get('endPrice', '', type=str)
-    startModelYear = request.args.get('startModelYear', '', type=str)
-    endModelYear = request.args.get('endModelYear', '', type=str)
-    startMileage = request.args.get('startMileage', '', type=str)
-    endMileage = request.args.get('endMileage', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='heavy vehicle', publish_status=1)
-
-    if search or brand or (startPrice and endPrice) or (startMileage and endMileage) or (
-            startModelYear and endModelYear):
-        filter_conditions = []
-
-        if search:
-            search_conditions = Listings.title.ilike(f"%{search}%")
-            filter_conditions.append(search_conditions)
-        if brand:
-            brand = int(brand)
-            brand_conditions = Listings.brand_id == brand
-            filter_conditions.append(brand_conditions)
-        if startPrice and endPrice:
-            price_condition = Listings.price.between(startPrice, endPrice)
-            filter_conditions.append(price_condition)
-        if startMileage and endMileage:
-            mileage_condition = Listings.mileage.between(startMileage, endMileage)
-            filter_conditions.append(mileage_condition)
-        if startModelYear and endModelYear:
-            modelYear_condition = Listings.model_year.between(startModelYear, endModelYear)
-            filter_conditions.append(modelYear_condition)
-
-        data = data.filter(and_(*filter_conditions))
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = []
-    for listing in data_paginated:
-        listing_dict = listing_schema.dump(listing)
-        listing_dict['is_favorite'] = int(listing.id in user_favorite_ids)
-        result.append(listing_dict)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
-
-
-# User Heavy Vehicle View
-@views.route('/client/user-heavy-vehicle-view/<int:id>', methods=['GET'])
-def user_heavy_vehicle_view(id):
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('page_size', 10, type=int)
+    image_pipeline.submit(listing_data.id, [image_job])
 
-    search = request.args.get('search', '', type=str)
-
-    data = Listings.query.filter_by(vehicle_type='heavy vehicle', user_id=id)
-
-    user = User.query.get(id)
-    if not user:
-        return jsonify({
-            "message": 'User not found',
-        }), 400
-
-    if search:
-        search_words = search.split(',')
-
-        def search_filter(word):
-            word = word.strip()
-            return or_(
-                Listings.title.ilike(f"%{word}%"),
-            )
-
-        filter_conditions = [search_filter(word) for word in search_words]
-        data = data.filter(*filter_conditions)
-
-    # Modify the ordering part of the query
-    data = data.order_by(
-        -(Listings.featured_as == 'premium'),  # Premium listings come first
-        -(Listings.featured_as == 'featured'),  # Then featured listings
-        desc(Listings.id)  # Secondary ordering by id in descending order
-    )
-
-    data_paginated = data.limit(page_size).offset((page - 1) * page_size).all()
-
-    result = listings_schema.dump(data_paginated)
-
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
+    updated_data = dump_listing(listing_data)
+    return jsonify({'message': f'Listing Featured Image updated successfully!', 'updated_data': updated_data}), 200
 
 
-# Heavy Vehicle Create
-@views.route('/client/heavy-vehicle-create', methods=['POST'])
+# Vehicle Listing Add Images
+@views.route('/client/listings/<vehicle>/<int:id>/add-images', methods=['POST'])
 @jwt_required()
 @current_user_required
-def heavy_vehicle_create():
-    new_data = request.form
-    user = User.query.get(g.current_user['id'])
-    featured_as = new_data.get('featured_as', '').lower()
-    if featured_as == 'standard':
-        if user.count_standard_listings >= user.standard_listing:
-            return jsonify({'message': f'Limit Standard Listing is {user.standard_listing}'}), 400
-    elif featured_as == 'featured':
-        if user.count_featured_listings >= user.featured_listing:
-            return jsonify({'message': f'Limit Featured Listing is {user.featured_listing}'}), 400
-    elif featured_as == 'premium':
-        if user.count_premium_listings >= user.premium_listing:
-            return jsonify({'message': f'Limit Premium Listing is {user.premium_listing}'}), 400
-    else:
-        return jsonify({'message': f'No Featured As'}), 400
+@vehicle_type_required
+def listing_add_images(id, vehicle_type):
+    images = request.files.getlist('images')
+    if not images:
+        return jsonify({'message': 'No image files provided'}), 400
 
-    file_name = None
-    file = request.files.get('featured_image')
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
+
+    image_jobs = [ImageJob.stage(image) for image in images if image and allowed_file(image.filename)]
+    if image_jobs:
+        listing_data.image_status = IMAGE_PROCESSING
+        listing_data.updated_date = datetime.now()
+    # One INSERT for the whole batch and a single commit
+    insert_rows(ListingImage, [
+        {'image': image_job.filename, 'listing_id': listing_data.id, 'created_by': g.current_user['email']}
+        for image_job in image_jobs
+    ])
+    db.session.commit()
 
-    if file and allowed_file(file.filename):
-        resize_file = resize_image(file, max_size_kb=1024)
-        filename = secure_filename(file.filename)
-        file_name = str(uuid.uuid1()) + '_' + filename
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file_name)
-        resize_file.save(filepath, format='JPEG')
+    image_pipeline.submit(listing_data.id, image_jobs)
 
-    title = f"{new_data['model']} {new_data['model_year']}"
-    slug = slugify(title)
-
-    listing_data = Listings(
-        vin=new_data['vin'],
-        title=title,
-        slug=slug,
-        price=new_data['price'],
-        description=new_data['description'],
-        model=new_data['model'],
-        model_year=new_data['model_year'],
-        g_map_location=new_data['g_map_location'],
-        variant=new_data['variant'],
-        mileage=new_data['mileage'],
-        vehicle_type='heavy vehicle',
-        featured_as=new_data['featured_as'],
-        user_id=new_data['user_id'],
-        brand_id=new_data['brand_id'],
-        location_id=new_data['location_id'],
-        community_id=new_data['community_id'],
-        featured_image=file_name,
-        created_by=g.current_user['email']
-    )
-    db.session.add(listing_data)
-    db.session.commit()
+    updated_data = dump_listing(listing_data)
+    return jsonify({'message': f'Images successfully added!', 'updated_data': updated_data}), 200
 
-    images = request.files.getlist('images')
-    for image in images:
-        if image and allowed_file(image.filename):
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            images_data = ListingImage(image=filename, listing_id=listing_data.id, created_by=g.current_user['email'])
-            db.session.add(images_data)
-            db.session.commit()
 
-    safety_features = new_data['safety_features'].split(',')
-    for features in safety_features:
-        features_data = SafetyFeatures(name=features, listing_id=listing_data.id)
-        db.session.add(features_data)
-        db.session.commit()
+# Delete Vehicle Listing Images
+@views.route('/client/listings/<vehicle>/<int:id>/delete-images', methods=['DELETE'])
+@jwt_required()
+@current_user_required
+@vehicle_type_required
+def delete_listing_images(id, vehicle_type):
+    image_ids = request.get_json().get('image_ids') or []
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
 
-    amenities = new_data['amenities'].split(',')
-    for amenity in amenities:
-        amenity_data = ListingAmenities(name=amenity, listing_id=listing_data.id)
-        db.session.add(amenity_data)
+    # One SELECT and one DELETE for the whole batch, the files are removed in the background after the commit
+    images = db.session.query(ListingImage.id, ListingImage.image) \
+        .filter(ListingImage.listing_id == listing_data.id, ListingImage.id.in_(image_ids)) \
+        .all()
+    if images:
+        ListingImage.query.filter(ListingImage.id.in_([image_id for image_id, _ in images])) \
+            .delete(synchronize_session=False)
+        release_images([image for _, image in images])
         db.session.commit()
 
-    heavy_vehicle_data = HeavyVehicles(
-        listing_id=listing_data.id,
-        type_1=new_data['type_1'],
-        type_2=new_data['type_2'],
-        fuel_type=new_data['fuel_type'],
-        no_of_cylinders=new_data['no_of_cylinders'],
-        body_condition=new_data['body_condition'],
-        mechanical_condition=new_data['mechanical_condition'],
-        capacity_weight=new_data['capacity_weight'],
-        seller_type=new_data['seller_type'],
-        warranty=new_data['warranty'],
-        horse_power=new_data['horse_power'],
-        created_by=g.current_user['email']
-    )
-    db.session.add(heavy_vehicle_data)
-    db.session.commit()
-
-    new_added_data = listing_schema.dump(listing_data)
-    return jsonify({'message': 'Heavy Vehicle successfully listed!', 'new_data': new_added_data}), 200
+    return 'Success!', 200
 
 
-# Single Heavy Vehicle Update Information
-@views.route('/client/single-heavy-vehicle-view/update-information/<int:id>', methods=['PUT'])
+# Vehicle Listing Add Safety Features
+@views.route('/client/listings/<vehicle>/<int:id>/add-safety-features', methods=['POST'])
 @jwt_required()
 @current_user_required
-def update_heavy_vehicle(id):
-    new_data = request.get_json()
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            title = f"{new_data['model']} {new_data['model_year']}"
-            slug = slugify(title)
-            listing_data.title = title
-            listing_data.slug = slug
-            listing_data.price = new_data['price']
-            listing_data.g_map_location = new_data['g_map_location']
-            listing_data.description = new_data['description']
-            listing_data.model = new_data['model']
-            listing_data.model_year = new_data['model_year']
-            listing_data.variant = new_data['variant']
-            listing_data.mileage = new_data['mileage']
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
-
-            heavy_vehicle_data = HeavyVehicles.query.filter_by(listing_id=listing_data.id).first()
-            heavy_vehicle_data.type_1 = new_data['type_1']
-            heavy_vehicle_data.type_2 = new_data['type_2']
-            heavy_vehicle_data.fuel_type = new_data['fuel_type']
-            heavy_vehicle_data.no_of_cylinders = new_data['no_of_cylinders']
-            heavy_vehicle_data.body_condition = new_data['body_condition']
-            heavy_vehicle_data.mechanical_condition = new_data['mechanical_condition']
-            heavy_vehicle_data.capacity_weight = new_data['capacity_weight']
-            heavy_vehicle_data.seller_type = new_data['seller_type']
-            heavy_vehicle_data.warranty = new_data['warranty']
-            heavy_vehicle_data.horse_power = new_data['horse_power']
-            heavy_vehicle_data.updated_by = g.current_user['email']
-            heavy_vehicle_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Listing updated successfully!', 'updated_data': updated_data}), 200
-
+@vehicle_type_required
+def listing_add_safety_features(id, vehicle_type):
+    features = request.get_json().get('features')
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
 
-# Single Heavy Vehicle View
-@views.route('/client/single-heavy-vehicle-view/<int:id>', methods=['GET'])
-def single_heavy_vehicle_view(id):
-    data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-    if data is None:
-        return jsonify({'message': 'Heavy Vehicle not found.'}), 400
-    result = listing_schema.dump(data)
+    add_listing_names(SafetyFeatures, listing_data.id, features or [], g.current_user['email'])
+    db.session.commit()
 
-    return jsonify({
-        "data": result,
-    }), 200
+    updated_data = dump_listing(listing_data)
+    return jsonify({'message': f'Safety Features added successfully!', 'updated_data': updated_data}), 200
 
 
-# Heavy Vehicle update featured image
-@views.route('/client/single-heavy-vehicle-view/update-featured-image/<int:id>', methods=['PUT'])
+# Delete Vehicle Listing Safety Features
+@views.route('/client/listings/<vehicle>/<int:id>/delete-safety-features', methods=['DELETE'])
 @jwt_required()
 @current_user_required
-def update_heavy_vehicle_featured_img(id):
-    image = request.files.get('featured_image')
-    if not image:
-        return jsonify({'message': 'No image file provided'}), 400
-
-    if not allowed_file(image.filename):
-        return jsonify({'message': 'Invalid image file format'}), 400
+@vehicle_type_required
+def delete_listing_safety_features(id, vehicle_type):
+    feature_ids = request.get_json().get('feature_ids')
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
 
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-
-            resized_img = resize_image(image, max_size_kb=1024)
-            filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            resized_img.save(filepath, format='JPEG')
-
-            listing_data.featured_image = filename
-            listing_data.updated_by = g.current_user['email']
-            listing_data.updated_date = datetime.now()
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
+    delete_listing_names(SafetyFeatures, listing_data.id, feature_ids or [])
+    db.session.commit()
 
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Listing Featured Image updated successfully!', 'updated_data': updated_data}), 200
+    return 'Success!', 200
 
 
-# Heavy Vehicle Add Images
-@views.route('/client/single-heavy-vehicle-view/add-images/<int:id>', methods=['POST'])
+# Vehicle Listing Add Amenities
+@views.route('/client/listings/<vehicle>/<int:id>/add-amenities', methods=['POST'])
 @jwt_required()
 @current_user_required
-def heavy_vehicle_add_images(id):
-    images = request.files.getlist('images')
-    if not images:
-        return jsonify({'message': 'No image files provided'}), 400
-
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
+@vehicle_type_required
+def listing_add_amenities(id, vehicle_type):
+    amenities = request.get_json().get('amenities')
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
 
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            for image in images:
-                if image and allowed_file(image.filename):
-                    resized_img = resize_image(image, max_size_kb=1024)
-                    filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    resized_img.save(filepath, format='JPEG')
-
-                    new_data = ListingImage(image=filename, listing_id=listing_data.id,
-                                            created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
+    add_listing_names(ListingAmenities, listing_data.id, amenities or [], g.current_user['email'])
+    db.session.commit()
 
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Images successfully added!', 'updated_data': updated_data}), 200
+    updated_data = dump_listing(listing_data)
+    return jsonify({'message': f'Amenities added successfully!', 'updated_data': updated_data}), 200
 
 
-# Delete Heavy Vehicle Images
-@views.route('/client/single-heavy-vehicle-view/delete-images/<int:id>', methods=['DELETE'])
+# Delete Vehicle Listing Amenities
+@views.route('/client/listings/<vehicle>/<int:id>/delete-amenities', methods=['DELETE'])
 @jwt_required()
 @current_user_required
-def delete_heavy_vehicle_images(id):
-    image_ids = request.get_json().get('image_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            for image_id in image_ids:
-                image = ListingImage.query.get(image_id)
-                if image:
-                    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                    if os.path.exists(image_path):
-                        os.remove(image_path)
-                db.session.delete(image)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
+@vehicle_type_required
+def delete_listing_amenities(id, vehicle_type):
+    amenity_ids = request.get_json().get('amenity_ids')
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
+
+    delete_listing_names(ListingAmenities, listing_data.id, amenity_ids or [])
+    db.session.commit()
 
     return 'Success!', 200
 
 
-# Heavy Vehicle Add Safety Features
-@views.route('/client/single-heavy-vehicle-view/add-safety-features/<int:id>', methods=['POST'])
-@jwt_required()
-@current_user_required
-def heavy_vehicle_add_safety_features(id):
-    features = request.get_json().get('features')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            for feature in features:
-                existing_feature = SafetyFeatures.query.filter_by(name=feature.lower(), listing_id=id).first()
-                if existing_feature:
-                    pass
-                else:
-                    new_data = SafetyFeatures(name=feature, listing_id=listing_data.id,
-                                              created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
+# Replaces a listing's safety features or amenities with the names in the request body's key, adding and
+# removing rows in one transaction
+def put_listing_names(id, vehicle_type, model, key):
+    names = (request.get_json(silent=True) or {}).get(key)
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        return None, (jsonify({'message': f'{key} must be a list of names.'}), 400)
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return None, error
 
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Safety Features added successfully!', 'updated_data': updated_data}), 200
+    added, removed = sync_listing_names(model, listing_data.id, names, g.current_user['email'])
+    db.session.commit()
+    return {'added': added, 'removed': removed, 'updated_data': dump_listing(listing_data)}, None
 
 
-# Delete Heavy Vehicle Safety Features
-@views.route('/client/single-heavy-vehicle-view/delete-safety-features/<int:id>', methods=['DELETE'])
+# Set Vehicle Listing Safety Features
+@views.route('/client/listings/<vehicle>/<int:id>/safety-features', methods=['PUT'])
 @jwt_required()
 @current_user_required
-def delete_heavy_vehicle_safety_features(id):
-    feature_ids = request.get_json().get('feature_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            for feature_id in feature_ids:
-                feature = SafetyFeatures.query.get(feature_id)
-                db.session.delete(feature)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
+@vehicle_type_required
+def put_listing_safety_features(id, vehicle_type):
+    result, error = put_listing_names(id, vehicle_type, SafetyFeatures, 'features')
+    if error:
+        return error
+    return jsonify({'message': 'Safety Features updated successfully!', **result}), 200
 
 
-# Heavy Vehicle Add Amenities
-@views.route('/client/single-heavy-vehicle-view/add-amenities/<int:id>', methods=['POST'])
+# Set Vehicle Listing Amenities
+@views.route('/client/listings/<vehicle>/<int:id>/amenities', methods=['PUT'])
 @jwt_required()
 @current_user_required
-def heavy_vehicle_add_amenities(id):
-    amenities = request.get_json().get('amenities')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            for amenity in amenities:
-                existing_data = ListingAmenities.query.filter_by(name=amenity.lower(), listing_id=id).first()
-                if existing_data:
-                    pass
-                else:
-                    new_data = ListingAmenities(name=amenity, listing_id=listing_data.id,
-                                                created_by=g.current_user['email'])
-                    db.session.add(new_data)
-                    db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    updated_data = listing_schema.dump(listing_data)
-    return jsonify({'message': f'Amenities added successfully!', 'updated_data': updated_data}), 200
+@vehicle_type_required
+def put_listing_amenities(id, vehicle_type):
+    result, error = put_listing_names(id, vehicle_type, ListingAmenities, 'amenities')
+    if error:
+        return error
+    return jsonify({'message': 'Amenities updated successfully!', **result}), 200
 
 
-# Delete Heavy Vehicle Amenities
-@views.route('/client/single-heavy-vehicle-view/delete-amenities/<int:id>', methods=['DELETE'])
+# Delete Vehicle Listing
+@views.route('/client/listings/<vehicle>/<int:id>/delete-listing', methods=['DELETE'])
 @jwt_required()
 @current_user_required
-def delete_heavy_vehicle_amenities(id):
-    amenity_ids = request.get_json().get('amenity_ids')
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            for amenity_id in amenity_ids:
-                amenity = ListingAmenities.query.get(amenity_id)
-                db.session.delete(amenity)
-                db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
+@vehicle_type_required
+def delete_listing(id, vehicle_type):
+    listing_data, error = owned_listing(id, vehicle_type)
+    if error:
+        return error
+
+    request_listing_deletion(listing_data, g.current_user['email'])
 
     return 'Success!', 200
 
 
-# Delete Heavy Vehicle Listing
-@views.route('/client/single-heavy-vehicle-view/delete-listing/<int:id>', methods=['DELETE'])
+# Bulk Import Listings
+# Takes a CSV or NDJSON file of create-form rows and an optional zip of the images they name. The rows are
+# imported in the background, poll the job for the per-row report.
+@views.route('/client/bulk-import', methods=['POST'])
 @jwt_required()
 @current_user_required
-def delete_heavy_vehicle_listing(id):
-    data = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=data.id).first()
-    if data_listing:
-        listing_data = Listings.query.filter_by(id=id, vehicle_type='heavy vehicle').first()
-        if listing_data:
-            listing = Listings.query.get(id)
-            if listing_data.featured_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_data.featured_image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            for image in listing_data.listing_image:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image.image)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            db.session.delete(listing)
-            db.session.commit()
-        else:
-            return jsonify({'message': 'Listing not found.'}), 400
-    else:
-        return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
-
-    return 'Success!', 200
+def bulk_import():
+    file = request.files.get('file')
+    if not file:
+        return jsonify({'message': 'No import file provided'}), 400
 
+    rows_format = import_format(file.filename)
+    if rows_format is None:
+        return jsonify({'message': 'Import file must be CSV or NDJSON'}), 400
 
-############## END OF HEAVY VEHICLE LISTING ENDPOINT ###############
+    vehicle = request.form.get('vehicle')
+    if vehicle and vehicle_type_for_slug(vehicle) is None:
+        return jsonify({'message': 'Vehicle type not found.'}), 400
 
-######### BRANDS ENDPOINT ######################
+    images = request.files.get('images')
+    if images and not zipfile.is_zipfile(images.stream):
+        return jsonify({'message': 'Images must be a zip file'}), 400
+    if images:
+        images.stream.seek(0)
 
-# Get All Car Brands
-@views.route('/client/car-brand-view', methods=['GET'])
-def client_car_brands_view():
-    data = Brand.query.filter_by(type='car')
+    job = create_import_job(g.current_user['id'], file.stream, rows_format, images.stream if images else None,
+                            vehicle, g.current_user['email'])
+    thread = threading.Thread(target=run_import_in_background, args=(job.id, current_app._get_current_object()))
+    thread.start()
 
-    result = brands_schema.dump(data)
+    return jsonify({'message': 'Import started!', 'job': import_job_schema.dump(job)}), 200
 
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
 
+# Bulk Import Status and Report
+@views.route('/client/bulk-import/<int:id>', methods=['GET'])
+@jwt_required()
+@current_user_required
+def bulk_import_view(id):
+    job = ImportJob.query.filter_by(id=id, user_id=g.current_user['id']).first()
+    if job is None:
+        return jsonify({'message': 'Import not found.'}), 400
 
-# Get All Motorcycle Brands
-@views.route('/client/motorcycle-brand-view', methods=['GET'])
-def client_motorcycle_brand_view():
-    data = Brand.query.filter_by(type='motorcycle')
+    return jsonify({'job': import_job_schema.dump(job)}), 200
 
-    result = brands_schema.dump(data)
 
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
+# Resume a Failed or Interrupted Bulk Import
+@views.route('/client/bulk-import/<int:id>/resume', methods=['POST'])
+@jwt_required()
+@current_user_required
+def bulk_import_resume(id):
+    job = ImportJob.query.filter_by(id=id, user_id=g.current_user['id']).first()
+    if job is None:
+        return jsonify({'message': 'Import not found.'}), 400
+    if not import_resumable(job):
+        return jsonify({'message': f'Import is {job.status}.'}), 400
 
+    thread = threading.Thread(target=run_import_in_background, args=(job.id, current_app._get_current_object()))
+    thread.start()
 
-# Get All Boats Brands
-@views.route('/client/boats-brand-view', methods=['GET'])
-def client_boats_brand_view():
-    data = Brand.query.filter_by(type='boat')
+    return jsonify({'message': 'Import resumed!', 'job': import_job_schema.dump(job)}), 200
 
-    result = brands_schema.dump(data)
 
-    return jsonify({
-        "data": result,
-        "total": data.count()
-    }), 200
+############## END OF VEHICLE LISTING ENDPOINT ###############
 
+######### BRANDS ENDPOINT ######################
 
-# Get All Heavy Vehicle Brands
-@views.route('/client/heavy-vehicle-brand-view', methods=['GET'])
-def client_heavy_vehicle_brand_view():
-    data = Brand.query.filter_by(type='heavy vehicle')
+# Get All Brands of a Vehicle Type
+@views.route('/client/brand-view/<vehicle>', methods=['GET'])
+@vehicle_type_required
+def client_brand_view(vehicle_type):
+    data = Brand.query.filter_by(type=vehicle_type)
 
     result = brands_schema.dump(data)
 
@@ -3499,8 +1610,63 @@ def client_trim_view():
     }), 200
 
 
+# Autocomplete over brands, makes, trims and listing models
+@views.route('/client/autocomplete', methods=['GET'])
+def client_autocomplete():
+    query = request.args.get('q', '', type=str)
+    limit = min(request.args.get('limit', 10, type=int), 50)
+
+    autocomplete_index.ensure_built(current_app.config['AUTOCOMPLETE_REBUILD_INTERVAL'])
+    result = autocomplete_index.search(query, limit)
+
+    return jsonify({
+        "data": result,
+    }), 200
+
+
 ########### END OF BRANDS  ENDPOINT#########################
 
+############# LEGACY VEHICLE URLS ####################
+# The auth-all-* URLs always required a valid token, unlike the public feed they alias
+auth_listing_feed = jwt_required()(listing_feed)
+
+# The original per-vehicle URLs, kept as aliases of the generic vehicle endpoints
+LEGACY_VEHICLE_ROUTES = (
+    ('/admin/{slug}-listing-view', '{name}_listing_view', admin_listing_view, ['GET']),
+    ('/client/all-{slug}-view', 'all_{name}_view', listing_feed, ['GET']),
+    ('/client/auth-all-{slug}-view', 'auth_all_{name}_view', auth_listing_feed, ['GET']),
+    ('/client/user-{slug}-view/<int:id>', 'user_{name}_view', user_listing_feed, ['GET']),
+    ('/client/{slug}-create', '{name}_create', listing_create, ['POST']),
+    ('/client/single-{slug}-view/<int:id>', 'single_{name}_view', single_listing_view, ['GET']),
+    ('/client/single-{slug}-view/update-information/<int:id>', 'update_{name}', update_listing, ['PUT']),
+    ('/client/single-{slug}-view/update-featured-image/<int:id>', 'update_{name}_featured_img',
+     update_listing_featured_img, ['PUT']),
+    ('/client/single-{slug}-view/add-images/<int:id>', '{name}_add_images', listing_add_images, ['POST']),
+    ('/client/single-{slug}-view/delete-images/<int:id>', 'delete_{name}_images', delete_listing_images, ['DELETE']),
+    ('/client/single-{slug}-view/add-safety-features/<int:id>', '{name}_add_safety_features',
+     listing_add_safety_features, ['POST']),
+    ('/client/single-{slug}-view/delete-safety-features/<int:id>', 'delete_{name}_safety_features',
+     delete_listing_safety_features, ['DELETE']),
+    ('/client/single-{slug}-view/add-amenities/<int:id>', '{name}_add_amenities', listing_add_amenities, ['POST']),
+    ('/client/single-{slug}-view/delete-amenities/<int:id>', 'delete_{name}_amenities', delete_listing_amenities,
+     ['DELETE']),
+    ('/client/single-{slug}-view/delete-listing/<int:id>', 'delete_{name}_listing', delete_listing, ['DELETE']),
+    ('/client/{slug}-brand-view', 'client_{name}_brand_view', client_brand_view, ['GET']),
+)
+
+for vehicle in VEHICLE_TYPES.values():
+    for rule, endpoint, view_func, methods in LEGACY_VEHICLE_ROUTES:
+        views.add_url_rule(rule.format(slug=vehicle['slug']), endpoint.format(name=vehicle['slug'].replace('-', '_')),
+                           view_func, methods=methods, defaults={'vehicle': vehicle['slug']})
+
+# Legacy URLs that don't follow the pattern
+views.add_url_rule('/client/auth-all-motorcylce-view', 'auth_all_motorcylce_view', auth_listing_feed,
+                   methods=['GET'], defaults={'vehicle': 'motorcycle'})
+views.add_url_rule('/client/boats-brand-view', 'client_boats_brand_view', client_brand_view,
+                   methods=['GET'], defaults={'vehicle': 'boat'})
+
+############# END OF LEGACY VEHICLE URLS ####################
+
 ############# LOCATION AND COMMUNITY ENDPOINTS ####################
 # Get All Location
 @views.route('/client/location-view', methods=['GET'])
@@ -3607,15 +1773,12 @@ def update_profile_picture(id):
 
     data = User.query.get(id)
     if data:
-        if data.profile_picture != 'default_profile_picture.jpg':
-            image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], data.profile_picture)
-            if os.path.exists(image_path):
-                os.remove(image_path)
+        # A single small image, encoded inline rather than through the listing image pipeline. Stored before
+        # the old picture is released so an unreadable upload leaves it in place.
+        filename = store_encoded_image(image.read(), max_size_kb=1024, webp=current_app.config['IMAGE_WEBP'])
 
-        resized_img = resize_image(image, max_size_kb=1024)
-        filename = str(uuid.uuid1()) + '_' + secure_filename(image.filename)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        resized_img.save(filepath, format='JPEG')
+        if data.profile_picture != 'default_profile_picture.jpg':
+            release_image(data.profile_picture)
 
         data.profile_picture = filename
         data.updated_by = g.current_user['email']
@@ -3634,48 +1797,14 @@ def update_profile_picture(id):
 @current_user_required
 def delete_user(id):
     data = User.query.get(id)
-    if data is None:
+    if data is None or data.deleted_date is not None:
         return jsonify({'message': 'User not found.'}), 400
 
-    listing_data = Listings.query.filter_by(user_id=id)
-    for listing in listing_data:
-        listing_feature_image = listing.featured_image
-        if listing_feature_image:
-            image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], listing_feature_image)
-            if os.path.exists(image_path):
-                os.remove(image_path)
-        listing_image_data = ListingImage.query.filter_by(listing_id=listing.id)
-        for images in listing_image_data:
-            image_data = images.image
-            if image_data:
-                image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image_data)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-
-    profile_picture = data.profile_picture
-    if profile_picture == 'default_profile_picture.jpg':
-        pass
-    else:
-        image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], profile_picture)
-        if os.path.exists(image_path):
-            os.remove(image_path)
-
-    delete_stripe_customer(data.id)
-    db.session.delete(data)
-    db.session.commit()
+    # Hidden at once, the rows, files and Stripe customer are purged by a deletion job
+    request_user_deletion(data, g.current_user['email'])
 
     return 'Success!', 200
 
-def delete_stripe_customer(stripe_customer_id):
-    try:
-        stripe_customer = f'imotorV3_{stripe_customer_id}'
-        # Delete the customer in Stripe
-        stripe.Customer.delete(stripe_customer)
-        print("Customer deleted successfully in Stripe.")
-    except stripe.error.InvalidRequestError as e:
-        print(f"Error deleting customer in Stripe: {e}")
-
-
 ############## END OF USER PROFILE ENDPOINTS #######################
 
 
@@ -3879,8 +2008,8 @@ def stripe_webhook():
                     old_user_data = user_data.standard_listing
                     limitation = abs(16 - old_user_data)
                     user_data.standard_listing = 16
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3888,8 +2017,8 @@ def stripe_webhook():
                     old_user_data = user_data.standard_listing
                     limitation = abs(3 - old_user_data)
                     user_data.standard_listing = 3
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3899,8 +2028,8 @@ def stripe_webhook():
                     old_user_data = user_data.featured_listing
                     limitation = abs(5 - old_user_data)
                     user_data.featured_listing = 5
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3908,8 +2037,8 @@ def stripe_webhook():
                     old_user_data = user_data.featured_listing
                     limitation = abs(0 - old_user_data)
                     user_data.featured_listing = 0
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3919,8 +2048,8 @@ def stripe_webhook():
                     old_user_data = user_data.premium_listing
                     limitation = abs(2 - old_user_data)
                     user_data.premium_listing = 2
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3928,8 +2057,8 @@ def stripe_webhook():
                     old_user_data = user_data.premium_listing
                     limitation = abs(0 - old_user_data)
                     user_data.premium_listing = 0
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3940,16 +2069,16 @@ def stripe_webhook():
                     old_user_data = user_data.standard_listing
                     limitation = abs(3 - old_user_data)
                     user_data.standard_listing = 3
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
                 else:
                     limitation = abs(13)
                     user_data.standard_listing = abs(user_data.standard_listing - 16 + 3)
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='standard') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3958,16 +2087,16 @@ def stripe_webhook():
                     old_user_data = user_data.featured_listing
                     limitation = abs(0 - old_user_data)
                     user_data.featured_listing = 0
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
                 else:
                     limitation = abs(5)
                     user_data.featured_listing = abs(user_data.featured_listing - 5)
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='featured') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -3976,16 +2105,16 @@ def stripe_webhook():
                     old_user_data = user_data.premium_listing
                     limitation = abs(0 - old_user_data)
                     user_data.premium_listing = 0
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
                 else:
                     limitation = abs(2)
                     user_data.premium_listing = abs(user_data.premium_listing - 2)
-                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium').order_by(
-                        Listings.created_date.asc()).limit(limitation).all()
+                    listings = Listings.query.filter_by(user_id=user_data.id, featured_as='premium') \
+                        .filter(LISTING_NOT_DELETED).order_by(Listings.created_date.asc()).limit(limitation).all()
                     for listing in listings:
                         listing.publish_status = 2
                         db.session.commit()
@@ -4310,7 +2439,7 @@ def send_confirmation_email(user_email, plan_name, quantity, invoice_url, app):
 @views.route('/import-all-user-to-stripe', methods=['POST'])
 def import_users_to_stripe():
     # Retrieve users from your database
-    users = User.query.all()  # Assuming User is your SQLAlchemy model
+    users = User.query.filter(User.deleted_date.is_(None)).all()  # Assuming User is your SQLAlchemy model
 
     for user in users:
         try:
@@ -4625,7 +2754,7 @@ def listing_resubmit(id):
             return jsonify({'message': f'Limit Premium Listing is {user.premium_listing}'}), 400
     else:
         return jsonify({'message': f'No Featured As'}), 400
-    data_listing = Listings.query.filter_by(id=id, user_id=user.id).first()
+    data_listing = Listings.query.filter_by(id=id, user_id=user.id).filter(LISTING_NOT_DELETED).first()
     if data_listing:
         listing_data = Listings.query.get(id)
         if listing_data:
@@ -4637,7 +2766,7 @@ def listing_resubmit(id):
     else:
         return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
 
-    updated_data = listing_schema.dump(listing_data)
+    updated_data = dump_listing(listing_data)
     return jsonify({'message': f'Listing Successfully Submitted to In Review!', 'updated_data': updated_data}), 200
 
 
@@ -4646,7 +2775,7 @@ def listing_resubmit(id):
 @current_user_required
 def listing_unpublish(id):
     user = User.query.get(g.current_user['id'])
-    data_listing = Listings.query.filter_by(id=id, user_id=user.id).first()
+    data_listing = Listings.query.filter_by(id=id, user_id=user.id).filter(LISTING_NOT_DELETED).first()
     if data_listing:
         listing_data = Listings.query.get(id)
         if listing_data:
@@ -4657,7 +2786,7 @@ def listing_unpublish(id):
     else:
         return jsonify({'message': 'You are not allowed to update other users listing.'}), 400
 
-    updated_data = listing_schema.dump(listing_data)
+    updated_data = dump_listing(listing_data)
     return jsonify({'message': f'Listing Unpublished successfully!', 'updated_data': updated_data}), 200
 
 # CHAT FEATURE
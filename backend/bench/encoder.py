@@ -0,0 +1,93 @@
+# Runs sample photos through the listing image encoder and through the resize_image encoder it replaced, and
+# reports per photo time, JPEG encodes, output size and whether the output fits the size limit. Exits with
+# status 1 when the current encoder's median is more than MAX_MEDIAN_ENCODES encodes per photo.
+#
+#   cd backend && python -m bench.encoder [--photos <folder>] [--count 8] [--max-size-kb 1024]
+import argparse
+import io
+import statistics
+import sys
+import time
+from unittest import mock
+
+from PIL import Image
+
+from app import images
+from bench.samples import load_photos
+
+MAX_MEDIAN_ENCODES = 2
+
+
+# The encoder before the size-targeted one: a full default-quality encode to measure the image, one resize
+# by the square root of the overshoot, and a second default-quality encode
+def legacy_encode(data, max_size_kb):
+    img = Image.open(io.BytesIO(data))
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGB')
+    measured = io.BytesIO()
+    img.save(measured, format='JPEG')
+    if measured.tell() > max_size_kb * 1024:
+        ratio = (max_size_kb * 1024 / measured.tell()) ** 0.5
+        img = img.resize((int(img.width * ratio), int(img.height * ratio)))
+    output = io.BytesIO()
+    img.save(output, format='JPEG')
+    return output.getvalue(), 2
+
+
+# The main file of encode_image_files, with its JPEG encodes counted, measuring ones included
+def current_encode(data, max_size_kb):
+    jpeg_bytes = images._jpeg_bytes
+    encodes = []
+
+    def counted(img, quality, final=True):
+        encodes.append(quality)
+        return jpeg_bytes(img, quality, final)
+
+    with mock.patch.object(images, '_jpeg_bytes', counted):
+        encoded = images._fit_jpeg(images._decode(data), max_size_kb)
+    return encoded, len(encodes)
+
+
+def measure(encode, data, max_size_kb):
+    started = time.perf_counter()
+    encoded, encodes = encode(data, max_size_kb)
+    elapsed = time.perf_counter() - started
+    width, height = Image.open(io.BytesIO(encoded)).size
+    return elapsed, encodes, len(encoded), f'{width}x{height}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Listing image encoder against the encoder it replaced')
+    parser.add_argument('--photos', help='folder of sample photos, synthetic ones are generated otherwise')
+    parser.add_argument('--count', type=int, default=8, help='synthetic photos to generate')
+    parser.add_argument('--max-size-kb', type=int, default=images.LISTING_IMAGE_MAX_SIZE_KB)
+    args = parser.parse_args()
+
+    totals = {}
+    encode_counts = []
+    print(f"{'photo':>5} {'encoder':>8} {'ms':>7} {'encodes':>7} {'KB':>6} {'size':>10}  fits")
+    for index, data in enumerate(load_photos(args.photos, args.count)):
+        for label, encode in (('legacy', legacy_encode), ('current', current_encode)):
+            elapsed, encodes, size, dimensions = measure(encode, data, args.max_size_kb)
+            fits = size <= args.max_size_kb * 1024
+            print(f'{index:5d} {label:>8} {elapsed * 1000:7.0f} {encodes:7d} {size / 1024:6.0f} {dimensions:>10}  '
+                  f"{'yes' if fits else 'NO'}")
+            if label == 'current':
+                encode_counts.append(encodes)
+            total = totals.setdefault(label, [0, 0, 0])
+            total[0] += elapsed
+            total[1] += size
+            total[2] += not fits
+
+    for label, (elapsed, size, oversized) in totals.items():
+        print(f'{label}: {elapsed:.2f}s, {size / 1024:.0f} KB in total, {oversized} over {args.max_size_kb} KB')
+
+    median = statistics.median(encode_counts)
+    print(f'current encodes per photo: median {median}, max {max(encode_counts)}')
+    if median > MAX_MEDIAN_ENCODES:
+        print(f'FAIL: median is over {MAX_MEDIAN_ENCODES} encodes per photo')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
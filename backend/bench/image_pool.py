@@ -0,0 +1,55 @@
+# Encodes the same uploads one after another and on the image pipeline's spawn-context process pool, the way a
+# listing create with several photos is handled with IMAGE_WORKERS = 0 and IMAGE_WORKERS = n.
+#
+#   cd backend && python -m bench.image_pool --workers 1 2 4 [--photos <folder>] [--count 8]
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.images import encode_image_files, encoded_filename, LISTING_IMAGE_MAX_SIZE_KB
+from bench.samples import load_photos
+
+
+def run_serial(photos, names):
+    started = time.perf_counter()
+    for data, name in zip(photos, names):
+        encode_image_files(data, name, LISTING_IMAGE_MAX_SIZE_KB)
+    return time.perf_counter() - started
+
+
+# The pool is started and warmed up first, the pipeline keeps it running between requests
+def run_pool(photos, names, workers):
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        list(executor.map(int, range(workers)))
+        started = time.perf_counter()
+        futures = [
+            executor.submit(encode_image_files, data, name, LISTING_IMAGE_MAX_SIZE_KB)
+            for data, name in zip(photos, names)
+        ]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs process pool listing image encoding')
+    parser.add_argument('--photos', help='folder of sample photos, synthetic ones are generated otherwise')
+    parser.add_argument('--count', type=int, default=8, help='synthetic photos to generate')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--repeat', type=int, default=3, help='runs per setting, the best one is reported')
+    args = parser.parse_args()
+
+    photos = load_photos(args.photos, args.count)
+    names = [encoded_filename(data, LISTING_IMAGE_MAX_SIZE_KB, False) for data in photos]
+    print(f'{len(photos)} photos, {multiprocessing.cpu_count()} CPUs')
+
+    serial = min(run_serial(photos, names) for _ in range(args.repeat))
+    print(f'serial      {serial:7.2f}s')
+    for workers in args.workers:
+        pooled = min(run_pool(photos, names, workers) for _ in range(args.repeat))
+        print(f'{workers:2d} workers  {pooled:7.2f}s  {serial / pooled:4.1f}x')
+
+
+if __name__ == '__main__':
+    main()
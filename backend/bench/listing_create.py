@@ -0,0 +1,131 @@
+# Posts listing creates to /api/client/listings/car/create on a throwaway SQLite database and counts the commits
+# and statements each one costs, then posts one malformed create and counts the rows it left behind.
+#
+#   cd backend && python -m bench.listing_create [--creates 20] [--features 10] [--amenities 10] [--images 3]
+import argparse
+import io
+import tempfile
+import time
+from contextlib import contextmanager
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func, select
+
+from app import create_app, db
+from app.models import User, Brand, Location, Community, Listings, ListingImage, SafetyFeatures, ListingAmenities
+from app.vehicles import VEHICLE_TYPES, LISTING_FIELDS
+from bench.samples import synthetic_photos
+
+
+@contextmanager
+def count_database_work():
+    counts = {'commits': 0, 'statements': 0}
+
+    def on_commit(conn):
+        counts['commits'] += 1
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counts['statements'] += 1
+
+    event.listen(db.engine, 'commit', on_commit)
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    try:
+        yield counts
+    finally:
+        event.remove(db.engine, 'commit', on_commit)
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+
+def seed():
+    user = User(email='dealer@example.com', first_name='A', last_name='B', standard_listing=10 ** 6,
+                featured_listing=10 ** 6, premium_listing=10 ** 6, profile_picture='default_profile_picture.jpg')
+    brand = Brand(name='Toyota', type='car')
+    location = Location(name='Dubai')
+    db.session.add_all([user, brand, location])
+    db.session.flush()
+    community = Community(name='Marina', location_id=location.id)
+    db.session.add(community)
+    db.session.commit()
+    return user, brand, location, community
+
+
+def create_form(user, brand, location, community, features, amenities):
+    form = {field: '1' for field in (*LISTING_FIELDS, *VEHICLE_TYPES['car']['fields'])}
+    form.update({
+        'model': 'Corolla', 'model_year': '2020', 'vin': 'VIN', 'featured_as': 'standard',
+        'user_id': user.id, 'brand_id': brand.id, 'location_id': location.id, 'community_id': community.id,
+        'safety_features': ','.join(f'feature {i}' for i in range(features)),
+        'amenities': ','.join(f'amenity {i}' for i in range(amenities)),
+    })
+    return form
+
+
+def listing_row_counts():
+    return {
+        model.__tablename__: db.session.scalar(select(func.count()).select_from(model))
+        for model in (Listings, VEHICLE_TYPES['car']['model'], ListingImage, SafetyFeatures, ListingAmenities)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Commits and statements per listing create')
+    parser.add_argument('--creates', type=int, default=20)
+    parser.add_argument('--features', type=int, default=10)
+    parser.add_argument('--amenities', type=int, default=10)
+    parser.add_argument('--images', type=int, default=3, help='gallery images per create, plus a featured image')
+    parser.add_argument('--no-featured-image', action='store_true', help='no uploads when --images is 0 too')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{folder}/bench.db',
+        'UPLOAD_FOLDER': f'{folder}/uploads',
+        'IMPORT_FOLDER': f'{folder}/imports',
+        'IMAGE_WORKERS': 0,
+    })
+    with app.app_context():
+        user, brand, location, community = seed()
+        token = create_access_token(identity={
+            'email': user.email, 'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name,
+        })
+        headers = {'Authorization': f'Bearer {token}'}
+        form = create_form(user, brand, location, community, args.features, args.amenities)
+        photos = synthetic_photos(args.images + 1, size=(800, 600))
+        featured = not args.no_featured_image
+        client = app.test_client()
+
+        elapsed = 0
+        with count_database_work() as counts:
+            for i in range(args.creates):
+                # Photos differ per create, so every upload is encoded rather than deduplicated
+                data = dict(form, images=[
+                    (io.BytesIO(photo + bytes([i])), f'{n}.jpg') for n, photo in enumerate(photos[1:])
+                ])
+                if featured:
+                    data['featured_image'] = (io.BytesIO(photos[0] + bytes([i])), 'featured.jpg')
+                started = time.perf_counter()
+                response = client.post('/api/client/listings/car/create', data=data, headers=headers,
+                                       content_type='multipart/form-data')
+                elapsed += time.perf_counter() - started
+                assert response.status_code == 200, response.json
+
+        print(f'{args.creates} creates with {args.features} safety features, {args.amenities} amenities and '
+              f'{args.images + featured} images each')
+        # With images, IMAGE_WORKERS = 0 adds the pipeline's commit marking them ready to the create's own
+        print(f"commits per create     {counts['commits'] / args.creates:.1f}")
+        print(f"statements per create  {counts['statements'] / args.creates:.1f}")
+        print(f'ms per create          {elapsed * 1000 / args.creates:.1f}')
+
+        # doors is missing, the create fails after the listing row is flushed
+        before = listing_row_counts()
+        broken = {key: value for key, value in form.items() if key != 'doors'}
+        response = client.post('/api/client/listings/car/create', data=broken, headers=headers)
+        print(f'malformed create: {response.status_code}')
+        # The request shares this app context's session, the server's teardown would roll it back here
+        db.session.rollback()
+        left = {table: count - before[table] for table, count in listing_row_counts().items()}
+        print(f'rows left by a malformed create: {left}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import glob
+import io
+import os
+import random
+
+from PIL import Image
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+# Phone-camera sized JPEGs with gradients, shapes and sensor noise, so they compress roughly like photos
+# rather than like flat colour or pure noise
+def synthetic_photos(count, size=(4032, 3024), seed=0):
+    rng = random.Random(seed)
+    photos = []
+    for _ in range(count):
+        gradient = Image.linear_gradient('L').resize(size).rotate(rng.randrange(360), expand=False)
+        noise = Image.effect_noise(size, rng.randrange(20, 60))
+        channels = [Image.blend(gradient, noise, rng.uniform(0.2, 0.5)) for _ in range(3)]
+        img = Image.merge('RGB', channels)
+        for _ in range(20):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            box = (x, y, x + rng.randrange(100, 1200), y + rng.randrange(100, 900))
+            img.paste(tuple(rng.randrange(256) for _ in range(3)), box)
+        output = io.BytesIO()
+        img.save(output, format='JPEG', quality=92)
+        photos.append(output.getvalue())
+    return photos
+
+
+# Bytes of the photos in folder, or count synthetic ones when no folder is given
+def load_photos(folder=None, count=8):
+    if not folder:
+        return synthetic_photos(count)
+    paths = sorted(
+        path for path in glob.glob(os.path.join(folder, '*')) if path.lower().endswith(PHOTO_EXTENSIONS)
+    )
+    photos = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            photos.append(f.read())
+    return photos
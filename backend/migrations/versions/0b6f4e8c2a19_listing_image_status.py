@@ -0,0 +1,26 @@
+"""listing image status
+
+Revision ID: 0b6f4e8c2a19
+Revises: e7a3b9d24c61
+Create Date: 2026-10-17 12:48:05.117402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6f4e8c2a19'
+down_revision = 'e7a3b9d24c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_status', sa.String(length=20), nullable=False, server_default='ready'))
+
+
+def downgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_column('image_status')
@@ -0,0 +1,33 @@
+"""listing fulltext search
+
+Revision ID: 3f9c2b7d1e04
+Revises: a755e05a1979
+Create Date: 2026-10-17 09:12:40.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2b7d1e04'
+down_revision = 'a755e05a1979'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.create_index('ft_listings_search', ['title', 'model', 'variant', 'description'], unique=False,
+                              mysql_prefix='FULLTEXT')
+
+    with op.batch_alter_table('brand', schema=None) as batch_op:
+        batch_op.create_index('ft_brand_name', ['name'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    with op.batch_alter_table('brand', schema=None) as batch_op:
+        batch_op.drop_index('ft_brand_name')
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_index('ft_listings_search')
@@ -0,0 +1,31 @@
+"""stored image
+
+Revision ID: 5d2a7c19e8f3
+Revises: 0b6f4e8c2a19
+Create Date: 2026-10-17 15:21:40.583917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a7c19e8f3'
+down_revision = '0b6f4e8c2a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stored_image',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_date', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('filename')
+    )
+
+
+def downgrade():
+    op.drop_table('stored_image')
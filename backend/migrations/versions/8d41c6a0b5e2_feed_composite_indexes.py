@@ -0,0 +1,44 @@
+"""feed composite indexes
+
+Revision ID: 8d41c6a0b5e2
+Revises: 3f9c2b7d1e04
+Create Date: 2026-10-17 10:03:15.402671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c6a0b5e2'
+down_revision = '3f9c2b7d1e04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.create_index('ix_listings_feed', ['vehicle_type', 'publish_status', 'featured_as', 'id'],
+                              unique=False)
+        batch_op.create_index('ix_listings_feed_price', ['vehicle_type', 'publish_status', 'price'], unique=False)
+        batch_op.create_index('ix_listings_feed_mileage', ['vehicle_type', 'publish_status', 'mileage'], unique=False)
+        batch_op.create_index('ix_listings_feed_model_year', ['vehicle_type', 'publish_status', 'model_year'],
+                              unique=False)
+        batch_op.create_index('ix_listings_published', ['publish_status', 'featured_as', 'id'], unique=False)
+        batch_op.create_index('ix_listings_user_featured_as', ['user_id', 'featured_as'], unique=False)
+
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.create_index('ix_favorites_user_listing', ['user_id', 'listing_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.drop_index('ix_favorites_user_listing')
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_index('ix_listings_user_featured_as')
+        batch_op.drop_index('ix_listings_published')
+        batch_op.drop_index('ix_listings_feed_model_year')
+        batch_op.drop_index('ix_listings_feed_mileage')
+        batch_op.drop_index('ix_listings_feed_price')
+        batch_op.drop_index('ix_listings_feed')
@@ -0,0 +1,42 @@
+"""import job
+
+Revision ID: 9e4b1d7a3c52
+Revises: 5d2a7c19e8f3
+Create Date: 2026-10-17 17:02:11.640273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b1d7a3c52'
+down_revision = '5d2a7c19e8f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('vehicle_type', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('rows_format', sa.String(length=10), nullable=False),
+    sa.Column('rows_path', sa.Text(), nullable=False),
+    sa.Column('images_path', sa.Text(), nullable=True),
+    sa.Column('processed_rows', sa.Integer(), nullable=False),
+    sa.Column('created_count', sa.Integer(), nullable=False),
+    sa.Column('failed_count', sa.Integer(), nullable=False),
+    sa.Column('report', sa.Text(length=16777215), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.String(length=255), nullable=True),
+    sa.Column('created_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_date', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('import_job')
@@ -0,0 +1,46 @@
+"""deletion job
+
+Revision ID: c3f8a61d2e97
+Revises: 9e4b1d7a3c52
+Create Date: 2026-10-17 19:24:37.218904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a61d2e97'
+down_revision = '9e4b1d7a3c52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deletion_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('listing_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.String(length=255), nullable=True),
+    sa.Column('created_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_date', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('deletion_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_deletion_job_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_date', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('deleted_date')
+
+    with op.batch_alter_table('deletion_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_deletion_job_user_id'))
+
+    op.drop_table('deletion_job')
@@ -0,0 +1,45 @@
+"""listing tier rank
+
+Revision ID: c52e8f1a9d37
+Revises: 8d41c6a0b5e2
+Create Date: 2026-10-17 11:24:48.913205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e8f1a9d37'
+down_revision = '8d41c6a0b5e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tier_rank', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        "UPDATE listings SET tier_rank = CASE "
+        "WHEN LOWER(featured_as) = 'premium' THEN 2 "
+        "WHEN LOWER(featured_as) = 'featured' THEN 1 "
+        "ELSE 0 END"
+    )
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_index('ix_listings_published')
+        batch_op.drop_index('ix_listings_feed')
+        batch_op.create_index('ix_listings_feed', ['vehicle_type', 'publish_status', 'tier_rank', 'id'],
+                              unique=False)
+        batch_op.create_index('ix_listings_published', ['publish_status', 'tier_rank', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_index('ix_listings_published')
+        batch_op.drop_index('ix_listings_feed')
+        batch_op.create_index('ix_listings_feed', ['vehicle_type', 'publish_status', 'featured_as', 'id'],
+                              unique=False)
+        batch_op.create_index('ix_listings_published', ['publish_status', 'featured_as', 'id'], unique=False)
+        batch_op.drop_column('tier_rank')
@@ -0,0 +1,36 @@
+"""listing favorite count
+
+Revision ID: e7a3b9d24c61
+Revises: c52e8f1a9d37
+Create Date: 2026-10-17 12:02:37.541890
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3b9d24c61'
+down_revision = 'c52e8f1a9d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('favorite_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        "UPDATE listings SET favorite_count = "
+        "(SELECT COUNT(*) FROM favorites WHERE favorites.listing_id = listings.id)"
+    )
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.create_index('ix_listings_trending', ['vehicle_type', 'publish_status', 'favorite_count'],
+                              unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_index('ix_listings_trending')
+        batch_op.drop_column('favorite_count')
@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User, Brand, Location, Community, Listings, ListingImage, SafetyFeatures, ListingAmenities
+from app.queries import feed_totals
+from app.vehicles import VEHICLE_TYPES
+
+TIERS = ('standard', 'featured', 'premium')
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'IMPORT_FOLDER': str(tmp_path / 'imports'),
+        'IMAGE_WORKERS': 0,
+        'AUTOCOMPLETE_WARM_ON_START': False,
+    })
+    feed_totals.clear()
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# n published listings spread over the vehicle types and tiers, each with its detail row, an image, a safety
+# feature and an amenity. Returns the owner's id.
+@pytest.fixture
+def seed_listings(app):
+    def seed(n):
+        user = User(email='dealer@example.com', first_name='A', last_name='B', standard_listing=999,
+                    featured_listing=999, premium_listing=999, profile_picture='default_profile_picture.jpg')
+        brand = Brand(name='Toyota', type='car')
+        location = Location(name='Dubai')
+        db.session.add_all([user, brand, location])
+        db.session.flush()
+        community = Community(name='Marina', location_id=location.id)
+        db.session.add(community)
+        db.session.flush()
+
+        vehicle_types = list(VEHICLE_TYPES)
+        for i in range(n):
+            vehicle_type = vehicle_types[i % len(vehicle_types)]
+            listing = Listings(title=f'Corolla {i}', model='Corolla', model_year=2000 + i, price=1000 * i,
+                               mileage=10 * i, vehicle_type=vehicle_type, featured_as=TIERS[i % len(TIERS)],
+                               publish_status=1, user_id=user.id, brand_id=brand.id, location_id=location.id,
+                               community_id=community.id, featured_image=f'featured{i}.jpg')
+            db.session.add(listing)
+            db.session.flush()
+            db.session.add_all([
+                VEHICLE_TYPES[vehicle_type]['model'](listing_id=listing.id),
+                ListingImage(listing_id=listing.id, image=f'gallery{i}.jpg'),
+                SafetyFeatures(listing_id=listing.id, name='abs'),
+                ListingAmenities(listing_id=listing.id, name='ac'),
+            ])
+        db.session.commit()
+        return user.id
+
+    return seed
+
+
+# Statements sent to the database inside the block
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
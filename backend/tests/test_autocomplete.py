@@ -0,0 +1,124 @@
+import threading
+
+from app import db
+from app.autocomplete import AutocompleteIndex
+from app.models import Brand, Make
+
+
+def seed_taxonomy():
+    db.session.add_all([Brand(name='Toyota', type='car'), Brand(name='Tesla', type='car')])
+    db.session.flush()
+    db.session.add_all([Make(name='Corolla Cross', brand_id=1), Make(name='Model 3', brand_id=2)])
+    db.session.commit()
+
+
+def new_index(app):
+    index = AutocompleteIndex()
+    index.init_app(app)
+    return index
+
+
+def labels(index, query):
+    return [match['label'] for match in index.search(query)]
+
+
+def test_build_finds_prefixes_word_starts_and_typos(app):
+    seed_taxonomy()
+    index = new_index(app)
+    index.build()
+
+    assert index._prefix_keys == sorted(index._prefix_keys)
+    assert labels(index, 'to') == ['Toyota']
+    assert labels(index, 'cross') == ['Corolla Cross']
+    assert 'Toyota' in labels(index, 'toyta')
+
+    index.add('model', 'Camry')
+    assert index._prefix_keys == sorted(index._prefix_keys)
+    assert labels(index, 'cam') == ['Camry']
+
+
+def test_warm_on_start_builds_in_the_background(app):
+    seed_taxonomy()
+    app.config['AUTOCOMPLETE_WARM_ON_START'] = True
+    index = new_index(app)
+    index.wait()
+
+    assert labels(index, 'tes') == ['Tesla']
+
+
+def test_concurrent_lookups_start_one_background_build(app):
+    seed_taxonomy()
+    index = new_index(app)
+    builds = []
+    release = threading.Event()
+    build = index.build
+
+    def blocked_build():
+        builds.append(1)
+        release.wait()
+        return build()
+
+    index.build = blocked_build
+    start = threading.Barrier(8)
+
+    def lookup():
+        start.wait()
+        index.ensure_built(max_age=600)
+        index.search('tes')
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Every lookup returns while the build is still blocked
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    release.set()
+    index.wait()
+    assert len(builds) == 1
+    assert labels(index, 'tes') == ['Tesla']
+
+
+def test_invalidate_keeps_serving_the_old_index_until_rebuilt(app):
+    seed_taxonomy()
+    index = new_index(app)
+    index.build()
+    release = threading.Event()
+    build = index.build
+
+    def blocked_build():
+        release.wait()
+        return build()
+
+    index.build = blocked_build
+    db.session.query(Brand).filter_by(name='Tesla').update({'name': 'Tesla Motors'})
+    db.session.commit()
+    index.invalidate()
+
+    assert labels(index, 'tes') == ['Tesla']
+    release.set()
+    index.wait()
+    assert labels(index, 'tes') == ['Tesla Motors']
+    assert index._built_at is not None
+
+
+def test_invalidate_during_build_builds_again(app):
+    seed_taxonomy()
+    index = new_index(app)
+    index_entry = index._index
+    renamed = []
+
+    def index_with_rename(*args, **kwargs):
+        # A rename committed while the build was reading the taxonomy
+        if not renamed:
+            renamed.append(1)
+            index._generation += 1
+        return index_entry(*args, **kwargs)
+
+    index._index = index_with_rename
+    index.schedule_rebuild()
+    index.wait()
+
+    assert index._built_at is not None
+    assert len(renamed) == 1
@@ -0,0 +1,56 @@
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.deletions import purge_user
+from app.models import User, Listings, Favorites, PUBLISH_STATUS_DELETED
+
+
+def headers(user):
+    token = create_access_token(identity={
+        'email': user.email, 'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name,
+    })
+    return {'Authorization': f'Bearer {token}'}
+
+
+def add_fan(client, listing_ids):
+    fan = User(email='fan@example.com', profile_picture='default_profile_picture.jpg')
+    db.session.add(fan)
+    db.session.commit()
+    for listing_id in listing_ids:
+        assert client.post(f'/api/client/add-favorite/{listing_id}', headers=headers(fan)).status_code == 200
+    return fan
+
+
+def favorite_counts():
+    db.session.rollback()
+    return dict(db.session.query(Listings.id, Listings.favorite_count))
+
+
+def test_purged_user_favorites_leave_the_favorite_counts(client, seed_listings):
+    seed_listings(4)
+    other = User(email='other@example.com', profile_picture='default_profile_picture.jpg')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add(Favorites(user_id=other.id, listing_id=1))
+    db.session.query(Listings).filter_by(id=1).update({'favorite_count': 1})
+    db.session.commit()
+
+    fan = add_fan(client, [1, 2, 3])
+    assert favorite_counts() == {1: 2, 2: 1, 3: 1, 4: 0}
+
+    purge_user(fan.id, chunk_size=10)
+
+    assert favorite_counts() == {1: 1, 2: 0, 3: 0, 4: 0}
+
+
+def test_favorite_listings_hide_deleted_listings(client, seed_listings):
+    seed_listings(3)
+    fan = add_fan(client, [1, 2, 3])
+    db.session.query(Listings).filter_by(id=2).update({'publish_status': PUBLISH_STATUS_DELETED})
+    db.session.commit()
+
+    response = client.get(f'/api/client/favorite-listings/{fan.id}', headers=headers(fan))
+
+    assert response.status_code == 200
+    assert sorted(favorite['listing']['id'] for favorite in response.json['data']) == [1, 3]
+    assert response.json['total'] == 2
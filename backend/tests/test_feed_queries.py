@@ -0,0 +1,68 @@
+import pytest
+
+from app import db
+from app.queries import feed_totals
+from app.vehicles import VEHICLE_TYPES
+from conftest import count_queries
+
+# Statements for one feed page: the page, its COUNT, the selectin loads of the page's children and the
+# grouped quota counts, plus the owner lookup on a user's feed. None of them may grow with the page size.
+MAX_FEED_QUERIES = 7
+MAX_CARD_FEED_QUERIES = 2
+# Search spans every vehicle type, so each detail table gets its own selectin load
+MAX_SEARCH_QUERIES = MAX_FEED_QUERIES + len(VEHICLE_TYPES) - 1
+
+
+def feed_query_count(client, url):
+    feed_totals.clear()
+    db.session.remove()
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements), response.json['data']
+
+
+@pytest.mark.parametrize('vehicle', [vehicle['slug'] for vehicle in VEHICLE_TYPES.values()])
+def test_feed_query_count_is_bounded(client, seed_listings, vehicle):
+    seed_listings(len(VEHICLE_TYPES) * 25)
+
+    small, small_page = feed_query_count(client, f'/api/client/listings/{vehicle}?page_size=5')
+    full, full_page = feed_query_count(client, f'/api/client/listings/{vehicle}?page_size=20')
+
+    assert len(small_page) == 5
+    assert len(full_page) == 20
+    assert full == small
+    assert full <= MAX_FEED_QUERIES
+
+
+def test_card_feed_query_count_is_bounded(client, seed_listings):
+    seed_listings(len(VEHICLE_TYPES) * 25)
+
+    small, small_page = feed_query_count(client, '/api/client/listings/car?page_size=5&fields=card')
+    full, full_page = feed_query_count(client, '/api/client/listings/car?page_size=20&fields=card')
+
+    assert len(full_page) == 20
+    assert full == small
+    assert full <= MAX_CARD_FEED_QUERIES
+
+
+def test_search_feed_query_count_is_bounded(client, seed_listings):
+    seed_listings(len(VEHICLE_TYPES) * 25)
+
+    small, _ = feed_query_count(client, '/api/client/all-listing-search?search=corolla&page_size=5')
+    full, full_page = feed_query_count(client, '/api/client/all-listing-search?search=corolla&page_size=20')
+
+    assert len(full_page) == 20
+    assert full == small
+    assert full <= MAX_SEARCH_QUERIES
+
+
+def test_user_feed_query_count_is_bounded(client, seed_listings):
+    user_id = seed_listings(len(VEHICLE_TYPES) * 25)
+
+    small, _ = feed_query_count(client, f'/api/client/user-car-view/{user_id}?page_size=5')
+    full, full_page = feed_query_count(client, f'/api/client/user-car-view/{user_id}?page_size=20')
+
+    assert len(full_page) == 20
+    assert full == small
+    assert full <= MAX_FEED_QUERIES
@@ -0,0 +1,100 @@
+import io
+import threading
+
+from PIL import Image
+
+from app import db, images
+from app.images import store_encoded_image, release_images, unreferenced_image_names, upload_cleanup
+from app.models import StoredImage, Brand
+from app.storage import upload_storage
+
+from conftest import count_queries
+
+
+def photo():
+    output = io.BytesIO()
+    Image.new('RGB', (300, 200), (20, 120, 200)).save(output, format='JPEG')
+    return output.getvalue()
+
+
+def ref_counts():
+    db.session.rollback()
+    return dict(db.session.query(StoredImage.filename, StoredImage.ref_count))
+
+
+def test_released_images_stay_on_record_until_their_files_are_deleted(app, monkeypatch):
+    filename = store_encoded_image(photo(), 100)
+    # Uploaded before stored_image existed, no row names it
+    upload_storage.save('legacy.jpg', photo())
+    db.session.commit()
+
+    def failing_delete(names):
+        raise OSError('storage unavailable')
+
+    monkeypatch.setattr(images, 'UPLOAD_CLEANUP_RETRY_DELAY', 0)
+    monkeypatch.setattr(upload_storage, 'delete', failing_delete)
+    release_images([filename, 'legacy.jpg'])
+    db.session.commit()
+    upload_cleanup.wait()
+
+    assert ref_counts() == {filename: 0, 'legacy.jpg': 0}
+    assert upload_storage.exists(filename) and upload_storage.exists('legacy.jpg')
+
+    monkeypatch.undo()
+    result = app.test_cli_runner().invoke(args=['sweep-released-images'])
+
+    assert 'Swept 2 released images, 0 still to delete.' in result.output
+    assert ref_counts() == {}
+    assert not upload_storage.exists(filename) and not upload_storage.exists('legacy.jpg')
+
+
+def test_reacquired_image_is_not_deleted(app, monkeypatch):
+    filename = store_encoded_image(photo(), 100)
+    db.session.commit()
+
+    # Hold the cleanup between picking the released image and deleting it
+    selected, resume = threading.Event(), threading.Event()
+
+    def paused(filenames):
+        unreferenced = unreferenced_image_names(filenames)
+        selected.set()
+        assert resume.wait(10)
+        return unreferenced
+
+    monkeypatch.setattr(images, 'unreferenced_image_names', paused)
+    release_images([filename])
+    db.session.commit()
+    assert selected.wait(10)
+
+    # Uploaded again while the cleanup is paused
+    store_encoded_image(photo(), 100)
+    db.session.commit()
+    resume.set()
+    upload_cleanup.wait()
+
+    assert ref_counts() == {filename: 1}
+    assert upload_storage.exists(filename)
+
+
+def test_reconcile_corrects_drifted_ref_counts(app, seed_listings):
+    seed_listings(2)
+    db.session.query(Brand).update({'image': 'featured0.jpg'})
+    db.session.add_all([
+        # Named by a listing and the brand
+        StoredImage(filename='featured0.jpg', ref_count=5),
+        StoredImage(filename='gallery1.jpg', ref_count=1),
+        StoredImage(filename='orphan.jpg', ref_count=3),
+    ])
+    upload_storage.save('orphan.jpg', photo())
+    db.session.commit()
+
+    with count_queries() as statements:
+        result = app.test_cli_runner().invoke(args=['reconcile-image-refcounts'])
+
+    assert 'Corrected ref_count on 2 stored images.' in result.output
+    # The orphan's row goes with its file
+    assert ref_counts() == {'featured0.jpg': 2, 'gallery1.jpg': 1}
+    assert not upload_storage.exists('orphan.jpg')
+    reconcile = [s for s in statements if 'UNION ALL' in s]
+    assert len(reconcile) == 1 and 'stored_image' in reconcile[0]
+    assert len([s for s in statements if s.lstrip().upper().startswith('UPDATE STORED_IMAGE')]) == 2
@@ -0,0 +1,70 @@
+import csv
+import io
+import os
+import zipfile
+
+from PIL import Image
+
+from app import db
+from app.imports import create_import_job, run_import, IMPORT_DONE, IMPORT_IMAGE_MAX_BYTES
+from app.models import Brand, Location, Community, Listings
+from app.vehicles import VEHICLE_TYPES, LISTING_FIELDS
+
+
+def import_rows(rows):
+    fields = sorted({field for row in rows for field in row})
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(rows)
+    return io.BytesIO(text.getvalue().encode('utf-8'))
+
+
+def car_row(featured_image):
+    row = {field: '1' for field in (*LISTING_FIELDS, *VEHICLE_TYPES['car']['fields'])}
+    row.update({
+        'vehicle_type': 'car', 'vin': 'VIN', 'model': 'Corolla', 'model_year': '2020', 'featured_as': 'standard',
+        'brand_id': db.session.query(Brand.id).scalar(), 'location_id': db.session.query(Location.id).scalar(),
+        'community_id': db.session.query(Community.id).scalar(), 'safety_features': 'abs', 'amenities': 'ac',
+        'featured_image': featured_image,
+    })
+    return row
+
+
+def run_job(user_id, rows, images):
+    job = create_import_job(user_id, import_rows(rows), 'csv', images)
+    job_folder = os.path.dirname(job.rows_path)
+    assert os.path.isdir(job_folder)
+    return run_import(job.id, 25), job_folder
+
+
+def test_done_import_removes_its_files(app, seed_listings):
+    user_id = seed_listings(0)
+    photo = io.BytesIO()
+    Image.new('RGB', (400, 300), (200, 30, 30)).save(photo, format='JPEG')
+    images = io.BytesIO()
+    with zipfile.ZipFile(images, 'w') as archive:
+        archive.writestr('photo.jpg', photo.getvalue())
+    images.seek(0)
+
+    job, job_folder = run_job(user_id, [car_row('photo.jpg')], images)
+
+    assert job.status == IMPORT_DONE
+    assert job.created_count == 1
+    assert not os.path.exists(job_folder)
+
+
+def test_import_rejects_oversized_zip_entries(app, seed_listings):
+    user_id = seed_listings(0)
+    images = io.BytesIO()
+    # Zeros compress to almost nothing, the entry only looks small inside the zip
+    with zipfile.ZipFile(images, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('bomb.jpg', bytes(IMPORT_IMAGE_MAX_BYTES + 1))
+    images.seek(0)
+    assert len(images.getvalue()) < IMPORT_IMAGE_MAX_BYTES // 100
+
+    job, _ = run_job(user_id, [car_row('bomb.jpg')], images)
+
+    assert job.failed_count == 1
+    assert 'larger than' in job.report
+    assert db.session.query(Listings).count() == 0
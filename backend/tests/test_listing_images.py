@@ -0,0 +1,108 @@
+import io
+from pathlib import Path
+
+from flask_jwt_extended import create_access_token
+from PIL import Image
+from sqlalchemy import event
+
+from app import db
+from app.images import image_pipeline, upload_cleanup, STAGING_PREFIX
+from app.models import User, Listings, ListingImage
+from app.storage import upload_storage
+from app.vehicles import VEHICLE_TYPES, LISTING_FIELDS
+
+
+def headers(user_id):
+    user = db.session.get(User, user_id)
+    token = create_access_token(identity={
+        'email': user.email, 'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name,
+    })
+    return {'Authorization': f'Bearer {token}'}
+
+
+def photo(shade):
+    output = io.BytesIO()
+    Image.new('RGB', (300, 200), (shade, 60, 90)).save(output, format='JPEG')
+    return output.getvalue()
+
+
+def test_add_images_commits_once(client, seed_listings):
+    user_id = seed_listings(1)
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, 'commit', on_commit)
+    try:
+        response = client.post(
+            '/api/client/listings/car/1/add-images', headers=headers(user_id), content_type='multipart/form-data',
+            data={'images': [(io.BytesIO(photo(shade)), f'{shade}.jpg') for shade in (10, 20, 30)]},
+        )
+    finally:
+        event.remove(db.engine, 'commit', on_commit)
+
+    assert response.status_code == 200
+    assert db.session.query(ListingImage).filter_by(listing_id=1).count() == 4
+    # The request's own commit plus the inline image pipeline marking the listing ready
+    assert len(commits) == 2
+
+
+def update_featured_image(client, user_id, data):
+    return client.put('/api/client/listings/car/1/update-featured-image', headers=headers(user_id),
+                      content_type='multipart/form-data', data={'featured_image': (io.BytesIO(data), 'new.jpg')})
+
+
+def test_featured_image_is_swapped_in_once_stored(client, seed_listings, monkeypatch):
+    user_id = seed_listings(1)
+    assert update_featured_image(client, user_id, photo(10)).status_code == 200
+    db.session.rollback()
+    old = db.session.get(Listings, 1).featured_image
+    assert upload_storage.exists(old)
+
+    # Hold the pipeline back, the listing must keep serving the old image meanwhile
+    submitted = []
+    monkeypatch.setattr(image_pipeline, 'submit', lambda listing_id, jobs: submitted.append((listing_id, jobs)))
+    response = update_featured_image(client, user_id, photo(200))
+    assert response.status_code == 200
+    assert response.json['updated_data']['featured_image'] == old
+    new = submitted[0][1][0].filename
+    assert not upload_storage.exists(new)
+
+    monkeypatch.undo()
+    image_pipeline.submit(*submitted[0])
+    upload_cleanup.wait()
+    db.session.rollback()
+
+    assert db.session.get(Listings, 1).featured_image == new
+    assert upload_storage.exists(new)
+    assert not upload_storage.exists(old)
+    assert db.session.get(Listings, 1).image_status == 'ready'
+
+
+def staged_files(app):
+    return [path.name for path in Path(app.config['UPLOAD_FOLDER']).rglob(f'{STAGING_PREFIX}*')]
+
+
+def test_failed_create_removes_its_staged_uploads(app, client, seed_listings):
+    user_id = seed_listings(0)
+    form = {field: '1' for field in (*LISTING_FIELDS, *VEHICLE_TYPES['car']['fields'])}
+    form.update({'vin': 'VIN', 'model': 'Corolla', 'model_year': '2020', 'featured_as': 'standard',
+                 'user_id': user_id, 'brand_id': 1, 'location_id': 1, 'community_id': 1,
+                 'safety_features': 'abs', 'amenities': 'ac'})
+    # doors is missing, the create fails after the uploads are staged
+    del form['doors']
+    form['featured_image'] = (io.BytesIO(photo(40)), 'featured.jpg')
+    form['images'] = [(io.BytesIO(photo(50)), 'gallery.jpg')]
+
+    response = client.post('/api/client/listings/car/create', data=form, headers=headers(user_id),
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert len(staged_files(app)) == 2
+
+    # The request shares the test's app context, end its session the way the app context teardown does
+    db.session.remove()
+    upload_cleanup.wait()
+
+    assert staged_files(app) == []
+    assert db.session.query(Listings).count() == 0
@@ -0,0 +1,82 @@
+from sqlalchemy import event
+
+from app import db
+from app.models import SafetyFeatures, ListingAmenities
+
+from conftest import count_queries
+from test_listing_images import headers
+
+
+def commit_count(request):
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, 'commit', on_commit)
+    try:
+        response = request()
+    finally:
+        event.remove(db.engine, 'commit', on_commit)
+    return response, len(commits)
+
+
+def names(model, listing_id):
+    db.session.rollback()
+    return sorted(name for (name,) in db.session.query(model.name).filter_by(listing_id=listing_id))
+
+
+def test_add_safety_features_skips_existing_names_in_any_case(client, seed_listings):
+    user_id = seed_listings(1)
+    db.session.add(SafetyFeatures(listing_id=1, name='Airbags'))
+    db.session.commit()
+
+    with count_queries() as statements:
+        response, commits = commit_count(lambda: client.post(
+            '/api/client/listings/car/1/add-safety-features', headers=headers(user_id),
+            json={'features': ['airbags', 'ABS', 'Lane assist', 'lane assist ']},
+        ))
+
+    assert response.status_code == 200
+    assert names(SafetyFeatures, 1) == ['Airbags', 'Lane assist', 'abs']
+    assert commits == 1
+    assert len([s for s in statements if s.lstrip().upper().startswith('INSERT')]) == 1
+
+
+def test_add_amenities_commits_once(client, seed_listings):
+    user_id = seed_listings(1)
+
+    response, commits = commit_count(lambda: client.post(
+        '/api/client/listings/car/1/add-amenities', headers=headers(user_id),
+        json={'amenities': ['AC', 'Sunroof', 'Heated seats']},
+    ))
+
+    assert response.status_code == 200
+    assert names(ListingAmenities, 1) == ['Heated seats', 'Sunroof', 'ac']
+    assert commits == 1
+
+
+def test_delete_only_touches_the_listing_rows(client, seed_listings):
+    user_id = seed_listings(2)
+    db.session.add_all([SafetyFeatures(listing_id=1, name='Airbags'), ListingAmenities(listing_id=1, name='Sunroof')])
+    db.session.commit()
+    feature_ids = [row_id for (row_id,) in db.session.query(SafetyFeatures.id)]
+    amenity_ids = [row_id for (row_id,) in db.session.query(ListingAmenities.id)]
+
+    with count_queries() as statements:
+        features, feature_commits = commit_count(lambda: client.delete(
+            '/api/client/listings/car/1/delete-safety-features', headers=headers(user_id),
+            json={'feature_ids': feature_ids},
+        ))
+        amenities, amenity_commits = commit_count(lambda: client.delete(
+            '/api/client/listings/car/1/delete-amenities', headers=headers(user_id),
+            json={'amenity_ids': amenity_ids},
+        ))
+
+    assert features.status_code == amenities.status_code == 200
+    assert names(SafetyFeatures, 1) == names(ListingAmenities, 1) == []
+    # The second listing belongs to the same user but isn't the one named in the url
+    assert names(SafetyFeatures, 2) == ['abs']
+    assert names(ListingAmenities, 2) == ['ac']
+    assert feature_commits == amenity_commits == 1
+    assert len([s for s in statements if s.lstrip().upper().startswith('DELETE')]) == 2
@@ -0,0 +1,130 @@
+import io
+
+import pytest
+
+from app import db
+from app.images import upload_cleanup, STAGING_PREFIX
+from app.models import ListingImage
+from app.storage import S3Storage, S3_DELETE_BATCH, upload_storage
+
+from test_listing_images import headers, photo
+
+botocore_exceptions = pytest.importorskip('botocore.exceptions')
+
+
+def client_error(code, operation):
+    return botocore_exceptions.ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+
+
+# In-memory bucket answering the calls S3Storage makes the way S3 and MinIO do
+class FakeS3:
+    def __init__(self, failing=()):
+        self.objects = {}
+        self.failing = set(failing)
+        self.delete_calls = []
+
+    def put_object(self, Bucket, Key, Body, **extra_args):
+        assert isinstance(Body, bytes)
+        self.objects[(Bucket, Key)] = (Body, extra_args)
+
+    def head_object(self, Bucket, Key):
+        if Key == 'denied':
+            raise client_error('403', 'HeadObject')
+        if (Bucket, Key) not in self.objects:
+            raise client_error('404', 'HeadObject')
+        return {}
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise client_error('NoSuchKey', 'GetObject')
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)][0])}
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [obj['Key'] for obj in Delete['Objects']]
+        assert len(keys) <= 1000
+        self.delete_calls.append(keys)
+        errors = []
+        for key in keys:
+            if key in self.failing:
+                errors.append({'Key': key, 'Code': 'AccessDenied', 'Message': 'Access Denied'})
+            else:
+                # Missing keys count as deleted, like S3
+                self.objects.pop((Bucket, key), None)
+        return {'Errors': errors} if errors else {}
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://bucket.test/{Params['Key']}?expires={ExpiresIn}"
+
+
+def test_save_read_exists_and_url():
+    client = FakeS3()
+    storage = S3Storage(client, 'media', 'uploaded_img/', max_age=600)
+
+    storage.save('a.webp', b'webp bytes')
+
+    body, extra_args = client.objects[('media', 'uploaded_img/a.webp')]
+    assert body == b'webp bytes'
+    assert extra_args == {'ContentType': 'image/webp', 'CacheControl': 'public, max-age=600, immutable'}
+    assert storage.read('a.webp') == b'webp bytes'
+    assert storage.exists('a.webp')
+    assert not storage.exists('b.webp')
+    assert storage.url('a.webp') == 'https://bucket.test/uploaded_img/a.webp?expires=3600'
+    assert S3Storage(client, 'media', 'uploaded_img/', 'https://cdn.test/').url('a.webp') == \
+        'https://cdn.test/uploaded_img/a.webp'
+
+
+def test_missing_and_denied_objects():
+    storage = S3Storage(FakeS3(), 'media')
+
+    with pytest.raises(FileNotFoundError):
+        storage.read('missing.jpg')
+    # Anything but a missing key is a real failure, not a missing file
+    with pytest.raises(botocore_exceptions.ClientError):
+        storage.exists('denied')
+
+
+def test_delete_is_batched():
+    client = FakeS3()
+    storage = S3Storage(client, 'media', 'p/')
+    names = [f'{i}.jpg' for i in range(2 * S3_DELETE_BATCH + 5)]
+    for name in names[:10]:
+        storage.save(name, b'x')
+
+    storage.delete(names)
+
+    assert [len(keys) for keys in client.delete_calls] == [S3_DELETE_BATCH, S3_DELETE_BATCH, 5]
+    assert client.delete_calls[0][0] == 'p/0.jpg'
+    assert client.objects == {}
+
+
+def test_delete_raises_for_keys_that_failed():
+    client = FakeS3(failing={'p/1.jpg'})
+    storage = S3Storage(client, 'media', 'p/')
+    storage.save('0.jpg', b'x')
+    storage.save('1.jpg', b'x')
+
+    with pytest.raises(OSError, match='p/1.jpg'):
+        storage.delete(['0.jpg', '1.jpg'])
+    assert list(client.objects) == [('media', 'p/1.jpg')]
+
+
+def test_listing_images_go_to_the_bucket(client, seed_listings, monkeypatch):
+    user_id = seed_listings(1)
+    bucket = FakeS3()
+    monkeypatch.setattr(upload_storage, 'backend', S3Storage(bucket, 'media', 'uploaded_img/'))
+    seeded = {image for (image,) in db.session.query(ListingImage.image).filter_by(listing_id=1)}
+
+    response = client.post(
+        '/api/client/listings/car/1/add-images', headers=headers(user_id), content_type='multipart/form-data',
+        data={'images': [(io.BytesIO(photo(shade)), f'{shade}.jpg') for shade in (10, 20)]},
+    )
+    upload_cleanup.wait()
+    db.session.rollback()
+
+    assert response.status_code == 200
+    added = {image for (image,) in db.session.query(ListingImage.image).filter_by(listing_id=1)} - seeded
+    keys = {key for (_, key) in bucket.objects}
+    assert len(added) == 2
+    assert {f'uploaded_img/{name}' for name in added} <= keys
+    # The staged copies were read back from the bucket and removed once stored
+    assert not [key for key in keys if key.startswith(f'uploaded_img/{STAGING_PREFIX}')]